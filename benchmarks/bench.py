@@ -0,0 +1,412 @@
+"""Load tests and benchmarks of the Synx run tool.
+
+Drives `PythonExecutor.execute` directly, or the full MCP server over stdio or
+streamable HTTP, with N concurrent clients running representative workloads.
+Every run reports p50/p99 latency, calls per second and RSS growth, and can
+write them as JSON so results can be compared between releases:
+
+    PYTHONPATH=src python benchmarks/bench.py run --target executor --target http --output after.json
+    PYTHONPATH=src python benchmarks/bench.py compare before.json after.json
+"""
+
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+
+import httpx
+import typer
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+from pydantic import BaseModel, Field
+from rich.console import Console
+from rich.table import Table
+
+from synx import __version__
+from synx.code_executor import PythonExecutor
+from synx.config import AppConfig, ExecutorBackend
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+console = Console()
+app = typer.Typer(name="bench", help="Benchmarks of the Synx run tool", add_completion=False)
+
+
+class Target(str, Enum):
+    """What the benchmark clients talk to."""
+
+    EXECUTOR = "executor"
+    STDIO = "stdio"
+    HTTP = "http"
+
+
+class Workload(BaseModel):
+    """Code run by every benchmark client."""
+
+    name: str = Field(description="Workload name")
+    code: str = Field(description="Code timed on every call")
+    setup: str | None = Field(default=None, description="Code run once in the session of every client, untimed")
+    churn: bool = Field(default=False, description="Every call creates a new session and closes it")
+
+
+WORKLOADS = {
+    workload.name: workload
+    for workload in [
+        Workload(name="print", code="print('hello')"),
+        Workload(
+            name="numpy",
+            setup="import numpy as np\nrng = np.random.default_rng(0)",
+            code="a = rng.random((200, 200))\nresult = float((a @ a).sum())",
+        ),
+        Workload(
+            name="large_state",
+            setup="import numpy as np\nmatrix = np.ones((4096, 4096))\nrows = [list(range(100)) for _ in range(10_000)]",
+            code="total = len(rows) + matrix.shape[0]",
+        ),
+        Workload(name="churn", code="x = 1", churn=True),
+    ]
+}
+
+
+class BenchmarkResult(BaseModel):
+    """Measurements of one workload against one target."""
+
+    target: Target
+    backend: ExecutorBackend
+    workload: str
+    clients: int
+    calls: int = Field(description="Timed calls over all clients")
+    errors: int = Field(description="Timed calls that returned an error")
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+    max_ms: float
+    calls_per_second: float
+    rss_growth_bytes: int | None = Field(
+        description="Growth of the resident memory of the server processes over the timed calls (Linux only)"
+    )
+
+
+class BenchmarkReport(BaseModel):
+    """Machine-readable output of a benchmark run."""
+
+    synx_version: str = __version__
+    python: str = Field(default_factory=platform.python_version)
+    platform: str = Field(default_factory=platform.platform)
+    cpus: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    started_at: datetime = Field(default_factory=datetime.now)
+    results: list[BenchmarkResult] = Field(default_factory=list)
+
+
+class _Context:
+    """Stand-in for the MCP request context when driving the executor directly."""
+
+    async def log(self, level: str, message: str, logger_name: str | None = None) -> None:
+        pass
+
+    async def report_progress(self, progress: float, total: float | None = None, message: str | None = None) -> None:
+        pass
+
+
+# Runs code in a session (None for a new one) and returns the session id and whether it failed
+RunCall = Callable[[str, str | None], Awaitable[tuple[str, bool]]]
+CloseCall = Callable[[str], Awaitable[None]]
+
+
+def _children(pid: int) -> list[int]:
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return []
+    children: list[int] = []
+    for task in tasks:
+        try:
+            children.extend(int(child) for child in Path(f"/proc/{pid}/task/{task}/children").read_text().split())
+        except OSError:
+            pass
+    return children
+
+
+def _tree_rss(pid: int) -> int | None:
+    """Resident memory of a process and all its descendants, from /proc."""
+    if not os.path.isdir("/proc"):
+        return None
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            for line in Path(f"/proc/{current}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1]) * 1024
+                    break
+        except OSError:
+            continue
+        pending.extend(_children(current))
+    return total
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    # Nearest rank
+    return sorted_values[min(len(sorted_values) - 1, max(math.ceil(fraction * len(sorted_values)) - 1, 0))]
+
+
+def _tool_call(session: ClientSession) -> tuple[RunCall, CloseCall]:
+    async def run_code(code: str, session_id: str | None) -> tuple[str, bool]:
+        arguments = {"code": code} if session_id is None else {"code": code, "session_id": session_id}
+        result = await session.call_tool("run", arguments)
+        if result.isError:
+            raise RuntimeError(result.content[0].text if result.content else "run failed")
+        state = json.loads(result.content[0].text)
+        return state["session"]["session_id"], state.get("error") is not None
+
+    async def close(session_id: str) -> None:
+        await session.call_tool("close_session", {"session_id": session_id})
+
+    return run_code, close
+
+
+async def _drive(
+    clients: list[tuple[RunCall, CloseCall]], workload: Workload, calls: int, warmup: int, rss: Callable[[], int | None]
+) -> tuple[list[float], int, float, int | None]:
+    """Run a workload on every client concurrently.
+
+    Returns:
+        Latencies in seconds, number of errors, wall time and RSS growth
+    """
+    sessions: list[str | None] = [None] * len(clients)
+    for index, (run_code, _) in enumerate(clients):
+        if not workload.churn:
+            sessions[index], _ = await run_code(workload.setup or "pass", None)
+
+    async def call(index: int) -> tuple[float, bool]:
+        run_code, close = clients[index]
+        started = time.perf_counter()
+        session_id, failed = await run_code(workload.code, sessions[index])
+        if workload.churn:
+            await close(session_id)
+        return time.perf_counter() - started, failed
+
+    async def client_loop(index: int, count: int, latencies: list[float] | None) -> int:
+        errors = 0
+        for _ in range(count):
+            elapsed, failed = await call(index)
+            errors += failed
+            if latencies is not None:
+                latencies.append(elapsed)
+        return errors
+
+    await asyncio.gather(*(client_loop(index, warmup, None) for index in range(len(clients))))
+    rss_before = rss()
+    latencies: list[float] = []
+    started = time.perf_counter()
+    errors = await asyncio.gather(*(client_loop(index, calls, latencies) for index in range(len(clients))))
+    wall = time.perf_counter() - started
+    rss_after = rss()
+
+    for index, (_, close) in enumerate(clients):
+        if sessions[index] is not None:
+            await close(sessions[index])
+    growth = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    return latencies, sum(errors), wall, growth
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_env(backend: ExecutorBackend, transport: str, port: int | None = None) -> dict[str, str]:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC_DIR), os.getenv("PYTHONPATH")])),
+        "TRANSPORT": transport,
+        "EXECUTOR_BACKEND": backend.value,
+        "LOG_LEVEL": "WARNING",
+        "STREAM_OUTPUT": "false",
+    }
+    if port is not None:
+        env.update({"HOST": "127.0.0.1", "PORT": str(port)})
+    return env
+
+
+async def _wait_for_http(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server did not answer on {url} within {timeout:g}s")
+
+
+async def _benchmark(
+    target: Target, backend: ExecutorBackend, workload: Workload, clients: int, calls: int, warmup: int
+) -> BenchmarkResult:
+    async with AsyncExitStack() as stack:
+        if target == Target.EXECUTOR:
+            executor = PythonExecutor(AppConfig(executor_backend=backend, stream_output=False, max_sessions=None))
+            stack.push_async_callback(executor.shutdown)
+            ctx = _Context()
+
+            async def run_code(code: str, session_id: str | None) -> tuple[str, bool]:
+                state = await executor.execute(ctx, code, session_id)
+                return state.session.session_id, state.error is not None
+
+            async def close(session_id: str) -> None:
+                await executor.close_session(ctx, session_id)
+
+            drivers = [(run_code, close)] * clients
+            pid = os.getpid()
+        elif target == Target.STDIO:
+            # One server process per stdio connection; the clients share it and their calls are multiplexed
+            params = StdioServerParameters(
+                command=sys.executable, args=["-m", "synx", "start"], env=_server_env(backend, "stdio")
+            )
+            read, write = await stack.enter_async_context(stdio_client(params, errlog=open(os.devnull, "w")))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            drivers = [_tool_call(session)] * clients
+            pid = os.getpid()
+        else:
+            port = _free_port()
+            process = subprocess.Popen(
+                [sys.executable, "-m", "synx", "start"],
+                env=_server_env(backend, "streamable-http", port),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            stack.callback(process.wait)
+            stack.callback(process.terminate)
+            await _wait_for_http(f"http://127.0.0.1:{port}/metrics", process)
+            drivers = []
+            for _ in range(clients):
+                read, write, _ = await stack.enter_async_context(streamablehttp_client(f"http://127.0.0.1:{port}/mcp"))
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+                drivers.append(_tool_call(session))
+            pid = process.pid
+
+        latencies, errors, wall, growth = await _drive(drivers, workload, calls, warmup, lambda: _tree_rss(pid))
+
+    latencies.sort()
+    return BenchmarkResult(
+        target=target,
+        backend=backend,
+        workload=workload.name,
+        clients=clients,
+        calls=len(latencies),
+        errors=errors,
+        p50_ms=_percentile(latencies, 0.50) * 1000,
+        p99_ms=_percentile(latencies, 0.99) * 1000,
+        mean_ms=sum(latencies) / len(latencies) * 1000,
+        max_ms=latencies[-1] * 1000,
+        calls_per_second=len(latencies) / wall,
+        rss_growth_bytes=growth,
+    )
+
+
+def _print_results(results: list[BenchmarkResult]) -> None:
+    table = Table(title=f"Synx v{__version__} benchmarks")
+    for column in ("target", "backend", "workload", "clients", "calls", "errors", "p50 ms", "p99 ms", "calls/s", "RSS growth MB"):
+        table.add_column(column, justify="left" if column in ("target", "backend", "workload") else "right")
+    for result in results:
+        growth = "-" if result.rss_growth_bytes is None else f"{result.rss_growth_bytes / 2**20:.1f}"
+        table.add_row(
+            result.target.value,
+            result.backend.value,
+            result.workload,
+            str(result.clients),
+            str(result.calls),
+            str(result.errors),
+            f"{result.p50_ms:.2f}",
+            f"{result.p99_ms:.2f}",
+            f"{result.calls_per_second:.1f}",
+            growth,
+        )
+    console.print(table)
+
+
+@app.command()
+def run(
+    target: list[Target] = typer.Option([Target.EXECUTOR], "--target", "-t", help="What the clients talk to"),
+    workload: list[str] = typer.Option(list(WORKLOADS), "--workload", "-w", help="Workloads to run"),
+    backend: ExecutorBackend = typer.Option(ExecutorBackend.PROCESS, "--backend", "-b", help="Execution backend"),
+    clients: int = typer.Option(4, "--clients", "-c", help="Concurrent clients"),
+    calls: int = typer.Option(50, "--calls", "-n", help="Timed calls per client"),
+    warmup: int = typer.Option(5, "--warmup", help="Untimed calls per client before measuring"),
+    output: Path | None = typer.Option(None, "--output", "-o", help="Write the results to this JSON file"),
+) -> None:
+    """Run workloads against targets and report latency, throughput and RSS growth."""
+    unknown = set(workload) - WORKLOADS.keys()
+    if unknown:
+        raise typer.BadParameter(f"Unknown workloads: {', '.join(sorted(unknown))}. Known: {', '.join(WORKLOADS)}")
+    report = BenchmarkReport()
+    for selected_target in target:
+        for name in workload:
+            console.print(f"Running {name} against {selected_target.value} ({backend.value} backend, {clients} clients)")
+            result = asyncio.run(_benchmark(selected_target, backend, WORKLOADS[name], clients, calls, warmup))
+            report.results.append(result)
+    _print_results(report.results)
+    if output is not None:
+        output.write_text(report.model_dump_json(indent=2))
+        console.print(f"Results written to {output}")
+
+
+@app.command()
+def compare(
+    baseline: Path = typer.Argument(..., help="JSON results of the reference run"),
+    current: Path = typer.Argument(..., help="JSON results to check"),
+    tolerance: float = typer.Option(0.2, "--tolerance", help="Allowed relative p99 increase or throughput drop"),
+) -> None:
+    """Compare two runs and exit with an error if any measurement regressed beyond the tolerance."""
+    before = BenchmarkReport.model_validate_json(baseline.read_text())
+    after = BenchmarkReport.model_validate_json(current.read_text())
+    reference = {(r.target, r.backend, r.workload, r.clients): r for r in before.results}
+
+    table = Table(title=f"v{before.synx_version} -> v{after.synx_version}")
+    for column in ("target", "backend", "workload", "clients", "p50", "p99", "calls/s", ""):
+        table.add_column(column)
+    regressions = 0
+    for result in after.results:
+        old = reference.get((result.target, result.backend, result.workload, result.clients))
+        if old is None:
+            continue
+        p99 = result.p99_ms / old.p99_ms if old.p99_ms else 1.0
+        throughput = result.calls_per_second / old.calls_per_second if old.calls_per_second else 1.0
+        regressed = p99 > 1 + tolerance or throughput < 1 - tolerance
+        regressions += regressed
+        table.add_row(
+            result.target.value,
+            result.backend.value,
+            result.workload,
+            str(result.clients),
+            f"x{result.p50_ms / old.p50_ms:.2f}" if old.p50_ms else "-",
+            f"x{p99:.2f}",
+            f"x{throughput:.2f}",
+            "[red]regressed[/red]" if regressed else "",
+        )
+    console.print(table)
+    if regressions:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from typing import Any
+
+import httpx
+import jwt
+from mcp.server.auth.provider import AccessToken, TokenVerifier
+
+from synx.auth.token_verifier import TOKEN_VERIFICATIONS, allowed_audience
+from synx.logger import get_logger
+
+logger = get_logger()
+
+
+class JWTTokenVerifier(TokenVerifier):
+    """Token verifier that validates signed JWT access tokens locally.
+
+    Signatures are checked against the keys of a JWKS document that is fetched
+    once and cached; it is only fetched again when a token is signed with an
+    unknown key id (at most once per `jwks_refresh_interval_seconds`, or per
+    `jwks_retry_interval_seconds` after a failed fetch). The
+    RFC 8707 audience check is always performed, so the authorization server is
+    not involved in serving requests at all.
+    """
+
+    def __init__(
+        self,
+        jwks_uri: str,
+        server_url: str,
+        issuer: str | None = None,
+        algorithms: list[str] | None = None,
+        jwks_refresh_interval_seconds: float = 30.0,
+        jwks_retry_interval_seconds: float = 1.0,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        logger.warning(f"Initializing JWTTokenVerifier with JWKS uri: {jwks_uri}")
+        logger.warning(f"Initializing JWTTokenVerifier with server url: {server_url}")
+        self.jwks_uri = jwks_uri
+        self.server_url = server_url
+        self.issuer = issuer
+        self.algorithms = algorithms or ["RS256"]
+        self.jwks_refresh_interval_seconds = jwks_refresh_interval_seconds
+        self.jwks_retry_interval_seconds = jwks_retry_interval_seconds
+        self._http_client = http_client
+        self._keys: dict[str | None, jwt.PyJWK] = {}
+        # Monotonic time before which the JWKS is not fetched again
+        self._next_fetch_at: float | None = None
+        self._refresh_lock = asyncio.Lock()
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the event loop of the server
+        if self._http_client is None:
+            timeout = httpx.Timeout(10.0, connect=5.0)
+            self._http_client = httpx.AsyncClient(timeout=timeout, verify=True)
+        return self._http_client
+
+    async def aclose(self) -> None:
+        """Close the HTTP client used to fetch the JWKS. Call it when the server stops."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def _refresh_keys(self) -> None:
+        """Fetch the JWKS again unless it was fetched, or failed to be fetched, too recently."""
+        async with self._refresh_lock:
+            now = time.monotonic()
+            if self._next_fetch_at is not None and now < self._next_fetch_at:
+                return
+            logger.info(f"Fetching JWKS from: {self.jwks_uri}")
+            try:
+                response = await self._get_http_client().get(self.jwks_uri)
+                response.raise_for_status()
+                jwk_set = jwt.PyJWKSet.from_dict(response.json())
+            except Exception:
+                # Retry soon so keys rotated during an outage are not rejected for a whole interval
+                self._next_fetch_at = now + min(self.jwks_retry_interval_seconds, self.jwks_refresh_interval_seconds)
+                raise
+            self._keys = {key.key_id: key for key in jwk_set.keys}
+            self._next_fetch_at = now + self.jwks_refresh_interval_seconds
+
+    async def _get_key(self, kid: str | None) -> jwt.PyJWK | None:
+        key = self._keys.get(kid)
+        if key is None:
+            # Unknown key id: the authorization server may have rotated its keys
+            await self._refresh_keys()
+            key = self._keys.get(kid)
+            if key is None and kid is None and len(self._keys) == 1:
+                key = next(iter(self._keys.values()))
+        return key
+
+    async def verify_token(self, token: str) -> AccessToken | None:
+        """Verify a JWT access token locally."""
+
+        # Validate URL to prevent SSRF attacks
+        if not self.jwks_uri.startswith(("https://", "http://localhost", "http://127.0.0.1")):
+            logger.warning(f"Rejecting JWKS uri with unsafe scheme: {self.jwks_uri}")
+            return None
+
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = await self._get_key(kid)
+            if key is None:
+                logger.warning(f"No JWKS key found for kid: {kid}")
+                return None
+            claims: dict[str, Any] = jwt.decode(
+                token,
+                key,
+                algorithms=self.algorithms,
+                issuer=self.issuer,
+                options={"verify_aud": False, "require": ["exp"]},
+            )
+        except (jwt.PyJWTError, httpx.HTTPError, ValueError) as e:
+            logger.warning(f"JWT validation failed: {e}")
+            return None
+        TOKEN_VERIFICATIONS.inc(result="local")
+
+        # RFC 8707 resource validation
+        resource = allowed_audience(claims.get("aud"), self.server_url)
+        if resource is None:
+            logger.warning(f"Token audience {claims.get('aud')} does not allow {self.server_url}")
+            return None
+
+        scopes = claims.get("scope", claims.get("scp", []))
+        return AccessToken(
+            token=token,
+            client_id=claims.get("client_id") or claims.get("azp") or claims.get("sub", "unknown"),
+            scopes=scopes.split() if isinstance(scopes, str) else list(scopes),
+            expires_at=claims.get("exp"),
+            resource=resource,
+        )
@@ -1,16 +1,51 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+
 import httpx
 
 from mcp.server.auth.provider import AccessToken, TokenVerifier
+from mcp.shared.auth_utils import check_resource_allowed, resource_url_from_server_url
 
-from synx.logger import get_logger
+from synx.logger import get_logger, truncate
+from synx.metrics import REGISTRY
 
 logger = get_logger()
 
+TOKEN_VERIFICATIONS = REGISTRY.counter(
+    "synx_token_verifications_total", "Token verifications, by how they were served (hit, miss, coalesced, local)"
+)
+
+
+def allowed_audience(audience: str | list[str] | None, server_url: str) -> str | None:
+    """RFC 8707 resource validation of a token audience.
+
+    Args:
+        audience: The `aud` of the token, a single resource or a list of them
+        server_url: URL of this resource server
+
+    Returns:
+        The audience entry that allows access to this server, or None
+    """
+    if not audience:
+        return None
+    resource_url = resource_url_from_server_url(server_url)
+    for resource in [audience] if isinstance(audience, str) else audience:
+        if check_resource_allowed(requested_resource=resource_url, configured_resource=resource):
+            return resource
+    return None
+
+
 class SimpleTokenVerifier(TokenVerifier):
     """Simple token verifier that validates the token by calling the introspection endpoint.
-    
+
+    Introspection results are cached: active tokens until the cache TTL or the
+    token `exp` (whichever comes first), inactive ones for a shorter negative
+    TTL. Concurrent lookups of the same token share a single request, and one
+    pooled HTTP client is reused for the whole server lifetime (see `aclose`).
+
     Production grade implementations must take into account:
-    - Connection pooling and reuse
     - More sophisticated error handling
     - Rate limiting and retry logic
     - Comprehensive configuration options
@@ -21,6 +56,10 @@ class SimpleTokenVerifier(TokenVerifier):
         introspection_endpoint: str,
         server_url: str,
         oauth_strict: bool = False,
+        cache_ttl_seconds: float = 60.0,
+        negative_cache_ttl_seconds: float = 5.0,
+        cache_size: int = 10000,
+        http_client: httpx.AsyncClient | None = None,
     ):
         logger.warning(f"Initializing SimpleTokenVerifier with introspection endpoint: {introspection_endpoint}")
         logger.warning(f"Initializing SimpleTokenVerifier with server url: {server_url}")
@@ -28,8 +67,15 @@ class SimpleTokenVerifier(TokenVerifier):
         self.introspection_endpoint = introspection_endpoint
         self.server_url = server_url
         self.oauth_strict = oauth_strict
-        # self.resource_url = resource_url_from_server_url(server_url)  # Not used for now
-        
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.negative_cache_ttl_seconds = negative_cache_ttl_seconds
+        self.cache_size = cache_size
+        self._http_client = http_client
+        # Token hash -> (monotonic expiry, introspection result)
+        self._cache: OrderedDict[str, tuple[float, AccessToken | None]] = OrderedDict()
+        # Token hash -> introspection shared by the concurrent lookups of the token
+        self._inflight: dict[str, asyncio.Task[AccessToken | None]] = {}
+
     def _build_http_client(self) -> httpx.AsyncClient:
         timeout = httpx.Timeout(10.0, connect=5.0)
         limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
@@ -39,51 +85,116 @@ class SimpleTokenVerifier(TokenVerifier):
             verify=True,  # Enforce SSL verification
         )
 
+    def _get_http_client(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the event loop of the server
+        if self._http_client is None:
+            self._http_client = self._build_http_client()
+        return self._http_client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client. Call it when the server stops."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def _cache_get(self, key: str) -> tuple[bool, AccessToken | None]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        expires, token_info = entry
+        if expires <= time.monotonic():
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, token_info
+
+    def _cache_put(self, key: str, token_info: AccessToken | None) -> None:
+        ttl = self.cache_ttl_seconds if token_info is not None else self.negative_cache_ttl_seconds
+        if token_info is not None and token_info.expires_at is not None:
+            ttl = min(ttl, token_info.expires_at - time.time())
+        if ttl <= 0:
+            return
+        self._cache[key] = (time.monotonic() + ttl, token_info)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
     async def verify_token(self, token: str) -> AccessToken | None:
         """Verify token via introspection endpoint."""
 
         # Validate URL to prevent SSRF attacks
-        logger.info(f"Validating introspection endpoint: {self.introspection_endpoint}")
         if not self.introspection_endpoint.startswith(("https://", "https://authentic", "http://localhost", "http://127.0.0.1")):
             logger.warning(f"Rejecting introspection endpoint with unsafe scheme: {self.introspection_endpoint}")
             return None
 
-        async with self._build_http_client() as client:
-            try:
-                response = await client.post(
-                    self.introspection_endpoint,
-                    data={"token": token},
-                    headers={"Content-Type": "application/x-www-form-urlencoded"},
-                )
-
-                if response.status_code != 200:
-                    logger.warning(f"Token introspection status: {response.status_code}")
-                    return None
-
-                data = response.json()
-                
-                logger.warning(f"Token introspection data: {data}")
-                if not data.get("active", False):
-                    logger.warning(f"Token introspection is not active")
-                    return None
-
-                # TODO: Implement RFC 8707 resource validation (only when --oauth-strict is set)
-                if self.oauth_strict:
-                    pass
-                    # if self.oauth_strict and not self._validate_resource(data):
-                    #     logger.warning(f"Token resource validation failed. Expected: {self.resource_url}")
-                    #    return None
-
-                logger.warning(f"Token verification data: {data}")
-                token_info = AccessToken(
-                    token=token,
-                    client_id=data.get("client_id", "unknown"),
-                    scopes=data.get("scope", "").split() if data.get("scope") else [],
-                    expires_at=data.get("exp"),
-                    resource=data.get("aud"),  # Include resource in token
-                )
-                logger.debug(f"Token introspection successful: {token_info}")
-                return token_info
-            except Exception as e:
-                logger.warning(f"Token introspection failed: {e}")
-                return None
+        key = hashlib.sha256(token.encode()).hexdigest()
+        found, token_info = self._cache_get(key)
+        if found:
+            TOKEN_VERIFICATIONS.inc(result="hit")
+            return token_info
+
+        # Single-flight: concurrent lookups of the same token share one request. It runs in its own
+        # task, so a cancelled caller does not cancel it for the others
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            TOKEN_VERIFICATIONS.inc(result="miss")
+            inflight = self._inflight[key] = asyncio.create_task(self._lookup(key, token))
+            inflight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            TOKEN_VERIFICATIONS.inc(result="coalesced")
+        return await asyncio.shield(inflight)
+
+    async def _lookup(self, key: str, token: str) -> AccessToken | None:
+        """Introspect a token and cache the result."""
+        try:
+            token_info = await self._introspect(token)
+        except Exception as e:
+            # Transport failures are not cached
+            logger.warning(f"Token introspection failed: {e}")
+            return None
+        self._cache_put(key, token_info)
+        return token_info
+
+    async def _introspect(self, token: str) -> AccessToken | None:
+        """Call the introspection endpoint.
+
+        Returns:
+            AccessToken for an active token, None for a rejected one
+
+        Raises:
+            httpx.HTTPError: If the endpoint could not be reached
+        """
+        logger.debug("Introspecting token at: {}", self.introspection_endpoint)
+        response = await self._get_http_client().post(
+            self.introspection_endpoint,
+            data={"token": token},
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+
+        if response.status_code != 200:
+            logger.warning(f"Token introspection status: {response.status_code}")
+            return None
+
+        data = response.json()
+
+        logger.opt(lazy=True).debug("Token introspection data: {}", lambda: truncate(data))
+        if not data.get("active", False):
+            logger.warning(f"Token introspection is not active")
+            return None
+
+        # RFC 8707 resource validation (only when --oauth-strict is set)
+        audience = data.get("aud")
+        resource = allowed_audience(audience, self.server_url)
+        if self.oauth_strict and resource is None:
+            logger.warning(f"Token resource validation failed. Audience {audience} does not allow {self.server_url}")
+            return None
+
+        token_info = AccessToken(
+            token=token,
+            client_id=data.get("client_id", "unknown"),
+            scopes=data.get("scope", "").split() if data.get("scope") else [],
+            expires_at=data.get("exp"),
+            resource=resource or (audience if isinstance(audience, str) else None),  # Include resource in token
+        )
+        logger.opt(lazy=True).debug("Token introspection successful: {}", lambda: truncate(token_info))
+        return token_info
@@ -1,10 +1,18 @@
 import os
+from enum import Enum
 from pydantic_core.core_schema import to_string_ser_schema
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyHttpUrl
 from typing import Any
 
 
+class TokenVerifierMode(str, Enum):
+    """How access tokens are verified."""
+
+    INTROSPECTION = "introspection"
+    JWT = "jwt"
+
+
 class AuthConfig(BaseSettings):
     """Settings for the MCP Resource Server."""
 
@@ -20,3 +28,14 @@ class AuthConfig(BaseSettings):
 
     # RFC 8707 resource validation
     oauth_strict: bool = False
+
+    # Token introspection cache
+    introspection_cache_ttl: float = float(os.getenv("INTROSPECTION_CACHE_TTL", 60))
+    introspection_negative_cache_ttl: float = float(os.getenv("INTROSPECTION_NEGATIVE_CACHE_TTL", 5))
+
+    # Local JWT validation against the JWKS of the Authorization Server
+    token_verifier: TokenVerifierMode = TokenVerifierMode(os.getenv("TOKEN_VERIFIER", "introspection"))
+    jwks_uri: str = os.getenv("JWKS_URI", f"{os.getenv('AUTH_SERVER_URL', 'http://localhost:9000')}/.well-known/jwks.json")
+    jwt_issuer: str | None = os.getenv("JWT_ISSUER")
+    jwt_algorithms: list[str] = os.getenv("JWT_ALGORITHMS", "RS256").split(",")
+
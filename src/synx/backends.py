@@ -0,0 +1,700 @@
+"""Execution backends for Synx.
+
+An execution backend owns a fixed set of workers and runs user code on them,
+off the event loop. Every session is pinned to one worker for its whole life so
+its namespace never has to move; the event loop only awaits the results.
+
+A worker that does not stop a timed out execution by itself, or that dies, is
+replaced ("recycled"); sessions whose state went away with it are reported
+through the `on_sessions_lost` callback.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import signal
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Connection
+from typing import Any, cast
+
+from synx import worker
+from synx.capture import OutputCallback
+from synx.config import AppConfig, ExecutorBackend
+from synx.logger import get_logger
+from synx.metrics import REGISTRY
+from synx.routing import HashRing
+from synx.worker import (
+    ErrorKind,
+    ExecutionError,
+    ExecutionOptions,
+    ForkedWorker,
+    WorkerResult,
+    WorkerSettings,
+    WorkerStats,
+)
+
+logger = get_logger()
+
+WORKER_RECYCLES = REGISTRY.counter("synx_worker_recycles_total", "Workers replaced after a timeout, a limit or a crash")
+WORKERS = REGISTRY.gauge("synx_workers", "Number of execution workers, including the ones dedicated to forked sessions")
+WORKERS_BUSY = REGISTRY.gauge("synx_workers_busy", "Number of workers running an execution")
+WORKER_BUSY_SECONDS = REGISTRY.counter(
+    "synx_worker_busy_seconds_total", "Time workers spent running executions; divide its rate by synx_workers for utilization"
+)
+EXECUTION_QUEUE_DEPTH = REGISTRY.gauge(
+    "synx_execution_queue_depth", "Executions waiting for their worker to finish another execution"
+)
+
+SessionsLostCallback = Callable[[list[str]], Awaitable[None]]
+
+
+class WorkerError(RuntimeError):
+    """Raised when a worker fails to serve a request."""
+
+
+class ExecutionBackend(ABC):
+    """Base class for execution backends with session-to-worker affinity.
+
+    Sessions are routed to workers by consistent hashing of their id, so the
+    worker owning a session follows from its id alone, e.g. when a spilled
+    session comes back. New session ids are minted to hash onto the least
+    loaded worker (see new_session_id), which keeps the workers balanced.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        settings: WorkerSettings | None = None,
+        kill_grace_seconds: float = 2.0,
+        on_sessions_lost: SessionsLostCallback | None = None,
+    ):
+        """Initialize the backend.
+
+        Args:
+            workers: Number of workers in the pool
+            settings: Optional settings applied to every worker
+            kill_grace_seconds: Time a timed out execution gets to stop before
+                its worker is replaced
+            on_sessions_lost: Optional async callback receiving the ids of the
+                sessions whose state was lost when a worker was recycled
+        """
+        self.workers = max(1, workers)
+        self.settings = settings or WorkerSettings()
+        self.kill_grace_seconds = kill_grace_seconds
+        self.on_sessions_lost = on_sessions_lost
+        self._affinity: dict[str, int] = {}
+        # Sessions pinned to each worker. Indexes past `workers` are dedicated to a single forked session
+        self._load: dict[int, int] = dict.fromkeys(range(self.workers), 0)
+        self._ring = HashRing(range(self.workers))
+        # Executions submitted to each worker and not finished yet; one runs, the others wait
+        self._inflight: dict[int, int] = {}
+        WORKERS.set(self.workers)
+
+    def new_session_id(self) -> str:
+        """Mint an id for a new session that hashes onto the least loaded worker.
+
+        Returns:
+            Session identifier
+        """
+        target = min(range(self.workers), key=self._load.__getitem__)
+        # Every worker owns about 1/workers of the ring, so this takes `workers` tries on average
+        for _ in range(64 * self.workers):
+            session_id = str(uuid.uuid4())
+            if self._ring.node_for(session_id) == target:
+                return session_id
+        return session_id
+
+    def assign(self, session_id: str) -> int:
+        """Get the worker a session is pinned to, pinning it if needed.
+
+        Sessions are pinned to the worker their id hashes to.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Worker index
+        """
+        index = self._affinity.get(session_id)
+        if index is None:
+            index = self._ring.node_for(session_id)
+            self._affinity[session_id] = index
+            self._load[index] += 1
+        return index
+
+    async def execute(
+        self,
+        session_id: str,
+        code: str,
+        options: ExecutionOptions | None = None,
+        on_output: OutputCallback | None = None,
+    ) -> WorkerResult:
+        """Run a code block on the worker the session is pinned to.
+
+        If the execution outlives `options.timeout_seconds` plus the kill
+        grace period, its worker is recycled and a timeout error is returned.
+
+        Args:
+            session_id: Session identifier
+            code: Python code to execute
+            options: Optional execution options
+            on_output: Optional callback receiving output chunks while the code
+                runs. It is called from a backend thread, not the event loop.
+
+        Returns:
+            WorkerResult object
+
+        Raises:
+            WorkerError: If the worker died while running the code
+        """
+        options = options or ExecutionOptions()
+        index = self.assign(session_id)
+        kwargs = {"session_id": session_id, "code": code, "options": options}
+        started = time.perf_counter()
+        call: asyncio.Future[WorkerResult] = asyncio.ensure_future(self._call(index, "execute", kwargs, on_output))
+        self._track_inflight(index, 1)
+        result: WorkerResult
+        try:
+            if options.timeout_seconds is None:
+                result = await call
+            else:
+                result = await self._await_deadline(index, session_id, call, options.timeout_seconds)
+        except WorkerError:
+            if not self._is_alive(index):
+                await self._recycle(index, session_id)
+            raise
+        finally:
+            self._track_inflight(index, -1)
+        if result.timings is not None:
+            # Whatever the worker did not spend running the code was spent waiting for it
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            result.timings.queue_ms = max(elapsed_ms - result.timings.worker_ms, 0.0)
+            WORKER_BUSY_SECONDS.inc(result.timings.worker_ms / 1000)
+        if result.recycle:
+            await self._recycle(index, session_id)
+        return result
+
+    def _track_inflight(self, index: int, delta: int) -> None:
+        inflight = self._inflight[index] = self._inflight.get(index, 0) + delta
+        if not inflight:
+            del self._inflight[index]
+        WORKERS_BUSY.set(len(self._inflight))
+        EXECUTION_QUEUE_DEPTH.set(sum(self._inflight.values()) - len(self._inflight))
+
+    async def _await_deadline(
+        self, index: int, session_id: str, call: asyncio.Future[WorkerResult], timeout_seconds: float
+    ) -> WorkerResult:
+        done, _ = await asyncio.wait({call}, timeout=timeout_seconds)
+        if not done:
+            self._interrupt(session_id)
+            done, _ = await asyncio.wait({call}, timeout=self.kill_grace_seconds)
+        if done:
+            return call.result()
+        logger.warning(f"Execution of session {session_id} ignored its {timeout_seconds:g}s timeout")
+        await self._recycle(index, session_id)
+        call.cancel()
+        message = f"Execution timed out after {timeout_seconds:g}s and its worker was replaced"
+        return WorkerResult(stderr=f"Error: {message}", error=ExecutionError(kind=ErrorKind.TIMEOUT, message=message))
+
+    async def _recycle(self, index: int, session_id: str) -> None:
+        """Replace a worker and report the sessions that lost their state.
+
+        Args:
+            index: Worker index
+            session_id: Session whose execution made the worker unusable
+        """
+        logger.warning(f"Recycling worker {index}")
+        WORKER_RECYCLES.inc()
+        if self._replace_worker(index):
+            lost = [session_id]
+            try:
+                # On the new worker thread: tearing down the event loop of the session needs a thread without one
+                await self._call(index, "release", {"session_id": session_id})
+            except WorkerError as e:
+                logger.warning(f"Could not release session {session_id}: {e}")
+        else:
+            lost = [sid for sid, pinned in self._affinity.items() if pinned == index]
+        for sid in lost:
+            if self._affinity.pop(sid, None) is not None:
+                self._load[index] -= 1
+        if index >= self.workers:
+            self._load.pop(index, None)
+        if lost and self.on_sessions_lost is not None:
+            await self.on_sessions_lost(lost)
+
+    @abstractmethod
+    def _interrupt(self, session_id: str) -> None:
+        """Ask a worker to stop a timed out execution."""
+
+    def _is_alive(self, index: int) -> bool:
+        return True
+
+    @abstractmethod
+    def _replace_worker(self, index: int) -> bool:
+        """Replace a worker with a fresh one.
+
+        Returns:
+            True if the namespaces of the sessions pinned to it survived
+        """
+
+    async def release(self, session_id: str) -> None:
+        """Unpin a session and drop its namespace from its worker.
+
+        Args:
+            session_id: Session identifier
+        """
+        index = self._affinity.pop(session_id, None)
+        if index is None:
+            return
+        self._load[index] -= 1
+        if index >= self.workers:
+            # A worker dedicated to a forked session goes away with it
+            del self._load[index]
+            WORKERS.set(len(self._load))
+            self._retire(index)
+            return
+        await self._call(index, "release", {"session_id": session_id})
+
+    async def fork(self, session_id: str, new_session_id: str) -> None:
+        """Create a new session holding a copy of the namespace of another one.
+
+        Args:
+            session_id: Session to copy
+            new_session_id: Identifier of the new session
+
+        Raises:
+            WorkerError: If the session is not pinned or could not be copied
+        """
+        index = self._affinity.get(session_id)
+        if index is None:
+            raise WorkerError(f"Session {session_id} is not pinned to any worker")
+        await self._call(index, "clone", {"session_id": session_id, "new_session_id": new_session_id})
+        self._affinity[new_session_id] = index
+        self._load[index] += 1
+
+    @abstractmethod
+    def _retire(self, index: int) -> None:
+        """Stop a worker dedicated to a forked session once the session is gone."""
+
+    async def snapshot(self, session_id: str, path: str) -> list[str]:
+        """Write the namespace of a session to a snapshot directory.
+
+        Args:
+            session_id: Session identifier
+            path: Snapshot directory
+
+        Returns:
+            Names of the variables left out because they could not be pickled
+
+        Raises:
+            WorkerError: If the session is not pinned or the snapshot failed
+        """
+        index = self._affinity.get(session_id)
+        if index is None:
+            raise WorkerError(f"Session {session_id} is not pinned to any worker")
+        return cast(list[str], await self._call(index, "snapshot", {"session_id": session_id, "path": path}))
+
+    async def export_array(self, session_id: str, name: str) -> str:
+        """Write an array variable of a session to a new .npy file.
+
+        Args:
+            session_id: Session identifier
+            name: Variable name
+
+        Returns:
+            Path of the file; the caller deletes it once read
+
+        Raises:
+            WorkerError: If the session is not pinned or the variable is not an array
+        """
+        index = self._affinity.get(session_id)
+        if index is None:
+            raise WorkerError(f"Session {session_id} is not pinned to any worker")
+        return cast(str, await self._call(index, "export_array", {"session_id": session_id, "name": name}))
+
+    async def bind_blob(
+        self, session_id: str, name: str, path: str, dtype: str | None = None, shape: list[int] | None = None
+    ) -> int:
+        """Pin a session and memory-map a blob file into its namespace.
+
+        Args:
+            session_id: Session identifier
+            name: Variable name
+            path: Blob file
+            dtype: NumPy dtype of a raw blob
+            shape: Shape of a raw blob
+
+        Returns:
+            Approximate size of the session namespace
+
+        Raises:
+            WorkerError: If the blob could not be mapped
+        """
+        index = self.assign(session_id)
+        kwargs = {"session_id": session_id, "name": name, "path": path, "dtype": dtype, "shape": shape}
+        return cast(int, await self._call(index, "bind_blob", kwargs))
+
+    async def restore(self, session_id: str, path: str) -> int:
+        """Pin a session and load its namespace from a snapshot directory.
+
+        Args:
+            session_id: Session identifier
+            path: Snapshot directory
+
+        Returns:
+            Approximate size of the restored namespace
+
+        Raises:
+            WorkerError: If the snapshot could not be loaded
+        """
+        index = self.assign(session_id)
+        return cast(int, await self._call(index, "restore", {"session_id": session_id, "path": path}))
+
+    async def stats(self) -> list[WorkerStats]:
+        """Get the counters of every worker process."""
+        return [await self._call(index, "stats", {}) for index in range(self.workers)]
+
+    @abstractmethod
+    async def _call(
+        self, index: int, op: str, kwargs: dict[str, Any], emit: OutputCallback | None = None
+    ) -> Any:
+        """Run a worker operation on the given worker and await its result."""
+
+    @abstractmethod
+    async def shutdown(self) -> None:
+        """Stop all the workers of the backend."""
+
+
+class ThreadPoolBackend(ExecutionBackend):
+    """Runs every worker as a dedicated thread of the server process.
+
+    Cheap to start and shares memory with the server, but CPU-bound user code
+    still contends for the GIL.
+
+    Timeouts are raised asynchronously in the worker thread, which cannot stop
+    code blocked in a C call; CPU and memory limits need the process backend.
+    """
+
+    def __init__(self, workers: int, settings: WorkerSettings | None = None, **kwargs: Any):
+        super().__init__(workers, settings, **kwargs)
+        # Worker state is process-wide and shared by every worker thread
+        worker.configure(self.settings)
+        self._threads = [self._new_thread(i) for i in range(self.workers)]
+        # Preloaded in the background so the server starts serving right away; user code importing
+        # the same modules meanwhile waits for them on the import lock
+        self._threads[0].submit(self._preload)
+
+    def _preload(self) -> None:
+        failed = worker.preload(self.settings.preload_modules)
+        if failed:
+            logger.warning(f"Could not preload modules: {', '.join(failed)}")
+
+    def _new_thread(self, index: int) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"synx-worker-{index}")
+
+    async def _call(
+        self, index: int, op: str, kwargs: dict[str, Any], emit: OutputCallback | None = None
+    ) -> Any:
+        while True:
+            thread = self._threads[index]
+            future = thread.submit(worker.handle, op, kwargs, emit)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # Queued behind a runaway execution whose thread got replaced: run on the new one
+                if future.cancelled() and self._threads[index] is not thread:
+                    continue
+                raise
+            except Exception as e:
+                raise WorkerError(f"{type(e).__name__}: {e}") from e
+
+    def _interrupt(self, session_id: str) -> None:
+        worker.interrupt(session_id)
+
+    def _retire(self, index: int) -> None:
+        """Forks share the worker threads, so no worker is ever dedicated to one."""
+
+    def _replace_worker(self, index: int) -> bool:
+        # The stuck thread cannot be killed; it is abandoned and its queue moves to a new one
+        stuck, self._threads[index] = self._threads[index], self._new_thread(index)
+        stuck.shutdown(wait=False, cancel_futures=True)
+        return True
+
+    async def stats(self) -> list[WorkerStats]:
+        return [worker.stats()]
+
+    async def shutdown(self) -> None:
+        for thread in self._threads:
+            thread.shutdown(wait=False, cancel_futures=True)
+
+
+class _ForkedProcess:
+    """Handle on a worker process forked by another worker.
+
+    It is not a child of the server, so it is watched through its pid with the
+    subset of the multiprocessing.Process API that _WorkerProcess needs.
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+
+    def is_alive(self) -> bool:
+        try:
+            # Reaped here if it got reparented to the server (e.g. when the server runs as PID 1)
+            if os.waitpid(self.pid, os.WNOHANG)[0] == self.pid:
+                return False
+        except ChildProcessError:
+            pass
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                return f.read().rsplit(") ", 1)[1][0] != "Z"
+        except FileNotFoundError:
+            return False
+        except OSError:
+            pass
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+    def kill(self) -> None:
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def join(self, timeout: float | None = None) -> None:
+        deadline = time.monotonic() + (timeout if timeout is not None else 5.0)
+        while self.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+class _WorkerProcess:
+    """A worker process running the worker request loop.
+
+    The process warms up (settings, preloaded modules) on its own right after
+    it starts; the first request waits for its ready message.
+    """
+
+    def __init__(self, index: int | None, conn: Connection, process: Any):
+        # Spare workers get an index when they are put in service
+        self.index = index
+        self._conn = conn
+        self.process = process
+        self._ready = False
+        # Requests are written and answered one at a time from a single IO thread
+        name = f"synx-worker-{'spare' if index is None else index}"
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{name}-io")
+
+    @classmethod
+    def spawn(cls, index: int | None, mp_context: Any, settings: WorkerSettings) -> "_WorkerProcess":
+        """Start a new worker process."""
+        name = f"synx-worker-{'spare' if index is None else index}"
+        conn, child_conn = mp_context.Pipe()
+        process = mp_context.Process(target=worker.serve, args=(child_conn, settings), name=name, daemon=True)
+        process.start()
+        child_conn.close()
+        return cls(index, conn, process)
+
+    @classmethod
+    def connect(cls, index: int, forked: ForkedWorker) -> "_WorkerProcess":
+        """Connect to a worker process forked by another worker."""
+        return cls(index, Client(forked.address, authkey=forked.authkey), _ForkedProcess(forked.pid))
+
+    def wait_ready(self) -> None:
+        """Block until the worker has applied its settings and preloaded its modules."""
+        if self._ready:
+            return
+        try:
+            _, failed = self._conn.recv()
+        except (EOFError, OSError) as e:
+            raise WorkerError(f"Worker {self.index} died while starting: {e}") from e
+        self._ready = True
+        if failed:
+            logger.warning(f"Worker {self.index} could not preload modules: {', '.join(failed)}")
+
+    def _roundtrip(self, op: str, kwargs: dict[str, Any], emit: OutputCallback | None) -> Any:
+        self.wait_ready()
+        try:
+            self._conn.send((op, kwargs, emit is not None))
+            status, payload = self._conn.recv()
+            while status == "output":
+                if emit is not None:
+                    emit(*payload)
+                status, payload = self._conn.recv()
+        except (EOFError, OSError) as e:
+            raise WorkerError(f"Worker {self.index} died: {e}") from e
+        if status == "error":
+            raise WorkerError(payload)
+        return payload
+
+    async def call(self, op: str, kwargs: dict[str, Any], emit: OutputCallback | None = None) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io, self._roundtrip, op, kwargs, emit)
+
+    def stop(self) -> None:
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self._conn.close()
+        self._io.shutdown(wait=False, cancel_futures=True)
+
+    def kill(self) -> None:
+        """Kill the process at once. Pending requests fail with WorkerError."""
+        self.process.kill()
+        self.process.join(timeout=5)
+        # Requests already queued on the IO thread fail on the broken pipe before it is closed
+        self._io.submit(self._conn.close)
+        self._io.shutdown(wait=False)
+
+
+def _default_start_method() -> str:
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class ProcessPoolBackend(ExecutionBackend):
+    """Runs every worker as a separate Python process.
+
+    Sessions pinned to different workers execute truly in parallel, so one host
+    can use all its cores. Results must be picklable to cross the process
+    boundary.
+
+    With the forkserver start method, workers are forked from a server process
+    that has already imported the preload modules, so a new worker is warm
+    almost at once. A few warm spare workers are also kept ready: a recycled
+    worker is replaced by a spare immediately and the spares are refilled in
+    the background.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        settings: WorkerSettings | None = None,
+        start_method: str | None = None,
+        spares: int = 0,
+        **kwargs: Any,
+    ):
+        super().__init__(workers, settings, **kwargs)
+        start_method = start_method or _default_start_method()
+        self._mp_context = multiprocessing.get_context(start_method)
+        if start_method == "forkserver":
+            self._mp_context.set_forkserver_preload(["synx.worker", *self.settings.preload_modules])
+        self.spares = max(0, spares)
+        self._processes = {i: _WorkerProcess.spawn(i, self._mp_context, self.settings) for i in range(self.workers)}
+        self._spares: deque[_WorkerProcess] = deque(
+            _WorkerProcess.spawn(None, self._mp_context, self.settings) for _ in range(self.spares)
+        )
+        self._refills: set[asyncio.Future] = set()
+        self._fork_indexes = itertools.count(self.workers)
+
+    def _add_spare(self) -> None:
+        self._spares.append(_WorkerProcess.spawn(None, self._mp_context, self.settings))
+
+    def _take_spare(self, index: int) -> _WorkerProcess:
+        try:
+            spare = self._spares.popleft()
+        except IndexError:
+            return _WorkerProcess.spawn(index, self._mp_context, self.settings)
+        spare.index = index
+        refill = asyncio.get_running_loop().run_in_executor(None, self._add_spare)
+        self._refills.add(refill)
+        refill.add_done_callback(self._refills.discard)
+        return spare
+
+    async def _call(
+        self, index: int, op: str, kwargs: dict[str, Any], emit: OutputCallback | None = None
+    ) -> Any:
+        return await self._processes[index].call(op, kwargs, emit)
+
+    async def fork(self, session_id: str, new_session_id: str) -> None:
+        """Fork the worker of a session into a worker dedicated to a copy-on-write clone of it.
+
+        See synx.worker.fork. The new worker lives until its session is released.
+        """
+        index = self._affinity.get(session_id)
+        if index is None:
+            raise WorkerError(f"Session {session_id} is not pinned to any worker")
+        forked = await self._call(index, "fork", {"session_id": session_id, "new_session_id": new_session_id})
+        fork_index = next(self._fork_indexes)
+        loop = asyncio.get_running_loop()
+        try:
+            process = await loop.run_in_executor(None, _WorkerProcess.connect, fork_index, forked)
+        except (OSError, EOFError) as e:
+            _ForkedProcess(forked.pid).kill()
+            raise WorkerError(f"Could not connect to the forked worker: {e}") from e
+        self._processes[fork_index] = process
+        self._affinity[new_session_id] = fork_index
+        self._load[fork_index] = 1
+        WORKERS.set(len(self._load))
+
+    def _interrupt(self, session_id: str) -> None:
+        """Worker processes time out by themselves."""
+
+    def _retire(self, index: int) -> None:
+        self._processes.pop(index).stop()
+
+    def _is_alive(self, index: int) -> bool:
+        process = self._processes.get(index)
+        return process is not None and process.process.is_alive()
+
+    def _replace_worker(self, index: int) -> bool:
+        if index >= self.workers:
+            # Forked workers are not replaced: their session is gone with them
+            self._processes.pop(index).kill()
+            return False
+        self._processes[index].kill()
+        self._processes[index] = self._take_spare(index)
+        return False
+
+    async def shutdown(self) -> None:
+        if self._refills:
+            await asyncio.gather(*self._refills, return_exceptions=True)
+        for process in [*self._processes.values(), *self._spares]:
+            process.stop()
+
+
+def create_backend(config: AppConfig, on_sessions_lost: SessionsLostCallback | None = None) -> ExecutionBackend:
+    """Create the execution backend selected in the configuration.
+
+    Args:
+        config: Application configuration
+        on_sessions_lost: Optional callback receiving the sessions lost when a
+            worker is recycled
+
+    Returns:
+        ExecutionBackend instance
+    """
+    logger.info(f"Creating {config.executor_backend.value} execution backend with {config.executor_workers} workers")
+    settings = WorkerSettings(
+        code_cache_size=config.code_cache_size,
+        cpu_time_limit_seconds=config.execution_cpu_seconds,
+        memory_limit_mb=config.worker_memory_limit_mb,
+        preload_modules=config.preload_modules,
+        array_resource_min_bytes=config.array_resource_min_bytes,
+        array_export_dir=config.array_export_dir,
+    )
+    if config.executor_backend == ExecutorBackend.PROCESS:
+        return ProcessPoolBackend(
+            config.executor_workers,
+            settings,
+            spares=config.worker_spares,
+            kill_grace_seconds=config.worker_kill_grace_seconds,
+            on_sessions_lost=on_sessions_lost,
+        )
+    return ThreadPoolBackend(
+        config.executor_workers,
+        settings,
+        kill_grace_seconds=config.worker_kill_grace_seconds,
+        on_sessions_lost=on_sessions_lost,
+    )
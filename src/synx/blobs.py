@@ -0,0 +1,95 @@
+"""Server-side storage of uploaded binary blobs.
+
+Blobs are uploaded once and bound into session namespaces by path (see
+synx.worker.bind_blob). Workers memory-map the blob files, so every session
+bound to the same blob shares the same page cache pages instead of holding
+its own copy. Blobs are content-addressed: uploading the same bytes twice
+stores them once.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from synx.logger import get_logger
+from synx.snapshots import NPY_MAGIC
+
+logger = get_logger()
+
+
+class BlobInfo(BaseModel):
+    """Description of a stored blob."""
+
+    blob_id: str = Field(description="Content hash identifying the blob")
+    size: int = Field(description="Size of the blob in bytes")
+    npy: bool = Field(description="Whether the blob is an array in .npy format")
+
+
+class BlobStore:
+    """Directory holding uploaded blobs, one file per blob."""
+
+    _VALID_ID = re.compile(r"[0-9a-f]{64}")
+
+    def __init__(self, root: str | Path):
+        """Initialize the store.
+
+        Args:
+            root: Directory of the blobs, created if needed
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, blob_id: str) -> Path:
+        """Get the file of a blob.
+
+        Raises:
+            KeyError: If there is no blob with that id
+        """
+        path = self.root / blob_id
+        if not self._VALID_ID.fullmatch(blob_id) or not path.exists():
+            raise KeyError(f"Blob {blob_id} not found")
+        return path
+
+    def put(self, data: bytes) -> BlobInfo:
+        """Store a blob, unless the same content is already stored.
+
+        Args:
+            data: Content of the blob
+
+        Returns:
+            Description of the stored blob
+        """
+        blob_id = hashlib.sha256(data).hexdigest()
+        info = BlobInfo(blob_id=blob_id, size=len(data), npy=data.startswith(NPY_MAGIC))
+        target = self.root / blob_id
+        if target.exists():
+            return info
+        # Written next to its final location and renamed, so a blob is never seen half-written
+        fd, staging = tempfile.mkstemp(prefix=f".{blob_id}-", dir=self.root)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(staging, target)
+        except BaseException:
+            os.unlink(staging)
+            raise
+        logger.debug(f"Stored blob {blob_id} ({len(data)} bytes)")
+        return info
+
+    def delete(self, blob_id: str) -> bool:
+        """Delete a blob.
+
+        Sessions that already bound it keep their mapping until they drop it.
+
+        Returns:
+            True if the blob existed
+        """
+        try:
+            os.unlink(self.path(blob_id))
+        except (KeyError, FileNotFoundError):
+            return False
+        return True
@@ -0,0 +1,170 @@
+"""Concurrency-safe stdout/stderr capture for Synx workers.
+
+`contextlib.redirect_stdout` swaps the process-wide `sys.stdout`, so two
+overlapping executions would write into each other's buffers. Instead, the
+streams are replaced once by proxies that route every write to the capture
+bound to the current execution context.
+
+Writes outside any execution context, e.g. from threads started by user code
+(which do not inherit the context), go to the original stderr, stdout included:
+under the stdio transport stdout carries the protocol, so stray output must
+never reach it.
+"""
+
+import io
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Callback receiving (stream name, text) chunks while an execution runs
+OutputCallback = Callable[[str, str], None]
+
+STREAMS = ("stdout", "stderr")
+
+_current_capture: ContextVar["OutputCapture | None"] = ContextVar("synx_capture", default=None)
+
+
+class OutputCapture:
+    """Buffers the output of one execution and forwards it in batches.
+
+    Output is forwarded once `chunk_size` characters are pending or
+    `interval_seconds` after the first pending write, whichever comes first, so
+    a tight print loop produces a few chunks instead of one per line. Chunks of
+    stdout and stderr are forwarded in the order they were written.
+    """
+
+    def __init__(self, emit: OutputCallback | None = None, chunk_size: int = 4096, interval_seconds: float = 0.05):
+        """Initialize the capture.
+
+        Args:
+            emit: Optional callback receiving output chunks as they are written
+            chunk_size: Pending characters that force a chunk out right away
+            interval_seconds: Longest time output stays pending
+        """
+        self.emit = emit
+        self.chunk_size = chunk_size
+        self.interval_seconds = interval_seconds
+        self._buffers = {name: io.StringIO() for name in STREAMS}
+        # Output not forwarded yet, as (stream name, text) runs in write order
+        self._pending: list[tuple[str, str]] = []
+        self._pending_size = 0
+        self._timer: threading.Timer | None = None
+        self._closed = False
+        # Writes may come from threads started by user code and flushes from the timer
+        self._lock = threading.Lock()
+
+    def write(self, stream: str, text: str) -> int:
+        with self._lock:
+            self._buffers[stream].write(text)
+            if self.emit is None or self._closed or not text:
+                return len(text)
+            if self._pending and self._pending[-1][0] == stream:
+                self._pending[-1] = (stream, self._pending[-1][1] + text)
+            else:
+                self._pending.append((stream, text))
+            self._pending_size += len(text)
+            if self._pending_size >= self.chunk_size:
+                self._emit_pending()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.interval_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return len(text)
+
+    def _emit_pending(self) -> None:
+        """Forward the pending output. Must hold the lock."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_size = self._pending, [], 0
+        if self.emit is not None:
+            for stream, text in pending:
+                self.emit(stream, text)
+
+    def flush(self) -> None:
+        """Forward any pending output that has not been emitted yet."""
+        with self._lock:
+            if self._pending:
+                self._emit_pending()
+
+    def close(self) -> None:
+        """Forward the pending output and stop forwarding."""
+        with self._lock:
+            if self._pending:
+                self._emit_pending()
+            elif self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._closed = True
+
+    def getvalue(self, stream: str) -> str:
+        with self._lock:
+            return self._buffers[stream].getvalue()
+
+
+class _StreamProxy(io.TextIOBase):
+    """Stand-in for sys.stdout/sys.stderr routing writes by execution context."""
+
+    def __init__(self, name: str, fallback, stray):
+        """Initialize the proxy.
+
+        Args:
+            name: Stream name, "stdout" or "stderr"
+            fallback: Stream replaced by the proxy
+            stray: Stream receiving writes made outside any execution
+        """
+        self.name = name
+        self.fallback = fallback
+        self.stray = stray
+
+    def write(self, text: str) -> int:
+        capture = _current_capture.get()
+        if capture is None:
+            return int(self.stray.write(text))
+        return capture.write(self.name, text)
+
+    def flush(self) -> None:
+        # Captured output is forwarded by the capture on its own schedule
+        if _current_capture.get() is None:
+            self.stray.flush()
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return False
+
+    @property
+    def encoding(self):  # type: ignore[override]
+        return getattr(self.fallback, "encoding", "utf-8")
+
+
+def install() -> None:
+    """Replace sys.stdout and sys.stderr with context-routing proxies (idempotent)."""
+    stderr = sys.stderr.fallback if isinstance(sys.stderr, _StreamProxy) else sys.stderr
+    for name in STREAMS:
+        stream = getattr(sys, name)
+        if not isinstance(stream, _StreamProxy):
+            setattr(sys, name, _StreamProxy(name, stream, stderr))
+
+
+@contextmanager
+def capture_output(emit: OutputCallback | None = None) -> Iterator[OutputCapture]:
+    """Capture everything the current execution context writes to stdout/stderr.
+
+    Args:
+        emit: Optional callback receiving output chunks while the block runs
+
+    Yields:
+        OutputCapture holding the full output once the block exits
+    """
+    install()
+    capture = OutputCapture(emit)
+    token = _current_capture.set(capture)
+    try:
+        yield capture
+    finally:
+        _current_capture.reset(token)
+        capture.close()
@@ -0,0 +1,83 @@
+"""Cache of compiled code objects for Synx workers.
+
+Agents often send the very same snippet over and over (polling helpers, setup
+cells). The cache keeps the code objects produced by `compile()` keyed by a
+hash of the source, so repeated snippets skip parsing and compilation, and
+repeated syntax errors are raised again without re-parsing.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from types import CodeType
+
+from pydantic import BaseModel, Field
+
+
+class CodeCacheStats(BaseModel):
+    """Hit/miss counters of a code cache."""
+
+    hits: int = Field(default=0, description="Lookups served from the cache")
+    misses: int = Field(default=0, description="Lookups that had to compile the source")
+    size: int = Field(default=0, description="Entries currently cached")
+
+
+class CodeCache:
+    """Thread-safe LRU cache of compiled code objects shared by all sessions."""
+
+    def __init__(self, maxsize: int = 256):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of cached entries; 0 disables caching
+        """
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[bytes, int], CodeType | SyntaxError] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, source: str, flags: int = 0) -> CodeType:
+        """Compile source in "exec" mode, reusing a cached code object if possible.
+
+        Args:
+            source: Python source code
+            flags: Compiler flags, part of the cache key
+
+        Returns:
+            Compiled code object
+
+        Raises:
+            SyntaxError: If the source does not compile (cached as well)
+        """
+        key = (hashlib.blake2b(source.encode(), digest_size=16).digest(), flags)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is None:
+            try:
+                entry = compile(source, "<string>", "exec", flags)
+            except SyntaxError as e:
+                entry = e
+            if self.maxsize > 0:
+                with self._lock:
+                    self._entries[key] = entry
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+        if isinstance(entry, SyntaxError):
+            raise entry.with_traceback(None)
+        return entry
+
+    def stats(self) -> CodeCacheStats:
+        with self._lock:
+            return CodeCacheStats(hits=self.hits, misses=self.misses, size=len(self._entries))
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
@@ -1,19 +1,41 @@
 """Code execution functionality for Synx."""
 
-import io
-import json
-from contextlib import redirect_stderr, redirect_stdout
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
 from typing import Any
 
-import numpy as np
 from mcp.server.fastmcp import Context
 from pydantic import BaseModel, Field
 
-from synx.logger import get_logger
-from synx.sessions import Session, SessionManager
+from synx.backends import WorkerError, create_backend
+from synx.blobs import BlobInfo, BlobStore
+from synx.config import AppConfig, VariablesMode
+from synx.logger import get_logger, log_to_client
+from synx.metrics import REGISTRY
+from synx.sessions import EvictionReason, Session, SessionManager, SessionStore
+from synx.worker import (
+    ErrorKind,
+    ExecutionError,
+    ExecutionOptions,
+    ExecutionTimings,
+    ProfileEntry,
+)
 
 logger = get_logger()
 
+# Sessions evicted for these reasons are spilled to the session store instead of dropped
+SPILLED_REASONS = {EvictionReason.TTL, EvictionReason.LRU, EvictionReason.MEMORY}
+
+EXECUTION_LIMITS = REGISTRY.counter(
+    "synx_execution_limit_violations_total", "Executions stopped by a limit or a lost worker, by kind"
+)
+EXECUTION_SECONDS = REGISTRY.histogram(
+    "synx_execution_duration_seconds", "Wall-clock time of executions as seen by the server, by outcome"
+)
+
 
 class ExecutionState(BaseModel):
     """State of the execution of a code block."""
@@ -23,85 +45,570 @@ class ExecutionState(BaseModel):
     stdout: str = Field(description="Standard output of the execution")
     stderr: str = Field(description="Standard error of the execution")
     variables: dict[str, Any] = Field(
-        description="Variables created/modified during the execution"
+        description="Variables created or rebound during the execution"
     )
     session: Session = Field(description="Session object")
+    error: ExecutionError | None = Field(default=None, description="Error if the execution failed")
+    timings: ExecutionTimings | None = Field(default=None, description="Time spent in every phase of the execution")
+    peak_memory_delta_bytes: int | None = Field(
+        default=None, description="Growth of the peak resident memory of the worker process (process backend only)"
+    )
+    profile: list[ProfileEntry] | None = Field(default=None, description="Top functions by self time, if profiled")
+
+
+class BatchItem(BaseModel):
+    """One code snippet of a batch."""
+
+    code: str = Field(description="Python code to execute")
+    session_id: str | None = Field(default=None, description="Session to run the code in; a new one if omitted")
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one item of a batch."""
+
+    index: int = Field(description="Position of the item in the batch")
+    state: ExecutionState | None = Field(default=None, description="Execution result, if the item ran")
+    error: ExecutionError | None = Field(default=None, description="Why the item could not run")
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None or (self.state is not None and self.state.error is not None)
+
+
+# Called with the result of every batch item as soon as it completes
+BatchResultCallback = Callable[[BatchItemResult], Awaitable[None]]
+
+
+class _OutputForwarder:
+    """Relays output chunks from backend threads to the client while code runs.
+
+    Chunks are sent as MCP log notifications (logger "synx.stdout" or
+    "synx.stderr") in the order they were written. Chunks that queue up while
+    a notification is being sent are merged into the next one, and progress
+    notifications go out at most once per PROGRESS_INTERVAL_SECONDS.
+    """
+
+    PROGRESS_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, ctx: Context):
+        self._ctx = ctx
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[tuple[str, str] | None] = asyncio.Queue()
+        self._chunks = 0
+        self._progress_at = float("-inf")
+        self._task = asyncio.create_task(self._forward())
+
+    def __call__(self, stream: str, text: str) -> None:
+        # Called from a backend thread
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (stream, text))
+
+    def _next_batch(self, item: tuple[str, str] | None) -> tuple[list[tuple[str, str]], bool]:
+        """Merge the queued chunks following `item` into runs of the same stream.
+
+        Returns:
+            The runs, and whether the end of the output was reached
+        """
+        batch: list[tuple[str, str]] = []
+        while item is not None:
+            stream, text = item
+            if batch and batch[-1][0] == stream:
+                batch[-1] = (stream, batch[-1][1] + text)
+            else:
+                batch.append(item)
+            if self._queue.empty():
+                return batch, False
+            item = self._queue.get_nowait()
+        return batch, True
+
+    async def _forward(self) -> None:
+        done = False
+        while not done:
+            batch, done = self._next_batch(await self._queue.get())
+            for stream, text in batch:
+                self._chunks += 1
+                try:
+                    await self._ctx.log("info", text, logger_name=f"synx.{stream}")
+                except Exception as e:
+                    logger.warning(f"Could not forward {stream} chunk to the client: {e}")
+            now = time.monotonic()
+            if batch and now - self._progress_at >= self.PROGRESS_INTERVAL_SECONDS:
+                self._progress_at = now
+                try:
+                    await self._ctx.report_progress(self._chunks, message=batch[-1][0])
+                except Exception as e:
+                    logger.warning(f"Could not report output progress to the client: {e}")
+
+    async def aclose(self) -> None:
+        """Wait until every chunk received so far has been forwarded."""
+        self._queue.put_nowait(None)
+        await self._task
 
 
 class PythonExecutor:
     """Executes Python code in isolated environments with session management."""
 
-    def __init__(self):
-        """Initialize the Python executor."""
-        self.session_manager = SessionManager()
+    def __init__(self, config: AppConfig | None = None):
+        """Initialize the Python executor.
+
+        Args:
+            config: Optional application configuration. If None, uses default settings.
+        """
+        self.config = config or AppConfig()
+        self.backend = create_backend(self.config, on_sessions_lost=self._sessions_lost)
+        memory_budget_mb = self.config.session_memory_budget_mb
+        self.session_manager = SessionManager(
+            max_sessions=self.config.max_sessions,
+            ttl_seconds=self.config.session_ttl_seconds,
+            memory_budget_bytes=memory_budget_mb * 1024 * 1024 if memory_budget_mb else None,
+            on_evict=self._release_session,
+            # New sessions are routed to the least loaded worker through their id
+            id_factory=self.backend.new_session_id,
+        )
+        store_dir = self.config.session_store_dir
+        self.store = SessionStore(store_dir) if store_dir else None
+        self.blobs = BlobStore(self.config.blob_dir)
+
+    def start(self) -> None:
+        """Start the background session eviction task.
+
+        Must be called from a running event loop.
+        """
+        self.session_manager.start_reaper(self.config.session_sweep_interval_seconds)
+
+    async def _release_session(self, session: Session, reason: EvictionReason) -> None:
+        if self.store is not None:
+            if reason in SPILLED_REASONS:
+                await self._spill(session)
+            else:
+                self.store.delete(session.session_id)
+        await self.backend.release(session.session_id)
+
+    async def _spill(self, session: Session) -> None:
+        """Write a session to the session store so it can be restored later."""
+        if self.store is None:
+            return
+        try:
+            skipped = await self.backend.snapshot(session.session_id, str(self.store.path(session.session_id)))
+        except WorkerError as e:
+            logger.warning(f"Could not spill session {session.session_id}: {e}")
+            return
+        self.store.save_metadata(session)
+        if skipped:
+            logger.info(f"Session {session.session_id} spilled without unpicklable variables: {', '.join(skipped)}")
+
+    def _adopt_spilled(self, session_id: str | None) -> Session | None:
+        """Register a spilled session again, if session_id is not live but has a snapshot.
+
+        The caller must restore its namespace (see _restore) before running code.
+        """
+        if session_id is None or self.store is None or not self.store.exists(session_id):
+            return None
+        try:
+            self.session_manager.get_session(session_id)
+            return None
+        except KeyError:
+            pass
+        session = self.store.load_metadata(session_id)
+        if session is None:
+            return None
+        session, adopted = self.session_manager.adopt(session)
+        return session if adopted else None
+
+    async def _acquire_session(self, ctx: Context, session_id: str | None) -> tuple[Session, bool, float]:
+        """Get, create or adopt a spilled session, with its lock held by the caller.
+
+        Returns:
+            The session, whether it must be restored from its snapshot (see
+            _restore) and the seconds spent waiting for its lock
+
+        Raises:
+            KeyError: If the session does not exist, or is removed while waiting for its lock
+        """
+        if session_id is None:
+            return await self.session_manager.get_or_create_session(ctx, locked=True), False, 0.0
+        locking = time.perf_counter()
+        while True:
+            # An evicted session is adopted once its snapshot is written and its namespace released
+            await self.session_manager.wait_released(session_id)
+            # No await between adopting a spilled session and locking it, so nobody runs code before it is restored
+            spilled = self._adopt_spilled(session_id)
+            session = spilled or await self.session_manager.get_or_create_session(ctx, session_id)
+            try:
+                await self.session_manager.lock_session(session)
+            except KeyError:
+                # Evicted while waiting for its lock: adopt the snapshot it is spilled to
+                if not self.session_manager.is_releasing(session_id):
+                    raise
+                continue
+            return session, spilled is not None, time.perf_counter() - locking
+
+    async def _restore(self, ctx: Context, session: Session) -> bool:
+        if self.store is None:
+            return False
+        path = self.store.path(session.session_id)
+        try:
+            memory_bytes = await self.backend.restore(session.session_id, str(path))
+        except WorkerError as e:
+            await log_to_client(ctx, "error", f"Could not restore session {session.session_id}: {e}")
+            await self.session_manager.delete_session(session.session_id)
+            return False
+        self.session_manager.set_memory_bytes(session.session_id, memory_bytes)
+        # The namespace is live again; it is written anew the next time the session is spilled
+        self.store.delete(session.session_id)
+        await log_to_client(ctx, "info", f"Restored session {session.session_id} from its snapshot")
+        return True
+
+    async def _sessions_lost(self, session_ids: list[str]) -> None:
+        # Their namespaces went away with a recycled worker
+        for session_id in session_ids:
+            await self.session_manager.delete_session(session_id, EvictionReason.WORKER_LOST)
 
     async def execute(
-        self, ctx: Context, code: str, session_id: str | None = None
+        self,
+        ctx: Context,
+        code: str,
+        session_id: str | None = None,
+        variables_mode: VariablesMode | None = None,
+        rollback_on_error: bool | None = None,
+        timeout: float | None = None,
+        stream_output: bool | None = None,
+        profile: bool = False,
     ) -> ExecutionState:
         """
         Execute Python code in an isolated environment.
 
+        The code runs on the backend worker the session is pinned to, so the
+        event loop stays free to serve other clients while it runs. When output
+        streaming is enabled, stdout/stderr chunks reach the client as they are
+        written.
+
         Args:
             code: Python code to execute
             session_id: Optional session ID for maintaining state
+            variables_mode: Report changed variables with their values or only
+                their types. Defaults to the configured mode.
+            rollback_on_error: Restore the session namespace if the code fails.
+                Defaults to the configured behavior.
+            timeout: Wall-clock limit in seconds. Defaults to the configured
+                timeout. A timed out execution returns a "timeout" error and
+                leaves the session usable unless its worker had to be recycled.
+            stream_output: Stream stdout/stderr chunks while the code runs.
+                Defaults to the configured behavior.
+            profile: Run the code under cProfile and report its top functions
 
         Returns:
-            ExecutionState object
+            ExecutionState object, with the time spent in every phase
         """
-        await ctx.log("info", f"Executing code for session: {session_id or 'default'}")
-        session = await self.session_manager.get_or_create_session(ctx, session_id)
-
-        async with session.lock:
-            # Prepare execution environment
-            exec_globals = {
-                "__builtins__": __builtins__,
-                "__name__": "__main__",
-                "__doc__": None,
-            }
-            exec_globals.update(session.globals)
-            exec_locals = session.locals.copy()
-
-            # Capture stdout/stderr
-            stdout_capture = io.StringIO()
-            stderr_capture = io.StringIO()
-
-            # Initialize new_variables for error handling
-            new_variables: dict[str, Any] = {}
-
-            try:
-                # Execute the code
-                with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-                    exec(code, exec_globals, exec_locals)
-                await ctx.log("info", "Code executed successfully")
-                # Update session state
-                self.session_manager.update_session(
-                    str(session.session_id), exec_globals, exec_locals
-                )
+        started = time.perf_counter()
+        await log_to_client(ctx, "debug", lambda: f"Executing code for session: {session_id or 'default'}")
+        session, spilled, lock_wait = await self._acquire_session(ctx, session_id)
 
-                # Capture any variables that were created/modified
-                for key, value in exec_locals.items():
-                    if not key.startswith("__"):
-                        try:
-                            # Try to serialize the variable
-                            json.dumps(value)
-                            new_variables[key] = value
-                        except (TypeError, ValueError):
-                            # If not serializable, convert to string representation
-                            new_variables[key] = str(value)
+        try:
+            if spilled and not await self._restore(ctx, session):
+                message = f"Could not restore session {session.session_id}"
                 return ExecutionState(
-                    stdout=stdout_capture.getvalue(),
-                    stderr=stderr_capture.getvalue(),
-                    variables=new_variables,
+                    stdout="",
+                    stderr=f"Error: {message}",
+                    variables={},
                     session=session,
+                    error=ExecutionError(kind=ErrorKind.EXCEPTION, message=message),
                 )
-            except Exception as e:
-                error_output = stderr_capture.getvalue()
-                error_message = error_output.strip() if error_output else str(e)
-                await ctx.log("error", f"Error executing code: {error_message}")
-
+            restored = time.perf_counter()
+            options = ExecutionOptions(
+                variables_mode=variables_mode or self.config.variables_mode,
+                preview_bytes=self.config.variable_preview_bytes,
+                rollback_on_error=(
+                    self.config.rollback_on_error if rollback_on_error is None else rollback_on_error
+                ),
+                timeout_seconds=timeout or self.config.execution_timeout_seconds,
+                profile=profile,
+            )
+            stream = self.config.stream_output if stream_output is None else stream_output
+            forwarder = _OutputForwarder(ctx) if stream else None
+            try:
+                result = await self.backend.execute(session.session_id, code, options, forwarder)
+            except WorkerError as e:
+                EXECUTION_LIMITS.inc(kind=ErrorKind.WORKER_LOST.value)
+                EXECUTION_SECONDS.observe(time.perf_counter() - started, outcome=ErrorKind.WORKER_LOST.value)
+                await log_to_client(ctx, "error", f"Error executing code: {e}")
                 return ExecutionState(
-                    stdout=stdout_capture.getvalue(),
-                    stderr=f"Error: {error_message}",
-                    variables=new_variables,
+                    stdout="",
+                    stderr=f"Error: {e}",
+                    variables={},
                     session=session,
+                    error=ExecutionError(kind=ErrorKind.WORKER_LOST, message=str(e)),
                 )
+            finally:
+                if forwarder is not None:
+                    await forwarder.aclose()
+
+            if result.error is None:
+                await log_to_client(ctx, "debug", "Code executed successfully")
+                # Update session state
+                self.session_manager.record_execution(session.session_id, result.namespace_bytes)
+                if self.session_manager.memory_budget_bytes is not None:
+                    await self.session_manager.enforce_limits()
+            else:
+                if result.error.kind != ErrorKind.EXCEPTION:
+                    EXECUTION_LIMITS.inc(kind=result.error.kind.value)
+                await log_to_client(ctx, "error", f"Error executing code: {result.error.message}")
+
+            if result.timings is not None:
+                # Restoring a spilled session counts as looking it up
+                result.timings.session_ms = (restored - started - lock_wait) * 1000
+                result.timings.lock_wait_ms = lock_wait * 1000
+                result.timings.total_ms = (time.perf_counter() - started) * 1000
+            EXECUTION_SECONDS.observe(
+                time.perf_counter() - started, outcome=result.error.kind.value if result.error else "ok"
+            )
+            return ExecutionState(
+                stdout=result.stdout,
+                stderr=result.stderr,
+                variables=result.variables,
+                session=session,
+                error=result.error,
+                timings=result.timings,
+                peak_memory_delta_bytes=result.peak_memory_delta_bytes,
+                profile=result.profile,
+            )
+        finally:
+            session.lock.release()
+
+    async def execute_batch(
+        self,
+        ctx: Context,
+        items: list[BatchItem],
+        variables_mode: VariablesMode | None = None,
+        rollback_on_error: bool | None = None,
+        timeout: float | None = None,
+        on_result: BatchResultCallback | None = None,
+    ) -> list[BatchItemResult]:
+        """
+        Execute many code snippets in one request.
+
+        Items of the same session run one after the other in batch order;
+        items of different sessions run concurrently across the backend
+        workers. Every item without a session id runs in a new session. Output
+        is not streamed while items run.
+
+        Args:
+            items: Snippets to execute
+            variables_mode: Report changed variables with their values or only
+                their types. Defaults to the configured mode.
+            rollback_on_error: Restore the session namespace if a snippet fails.
+                Defaults to the configured behavior.
+            timeout: Wall-clock limit of every snippet in seconds. Defaults to
+                the configured timeout.
+            on_result: Optional callback awaited with every result as soon as
+                its item completes
+
+        Returns:
+            One result per item, in batch order
+        """
+        groups: dict[str, list[int]] = {}
+        new_sessions: list[list[int]] = []
+        for index, item in enumerate(items):
+            if item.session_id is None:
+                new_sessions.append([index])
+            else:
+                groups.setdefault(item.session_id, []).append(index)
+        results: list[BatchItemResult | None] = [None] * len(items)
+
+        async def run_group(indexes: list[int]) -> None:
+            for index in indexes:
+                item = items[index]
+                try:
+                    state = await self.execute(
+                        ctx, item.code, item.session_id, variables_mode, rollback_on_error, timeout, stream_output=False
+                    )
+                    result = BatchItemResult(index=index, state=state)
+                except KeyError as e:
+                    error = ExecutionError(kind=ErrorKind.EXCEPTION, message=str(e.args[0]) if e.args else str(e))
+                    result = BatchItemResult(index=index, error=error)
+                except Exception as e:
+                    # One failing session must not take the results of the other groups with it
+                    logger.warning(f"Batch item {index} failed: {type(e).__name__}: {e}")
+                    kind = ErrorKind.WORKER_LOST if isinstance(e, WorkerError) else ErrorKind.EXCEPTION
+                    error = ExecutionError(kind=kind, message=f"{type(e).__name__}: {e}")
+                    result = BatchItemResult(index=index, error=error)
+                results[index] = result
+                if on_result is not None:
+                    await on_result(result)
+
+        await asyncio.gather(*(run_group(indexes) for indexes in [*groups.values(), *new_sessions]))
+        return [result for result in results if result is not None]
+
+    async def read_array(self, ctx: Context, session_id: str, name: str) -> bytes:
+        """Read an array variable of a session in .npy format.
+
+        The worker owning the session writes the array to the export directory
+        (shared memory by default) and the file is read back here, so large
+        arrays never go through pickling or a text representation. A spilled
+        session is restored first.
+
+        Args:
+            session_id: Session identifier
+            name: Variable name
+
+        Returns:
+            Content of the .npy file
+
+        Raises:
+            KeyError: If the session does not exist
+            WorkerError: If the variable is not a NumPy array
+        """
+        session, spilled, _ = await self._acquire_session(ctx, session_id)
+        try:
+            if spilled and not await self._restore(ctx, session):
+                raise KeyError(f"Session {session_id} could not be restored")
+            path = await self.backend.export_array(session_id, name)
+        finally:
+            session.lock.release()
+        try:
+            return await asyncio.to_thread(Path(path).read_bytes)
+        finally:
+            os.unlink(path)
+
+    async def upload_blob(self, ctx: Context, data: bytes) -> BlobInfo:
+        """Store a blob on the server so sessions can bind it (see bind_blob).
+
+        Args:
+            data: Content of the blob, e.g. a .npy file or a raw buffer
+
+        Returns:
+            Description of the stored blob
+        """
+        info = await asyncio.to_thread(self.blobs.put, data)
+        await log_to_client(ctx, "info", f"Stored blob {info.blob_id} ({info.size} bytes)")
+        return info
+
+    async def bind_blob(
+        self,
+        ctx: Context,
+        blob_id: str,
+        name: str,
+        session_id: str | None = None,
+        dtype: str | None = None,
+        shape: list[int] | None = None,
+    ) -> Session:
+        """Bind an uploaded blob to a variable of a session.
+
+        The worker owning the session memory-maps the blob file, so binding
+        costs the same whatever the blob size and every session bound to the
+        same blob shares its pages.
+
+        Args:
+            blob_id: Blob to bind
+            name: Variable name
+            session_id: Optional session ID; a new session is created if None
+            dtype: NumPy dtype of a raw blob; .npy blobs carry their own
+            shape: Shape of a raw blob, flat if omitted
+
+        Returns:
+            The session the blob was bound to
+
+        Raises:
+            KeyError: If the blob or the session does not exist
+            ValueError: If the name is not a valid identifier
+            WorkerError: If the blob could not be mapped
+        """
+        if not name.isidentifier():
+            raise ValueError(f"Invalid variable name: {name!r}")
+        path = self.blobs.path(blob_id)
+        session, spilled, _ = await self._acquire_session(ctx, session_id)
+        try:
+            if spilled and not await self._restore(ctx, session):
+                raise KeyError(f"Session {session.session_id} could not be restored")
+            memory_bytes = await self.backend.bind_blob(session.session_id, name, str(path), dtype, shape)
+            self.session_manager.set_memory_bytes(session.session_id, memory_bytes)
+        finally:
+            session.lock.release()
+        await log_to_client(ctx, "info", f"Blob {blob_id} bound to {name} in session {session.session_id}")
+        return session
+
+    async def delete_blob(self, ctx: Context, blob_id: str) -> bool:
+        """Delete an uploaded blob. Sessions that bound it keep their mapping.
+
+        Args:
+            blob_id: Blob identifier
+
+        Returns:
+            True if the blob existed
+        """
+        deleted = self.blobs.delete(blob_id)
+        await log_to_client(ctx, "info" if deleted else "error", f"Blob {blob_id} {'deleted' if deleted else 'not found'}")
+        return deleted
+
+    async def fork_session(self, ctx: Context, session_id: str) -> Session:
+        """Create a new session starting from a copy of the state of another one.
+
+        With the process backend the worker holding the session is forked, so
+        the copy is copy-on-write and takes milliseconds whatever the session
+        holds. The thread backend deep-copies the namespace instead.
+
+        Args:
+            session_id: Session to fork
+
+        Returns:
+            The new session, usable right away
+
+        Raises:
+            KeyError: If the session does not exist
+            WorkerError: If the session could not be copied
+        """
+        # Wait for a running execution so the copy is taken between two executions
+        source, spilled, _ = await self._acquire_session(ctx, session_id)
+        try:
+            if spilled and not await self._restore(ctx, source):
+                raise KeyError(f"Session {session_id} could not be restored")
+            session = await self.session_manager.get_or_create_session(ctx, locked=True)
+            try:
+                await self.backend.fork(session_id, session.session_id)
+            except WorkerError as e:
+                await log_to_client(ctx, "error", f"Could not fork session {session_id}: {e}")
+                await self.session_manager.delete_session(session.session_id)
+                raise
+            finally:
+                session.lock.release()
+        finally:
+            source.lock.release()
+        self.session_manager.set_memory_bytes(session.session_id, source.memory_bytes)
+        await log_to_client(ctx, "info", f"Session {session.session_id} forked from {session_id}")
+        return session
+
+    async def close_session(self, ctx: Context, session_id: str) -> bool:
+        """Close a session and drop its state.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            True if the session existed
+        """
+        try:
+            session = self.session_manager.get_session(session_id)
+        except KeyError:
+            if self.store is not None and self.store.delete(session_id):
+                await log_to_client(ctx, "info", f"Spilled session {session_id} closed")
+                return True
+            await log_to_client(ctx, "error", f"Session {session_id} not found")
+            return False
+        # Wait for a running execution of the session to finish
+        async with session.lock:
+            closed = await self.session_manager.delete_session(session_id)
+        await log_to_client(ctx, "info", f"Session {session_id} closed")
+        return closed
+
+    async def shutdown(self) -> None:
+        """Stop the session eviction task and the execution backend.
+
+        With a session store, live sessions are spilled first so they survive
+        the restart.
+        """
+        await self.session_manager.stop_reaper()
+        if self.store is not None:
+            for session_id in self.session_manager.list_sessions():
+                session = self.session_manager.get_session(session_id)
+                async with session.lock:
+                    await self._spill(session)
+        await self.backend.shutdown()
@@ -1,6 +1,7 @@
 """Configuration management for Synx."""
 
 import os
+import tempfile
 from enum import Enum
 
 from pydantic import BaseModel, Field
@@ -17,6 +18,14 @@ class LogLevel(str, Enum):
     CRITICAL = "CRITICAL"
 
 
+class LogSink(str, Enum):
+    """Log sink enumeration."""
+
+    STDOUT = "stdout"
+    STDERR = "stderr"
+    FILE = "file"
+
+
 class MCPTransport(str, Enum):
     """MCP transport enumeration."""
 
@@ -24,6 +33,20 @@ class MCPTransport(str, Enum):
     STREAMABLE_HTTP = "streamable-http"
 
 
+class ExecutorBackend(str, Enum):
+    """Execution backend enumeration."""
+
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class VariablesMode(str, Enum):
+    """How variables changed by an execution are reported."""
+
+    VALUES = "values"
+    TYPES = "types"
+
+
 class AppConfig(BaseSettings):
     """Application configuration model."""
 
@@ -34,5 +57,94 @@ class AppConfig(BaseSettings):
     )
     mcp_host: str = Field(default=os.getenv("HOST", "localhost"), description="Host for MCP transport")
     mcp_port: int = Field(default=int(os.getenv("PORT", 10000)), description="Port for MCP transport")
+    executor_backend: ExecutorBackend = Field(
+        default=ExecutorBackend(os.getenv("EXECUTOR_BACKEND", "thread")), description="Backend running user code"
+    )
+    executor_workers: int = Field(
+        default=int(os.getenv("EXECUTOR_WORKERS", os.cpu_count() or 1)), description="Number of execution workers"
+    )
+    preload_modules: list[str] = Field(
+        # Nothing is preloaded under stdio unless asked for, so local clients get a fast startup
+        default=[
+            name
+            for name in os.getenv(
+                "WORKER_PRELOAD", "" if os.getenv("TRANSPORT", "stdio") == "stdio" else "numpy,matplotlib.pyplot"
+            ).split(",")
+            if name
+        ],
+        description="Modules every worker imports before serving user code",
+    )
+    worker_spares: int = Field(
+        default=int(os.getenv("WORKER_SPARES", 1)),
+        description="Warm worker processes kept ready to replace recycled ones (process backend only)",
+    )
+    code_cache_size: int = Field(
+        default=int(os.getenv("CODE_CACHE_SIZE", 256)), description="Compiled snippets cached per worker process"
+    )
+    stream_output: bool = Field(
+        default=os.getenv("STREAM_OUTPUT", "true").lower() == "true",
+        description="Stream stdout/stderr chunks to the client while code runs",
+    )
+    variables_mode: VariablesMode = Field(
+        default=VariablesMode(os.getenv("VARIABLES_MODE", "values")),
+        description="Report changed variables with their values or only their types",
+    )
+    variable_preview_bytes: int = Field(
+        default=int(os.getenv("VARIABLE_PREVIEW_BYTES", 1024)),
+        description="Approximate byte budget of the summary returned for each variable",
+    )
+    array_resource_min_bytes: int | None = Field(
+        default=int(os.getenv("ARRAY_RESOURCE_MIN_BYTES", 65536)) or None,
+        description="NumPy arrays at least this large are reported as resource URIs instead of previews",
+    )
+    array_export_dir: str = Field(
+        default=os.getenv("ARRAY_EXPORT_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()),
+        description="Directory where arrays are written when their resource is read (shared memory by default)",
+    )
+    blob_dir: str = Field(
+        default=os.getenv(
+            "BLOB_DIR",
+            os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "synx-blobs"),
+        ),
+        description="Directory where uploaded blobs are stored and mapped from (shared memory by default)",
+    )
+    rollback_on_error: bool = Field(
+        default=os.getenv("ROLLBACK_ON_ERROR", "false").lower() == "true",
+        description="Restore the session namespace when an execution fails",
+    )
+    execution_timeout_seconds: float | None = Field(
+        default=float(os.getenv("EXECUTION_TIMEOUT", 60)) or None,
+        description="Default wall-clock limit of a single execution",
+    )
+    execution_cpu_seconds: int | None = Field(
+        default=int(os.getenv("EXECUTION_CPU_SECONDS", 0)) or None,
+        description="CPU time limit of a single execution (process backend only)",
+    )
+    worker_memory_limit_mb: int | None = Field(
+        default=int(os.getenv("WORKER_MEMORY_LIMIT_MB", 0)) or None,
+        description="Address space limit of every worker process (process backend only)",
+    )
+    worker_kill_grace_seconds: float = Field(
+        default=float(os.getenv("WORKER_KILL_GRACE", 2)),
+        description="Time a timed out worker gets to stop cleanly before it is killed and replaced",
+    )
+    max_sessions: int | None = Field(
+        default=int(os.getenv("MAX_SESSIONS", 1000)) or None,
+        description="Maximum number of live sessions; least recently used ones are evicted first",
+    )
+    session_ttl_seconds: float | None = Field(
+        default=float(os.getenv("SESSION_TTL", 3600)) or None, description="Idle time after which a session expires"
+    )
+    session_memory_budget_mb: int | None = Field(
+        default=int(os.getenv("SESSION_MEMORY_BUDGET_MB", 0)) or None,
+        description="Approximate memory budget for the namespaces of all sessions",
+    )
+    session_sweep_interval_seconds: float = Field(
+        default=float(os.getenv("SESSION_SWEEP_INTERVAL", 60)), description="Time between two session eviction sweeps"
+    )
+    session_store_dir: str | None = Field(
+        default=os.getenv("SESSION_STORE_DIR") or None,
+        description="Directory where evicted sessions are spilled and restored from; disabled if unset",
+    )
     
     # model_config = SettingsConfigDict(env_prefix="SYNX_")
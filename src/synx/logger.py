@@ -1,9 +1,18 @@
 """Logger configuration with loguru and colorful output."""
 
+import json
+import os
+import sys
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
 from loguru import logger
 from pydantic import BaseModel, Field
 
-from synx.config import LogLevel
+from synx.config import LogLevel, LogSink
+
+if TYPE_CHECKING:
+    from loguru import Record
 
 
 class LogConfig(BaseModel):
@@ -15,10 +24,57 @@ class LogConfig(BaseModel):
         description="Log format string",
     )
     colorize: bool = Field(default=True, description="Enable colorized output")
+    payload_limit: int = Field(default=512, description="Maximum characters of code/result payloads in log messages")
+    sink: LogSink = Field(
+        default=LogSink(os.getenv("LOG_SINK", "stderr")),
+        description="Where logs are written; stdout is reserved for the protocol in stdio transport",
+    )
+    file_path: str = Field(default=os.getenv("LOG_FILE", "synx.log"), description="Log file used by the file sink")
+    enqueue: bool = Field(
+        default=os.getenv("LOG_ENQUEUE", "true").lower() == "true",
+        description="Write logs from a background thread so callers never block on I/O",
+    )
+    json_format: bool = Field(
+        default=os.getenv("LOG_JSON", "false").lower() == "true",
+        description="Write compact one-line JSON records instead of the text format",
+    )
+    diagnose: bool = Field(
+        default=os.getenv("LOG_DIAGNOSE", "false").lower() == "true",
+        description="Show variable values in tracebacks (slow, may leak data)",
+    )
 
     def __str__(self) -> str:
         """String representation of LogConfig."""
-        return f"LogConfig(level={self.level}, format='{self.format[:50]}...', colorize={self.colorize})"
+        return (
+            f"LogConfig(level={self.level}, format='{self.format[:50]}...', colorize={self.colorize}, "
+            f"sink={self.sink.value}, enqueue={self.enqueue}, json_format={self.json_format})"
+        )
+
+
+_LEVEL_NUMBERS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+# Active configuration, used to gate log calls before their messages are built
+_active_config = LogConfig()
+
+
+def _json_format(record: "Record") -> str:
+    """Render a record as one compact JSON line (loguru format callable)."""
+    entry: dict[str, Any] = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    extra = {key: value for key, value in record["extra"].items() if key != "json"}
+    if extra:
+        entry["extra"] = extra
+    if record["exception"] is not None:
+        exc_type, exc_value, _ = record["exception"]
+        entry["exception"] = f"{exc_type.__name__ if exc_type else 'Exception'}: {exc_value}"
+    record["extra"]["json"] = json.dumps(entry, default=str, separators=(",", ":"))
+    return "{extra[json]}\n"
 
 
 def setup_logger(config: LogConfig | None = None) -> None:
@@ -27,23 +83,67 @@ def setup_logger(config: LogConfig | None = None) -> None:
     Args:
         config: Optional logger configuration. If None, uses default settings.
     """
+    global _active_config
     if config is None:
         config = LogConfig()
+    _active_config = config
 
     # Remove default handler
     logger.remove()
 
-    # Add console handler with custom colors
+    sink: Any
+    if config.sink == LogSink.FILE:
+        sink = config.file_path
+    else:
+        sink = sys.stdout if config.sink == LogSink.STDOUT else sys.stderr
+
+    # Add handler with custom colors, or compact JSON records for production
     logger.add(
-        sink=lambda msg: print(msg, end=""),
+        sink=sink,
         level=config.level.value,
-        format=config.format,
-        colorize=config.colorize,
-        backtrace=True,
-        diagnose=True,
+        format=_json_format if config.json_format else config.format,
+        colorize=config.colorize and not config.json_format and config.sink != LogSink.FILE,
+        enqueue=config.enqueue,
+        backtrace=not config.json_format,
+        diagnose=config.diagnose,
     )
 
 
+def is_enabled(level: str) -> bool:
+    """Tell whether messages of a level pass the configured log level.
+
+    Args:
+        level: Level name, case insensitive (e.g. "debug")
+    """
+    return _LEVEL_NUMBERS[level.upper()] >= _LEVEL_NUMBERS[_active_config.level.value]
+
+
+def truncate(payload: Any, limit: int | None = None) -> str:
+    """Render a payload for a log message, cut to the configured size.
+
+    Args:
+        payload: Object to render with str()
+        limit: Optional maximum number of characters. If None, uses the configured limit.
+    """
+    text = str(payload)
+    limit = _active_config.payload_limit if limit is None else limit
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+async def log_to_client(ctx, level: str, message: str | Callable[[], str]) -> None:
+    """Send a log notification to the MCP client only if its level is enabled.
+
+    Args:
+        ctx: MCP request context
+        level: Level name ("debug", "info", "warning" or "error")
+        message: Message, or a callable building it only when the level is enabled
+    """
+    if is_enabled(level):
+        await ctx.log(level, message() if callable(message) else message)
+
+
 def get_logger():
     """Get configured logger instance.
 
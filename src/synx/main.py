@@ -9,17 +9,11 @@ from rich.console import Console
 from rich.panel import Panel
 
 from synx import __version__
-from synx.auth_config import AuthConfig
-from synx.config import AppConfig, LogLevel, MCPTransport
-from synx.logger import LogConfig, get_logger, setup_logger
-from synx.mcp_server import create_mcp_server, run_server
 
 # Load environment variables
 load_dotenv()
-# Initialize rich console and logger
+# Initialize rich console
 console = Console()
-# Load configuration
-config = AppConfig()
 
 app = typer.Typer(
     name="synx",
@@ -33,6 +27,12 @@ def start(
     debug: bool = typer.Option(os.getenv("DEBUG", False), "--debug", "-d", help="Enable debug mode"),
     log_level: str = typer.Option(os.getenv("LOG_LEVEL", "INFO"), "--log-level", "-l", help="Set log level"),
     use_auth: bool = typer.Option(bool(os.getenv("USE_AUTH", False)), "--use-auth", "-a", help="Use authentication"),
+    backend: str | None = typer.Option(
+        None, "--backend", "-b", help="Execution backend (thread or process); overrides EXECUTOR_BACKEND"
+    ),
+    workers: int | None = typer.Option(
+        None, "--workers", "-w", min=1, help="Number of execution workers; overrides EXECUTOR_WORKERS"
+    ),
 ) -> None:
     """Main command demonstrating Synx capabilities.
 
@@ -40,7 +40,25 @@ def start(
         debug: Enable debug mode for verbose output.
         log_level: Set the logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL).
         use_auth: Use authentication.
+        backend: Execution backend. With "process", sessions are routed to the
+            worker processes by consistent hashing of their ids.
+        workers: Number of execution workers.
     """
+    # Imported here so commands like `version` do not pay for the server, auth and pydantic-settings stacks
+    from synx.auth_config import AuthConfig
+    from synx.config import AppConfig, ExecutorBackend, LogLevel, MCPTransport
+    from synx.logger import LogConfig, get_logger, setup_logger
+    from synx.mcp_server import create_mcp_server, run_server
+
+    config = AppConfig()
+    if backend is not None:
+        try:
+            config.executor_backend = ExecutorBackend(backend)
+        except ValueError:
+            choices = ", ".join(choice.value for choice in ExecutorBackend)
+            raise typer.BadParameter(f"{backend!r} is not one of {choices}", param_hint="'--backend'") from None
+    if workers is not None:
+        config.executor_workers = workers
     # Set up logger
     cli_log_level = log_level.upper() if log_level.upper() in [level.value for level in LogLevel] else config.log_level.value
     app_log_level = "DEBUG" if debug else cli_log_level  # Override with "DEBUG" if debug is True
@@ -57,7 +75,9 @@ def start(
         if config.mcp_transport.value == MCPTransport.STREAMABLE_HTTP.value
         else "stdio"
     )
-    console.print(
+    # In stdio transport stdout carries the protocol
+    panel_console = Console(stderr=True) if config.mcp_transport == MCPTransport.STDIO else console
+    panel_console.print(
         Panel(
             f"[bold green]Starting Synx MCP Server[/bold green]\n"
             f"[dim]Transport: {config.mcp_transport.value}[/dim]\n"
@@ -67,7 +87,11 @@ def start(
         )
     )
     mcp_server = create_mcp_server(host=config.mcp_host, port=config.mcp_port, auth_config=auth_config)
-    asyncio.run(run_server(mcp_server, transport=config.mcp_transport))
+    try:
+        asyncio.run(run_server(mcp_server, transport=config.mcp_transport, config=config))
+    finally:
+        # Flush records still queued for the background sink
+        logger.complete()
 
 
 @app.command()
@@ -87,7 +111,7 @@ def main() -> None:
         first_arg = arg_defaults[0].default
         second_arg = arg_defaults[1].default
         third_arg = arg_defaults[2].default
-        start(first_arg, second_arg, third_arg)
+        start(first_arg, second_arg, third_arg, *(arg.default for arg in arg_defaults[3:]))
     else:
         console.print("No arg defaults found, running start with default values")
         start()
@@ -1,32 +1,58 @@
 """MCP Server for Synx - Synapse Executor."""
 
 import asyncio
+import base64
+import binascii
+import json
 import os
+from typing import TYPE_CHECKING
 
 from mcp.server.fastmcp import Context, FastMCP
-from mcp.server.auth.settings import AuthSettings
-from pydantic import AnyHttpUrl
+from pydantic import AnyHttpUrl, TypeAdapter
 
-from synx.auth.token_verifier import SimpleTokenVerifier
-from synx.auth_config import AuthConfig
-from synx.code_executor import PythonExecutor
-from synx.config import MCPTransport
-from synx.logger import get_logger
+from synx.auth_config import AuthConfig, TokenVerifierMode
+from synx.code_executor import BatchItem, BatchItemResult, PythonExecutor
+from synx.config import AppConfig, MCPTransport, VariablesMode
+from synx.logger import get_logger, log_to_client, truncate
+from synx.metrics import REGISTRY
+from synx.worker import ARRAY_URI
+
+if TYPE_CHECKING:
+    from mcp.server.auth.provider import TokenVerifier
+    from starlette.requests import Request
+    from starlette.responses import Response
 
 logger = get_logger()
 
-# TODO: Remove this once the FastMCP class is fixed.
-import uvicorn
-from mcp.server.auth.handlers.metadata import ProtectedResourceMetadataHandler
-from mcp.server.auth.routes import cors_middleware
-from mcp.shared.auth import ProtectedResourceMetadata
-from starlette.routing import Route
+BATCH_RESULTS = TypeAdapter(list[BatchItemResult])
+
+RESPONSE_BYTES = REGISTRY.histogram(
+    "synx_response_bytes",
+    "Size of tool and resource responses, by tool",
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+
+
+def _respond(tool: str, payload: str) -> str:
+    RESPONSE_BYTES.observe(len(payload.encode()), tool=tool)
+    return payload
+
+
+async def metrics(request: "Request") -> "Response":
+    """Serve every metric in the Prometheus text exposition format."""
+    from starlette.responses import Response
+
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 
 class FastMCPFixedOAuth(FastMCP):
     # TODO: This is a hack to fix the FastMCP class to work with OAuth 2.0 Protected Resource Metadata. Remove this once the FastMCP class is fixed.
 
     async def run_streamable_http_async(self) -> None:
         """Run the server using StreamableHTTP transport."""
+        # Imported here so the stdio transport does not load the HTTP server stack
+        import uvicorn
+        from starlette.routing import Route
 
         starlette_app = self.streamable_http_app()
 
@@ -41,6 +67,12 @@ class FastMCPFixedOAuth(FastMCP):
         )
         
         if self.settings.auth is not None:
+            from mcp.server.auth.handlers.metadata import (
+                ProtectedResourceMetadataHandler,
+            )
+            from mcp.server.auth.routes import cors_middleware
+            from mcp.shared.auth import ProtectedResourceMetadata
+
             logger.warning(f"--------------------------------")
             # Remove existing Protected Resource Metadata endpoint (resource="http://localhost:8000/")
             logger.warning(f"Removing existing Protected Resource Metadata endpoint: {starlette_app.router.routes}")
@@ -59,9 +91,17 @@ class FastMCPFixedOAuth(FastMCP):
             logger.warning(f"Adding new Protected Resource Metadata JSON endpoint: {protected_resource_metadata}")
             starlette_app.router.routes.append(Route("/.well-known/oauth-protected-resource", endpoint=cors_middleware(ProtectedResourceMetadataHandler(protected_resource_metadata).handle, ["GET", "OPTIONS"]), methods=["GET", "OPTIONS"]))
             logger.warning(f"--------------------------------")
+        # Scraped by Prometheus; like the metadata endpoint it is not behind auth
+        starlette_app.router.routes.append(Route("/metrics", endpoint=metrics, methods=["GET"]))
         # New server with fixed OAuth
         server = uvicorn.Server(config)
-        await server.serve()
+        try:
+            await server.serve()
+        finally:
+            # Release the pooled connections of the token verifier with the server
+            aclose = getattr(self._token_verifier, "aclose", None)
+            if aclose is not None:
+                await aclose()
         
 
 def create_mcp_server(host: str, port: int, auth_config: AuthConfig | None) -> FastMCP:
@@ -71,8 +111,10 @@ def create_mcp_server(host: str, port: int, auth_config: AuthConfig | None) -> F
     
     # Auth configuration
     auth_settings = None
-    token_verifier = None
+    token_verifier: TokenVerifier | None = None
     if auth_config is not None:
+        from mcp.server.auth.settings import AuthSettings
+
         this_mcp_server_url: AnyHttpUrl = AnyHttpUrl(f"{auth_config.resource_server_url}")
         auth_settings = AuthSettings(
             issuer_url=auth_config.auth_server_url,
@@ -81,12 +123,30 @@ def create_mcp_server(host: str, port: int, auth_config: AuthConfig | None) -> F
         )
         logger.info(f"Using auth: {auth_settings}")
         
-        # Create token verifier for introspection with RFC 8707 resource validation
-        token_verifier = SimpleTokenVerifier(
-            introspection_endpoint=auth_config.auth_server_introspection_endpoint,
-            server_url=str(this_mcp_server_url),
-            oauth_strict=auth_config.oauth_strict,  # Only validate when --oauth-strict is set
-        )
+        # Tokens are issued for the MCP endpoint advertised in the Protected Resource Metadata
+        mcp_resource_url = str(this_mcp_server_url) + "mcp"
+        # Imported here so servers without auth never load the JWT and introspection stacks
+        if auth_config.token_verifier == TokenVerifierMode.JWT:
+            from synx.auth.jwt_verifier import JWTTokenVerifier
+
+            # Validate JWT access tokens locally against the cached JWKS (RFC 8707 audience always checked)
+            token_verifier = JWTTokenVerifier(
+                jwks_uri=auth_config.jwks_uri,
+                server_url=mcp_resource_url,
+                issuer=auth_config.jwt_issuer,
+                algorithms=auth_config.jwt_algorithms,
+            )
+        else:
+            from synx.auth.token_verifier import SimpleTokenVerifier
+
+            # Create token verifier for introspection with RFC 8707 resource validation
+            token_verifier = SimpleTokenVerifier(
+                introspection_endpoint=auth_config.auth_server_introspection_endpoint,
+                server_url=mcp_resource_url,
+                oauth_strict=auth_config.oauth_strict,  # Only validate when --oauth-strict is set
+                cache_ttl_seconds=auth_config.introspection_cache_ttl,
+                negative_cache_ttl_seconds=auth_config.introspection_negative_cache_ttl,
+            )
     else:
         logger.warning("No auth used!")
 
@@ -100,36 +160,200 @@ def create_mcp_server(host: str, port: int, auth_config: AuthConfig | None) -> F
     )
 
 
-async def run_server(mcp: FastMCP, transport: MCPTransport = MCPTransport.STDIO):
-    executor = PythonExecutor()
+async def run_server(
+    mcp: FastMCP, transport: MCPTransport = MCPTransport.STDIO, config: AppConfig | None = None
+):
+    executor = PythonExecutor(config)
+    executor.start()
     
     logger.info(f"Starting Synx MCP Server (transport={transport})")
 
     @mcp.tool(name="run", description="Execute Python code in an isolated environment")
-    async def run_code(ctx: Context, code: str, session_id: str | None = None) -> str:
+    async def run_code(
+        ctx: Context,
+        code: str,
+        session_id: str | None = None,
+        variables: VariablesMode | None = None,
+        rollback_on_error: bool | None = None,
+        timeout: float | None = None,
+        profile: bool = False,
+    ) -> str:
         """
         Execute Python code in an isolated environment.
 
+        The code may use `await` at the top level, e.g. to overlap I/O with
+        asyncio.gather. It runs on an event loop kept by the session.
+
         Args:
             code: Python code to execute
             session_id: Optional session ID for maintaining state
+            variables: Report changed variables with their "values" or only their "types"
+            rollback_on_error: Restore the session state if the code fails
+            timeout: Wall-clock limit of the execution in seconds (defaults to the server setting)
+            profile: Run the code under cProfile and return its top functions by self time
 
         Returns:
-            JSON string with execution results
+            JSON string with execution results, including the time spent in every phase
         """
-        await ctx.log("info", f"Executing code: {code} for session: {session_id}")
-        result = await executor.execute(ctx, code, session_id)
-        await ctx.log("info", f"Execution result: {result}")
-        res = result.model_dump_json(indent=2)
-        await ctx.log("info", f"Result dumped to JSON: {res}")
-        return res
-
-    if transport == MCPTransport.STREAMABLE_HTTP:
-        logger.info(f"Server listening on {mcp.settings.host}:{mcp.settings.port}")
-        await mcp.run_streamable_http_async()
-    else:
-        logger.info("Server listening on stdio")
-        await mcp.run_stdio_async()
+        await log_to_client(ctx, "debug", lambda: f"Executing code: {truncate(code)} for session: {session_id}")
+        result = await executor.execute(ctx, code, session_id, variables, rollback_on_error, timeout, profile=profile)
+        res = result.model_dump_json()
+        # Payload dumps are only rendered when DEBUG is enabled
+        logger.opt(lazy=True).debug("Execution result: {}", lambda: truncate(res))
+        await log_to_client(ctx, "debug", lambda: f"Result dumped to JSON: {truncate(res)}")
+        return _respond("run", res)
+
+    @mcp.tool(name="run_batch", description="Execute many Python code snippets in one request")
+    async def run_batch(
+        ctx: Context,
+        items: list[BatchItem],
+        variables: VariablesMode | None = None,
+        rollback_on_error: bool | None = None,
+        timeout: float | None = None,
+        stream: bool = False,
+    ) -> str:
+        """
+        Execute many Python code snippets in one request.
+
+        Items of the same session run in order; items of different sessions run in parallel.
+
+        Args:
+            items: Snippets to execute, each with its code and an optional session ID
+            variables: Report changed variables with their "values" or only their "types"
+            rollback_on_error: Restore the session state if a snippet fails
+            timeout: Wall-clock limit of every snippet in seconds (defaults to the server setting)
+            stream: Send every result as a "synx.batch" log notification as soon as it completes
+                and only return a summary
+
+        Returns:
+            JSON string with the results in batch order, or a summary when streaming
+        """
+        await log_to_client(ctx, "debug", lambda: f"Executing batch of {len(items)} items")
+        completed = 0
+
+        async def send_result(result: BatchItemResult) -> None:
+            nonlocal completed
+            completed += 1
+            await ctx.log("info", result.model_dump_json(), logger_name="synx.batch")
+            await ctx.report_progress(completed, len(items))
+
+        results = await executor.execute_batch(
+            ctx, items, variables, rollback_on_error, timeout, send_result if stream else None
+        )
+        if stream:
+            return _respond(
+                "run_batch", json.dumps({"items": len(results), "failed": sum(result.failed for result in results)})
+            )
+        return _respond("run_batch", BATCH_RESULTS.dump_json(results).decode())
+
+    @mcp.resource(
+        ARRAY_URI,
+        name="array",
+        description="NumPy array variable of a session, in .npy format",
+        mime_type="application/x-npy",
+    )
+    async def read_array(session_id: str, name: str, ctx: Context) -> bytes:
+        data = await executor.read_array(ctx, session_id, name)
+        RESPONSE_BYTES.observe(len(data), tool="array")
+        return data
+
+    @mcp.tool(name="upload_blob", description="Upload binary data once so sessions can bind it without copying")
+    async def upload_blob(ctx: Context, data: str) -> str:
+        """
+        Upload binary data, e.g. a .npy file or a raw buffer, to server-side storage.
+
+        Args:
+            data: Base64-encoded content of the blob
+
+        Returns:
+            JSON string with the blob ID, its size and whether it is a .npy array
+        """
+        try:
+            content = base64.b64decode(data, validate=True)
+        except binascii.Error as e:
+            raise ValueError(f"Blob data is not valid base64: {e}") from e
+        info = await executor.upload_blob(ctx, content)
+        return _respond("upload_blob", info.model_dump_json())
+
+    @mcp.tool(name="bind_blob", description="Bind an uploaded blob to a variable of a session as a memory-mapped array")
+    async def bind_blob(
+        ctx: Context,
+        blob_id: str,
+        name: str,
+        session_id: str | None = None,
+        dtype: str | None = None,
+        shape: list[int] | None = None,
+    ) -> str:
+        """
+        Bind an uploaded blob to a variable of a session without copying it.
+
+        .npy blobs become NumPy arrays; other blobs become NumPy arrays of the given
+        dtype and shape, or read-only memoryviews when no dtype is given.
+
+        Args:
+            blob_id: Blob ID returned by upload_blob
+            name: Variable name
+            session_id: Optional session ID; a new session is created if omitted
+            dtype: NumPy dtype of a raw blob, e.g. "float32"
+            shape: Shape of a raw blob, flat if omitted
+
+        Returns:
+            JSON string with the session ID and the bound variable
+        """
+        session = await executor.bind_blob(ctx, blob_id, name, session_id, dtype, shape)
+        return _respond("bind_blob", json.dumps({"session_id": session.session_id, "name": name, "blob_id": blob_id}))
+
+    @mcp.tool(name="delete_blob", description="Delete an uploaded blob")
+    async def delete_blob(ctx: Context, blob_id: str) -> str:
+        """
+        Delete an uploaded blob. Sessions that already bound it keep their variables.
+
+        Args:
+            blob_id: Blob ID to delete
+
+        Returns:
+            JSON string telling whether the blob existed
+        """
+        deleted = await executor.delete_blob(ctx, blob_id)
+        return _respond("delete_blob", json.dumps({"blob_id": blob_id, "deleted": deleted}))
+
+    @mcp.tool(name="fork_session", description="Create a new session starting from a copy of an existing one")
+    async def fork_session(ctx: Context, session_id: str) -> str:
+        """
+        Create a new session starting from a copy of the state of an existing one.
+
+        Args:
+            session_id: Session ID to fork
+
+        Returns:
+            JSON string with the ID of the new session
+        """
+        session = await executor.fork_session(ctx, session_id)
+        return _respond("fork_session", json.dumps({"session_id": session.session_id, "forked_from": session_id}))
+
+    @mcp.tool(name="close_session", description="Close a session and release its state")
+    async def close_session(ctx: Context, session_id: str) -> str:
+        """
+        Close a session and release its state.
+
+        Args:
+            session_id: Session ID to close
+
+        Returns:
+            JSON string telling whether the session existed
+        """
+        closed = await executor.close_session(ctx, session_id)
+        return _respond("close_session", json.dumps({"session_id": session_id, "closed": closed}))
+
+    try:
+        if transport == MCPTransport.STREAMABLE_HTTP:
+            logger.info(f"Server listening on {mcp.settings.host}:{mcp.settings.port}")
+            await mcp.run_streamable_http_async()
+        else:
+            logger.info("Server listening on stdio")
+            await mcp.run_stdio_async()
+    finally:
+        await executor.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+"""Minimal in-process metrics for Synx.
+
+Metrics are registered once at import time in the module that owns them and
+rendered in the Prometheus text exposition format. No external client library
+is needed.
+"""
+
+import bisect
+import threading
+from collections.abc import Iterator, Sequence
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    # Counts stay exact instead of switching to exponent notation past 6 digits
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """Base class for a named metric with optional labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+
+    def _key(self, labels: dict[str, str]) -> tuple[tuple[str, str], ...]:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def value(self, **labels: str) -> float:
+        """Get the current value for the given labels."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, float]]:
+        """Yield (sample name with labels, value) pairs."""
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(labels)}", value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{sample} {_format_value(value)}" for sample, value in self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    # Seconds, from a fast snippet to a long computation
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] | None = None):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        # Labels -> observations per bucket (not cumulative), the last one being +Inf; _values holds their sum
+        self._counts: dict[tuple[tuple[str, str], ...], list[int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def count(self, **labels: str) -> int:
+        """Get the number of observations for the given labels."""
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> Iterator[tuple[str, float]]:
+        with self._lock:
+            items = [(labels, list(counts), self._values[labels]) for labels, counts in self._counts.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*(f"{bound:g}" for bound in self.buckets), "+Inf"), counts, strict=True):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels((*labels, ('le', bound)))}", cumulative
+            yield f"{self.name}_sum{_format_labels(labels)}", total
+            yield f"{self.name}_count{_format_labels(labels)}", cumulative
+
+
+class MetricsRegistry:
+    """Holds every metric of the process."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._register(Counter(name, description))  # type: ignore[return-value]
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._register(Gauge(name, description))  # type: ignore[return-value]
+
+    def histogram(self, name: str, description: str, buckets: Sequence[float] | None = None) -> Histogram:
+        return self._register(Histogram(name, description, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,49 @@
+"""Consistent hashing of session ids onto execution workers."""
+
+import bisect
+import hashlib
+from collections.abc import Iterable
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Maps keys to nodes so that every node owns an even share of the key space.
+
+    Each node is placed on the ring at several points (virtual nodes). A key
+    belongs to the first node point at or after its own hash, so adding or
+    removing a node only moves the keys of that node.
+    """
+
+    def __init__(self, nodes: Iterable[int], replicas: int = 64):
+        """Initialize the ring.
+
+        Args:
+            nodes: Node identifiers, e.g. worker indexes
+            replicas: Points per node on the ring; more points even out the shares
+        """
+        self.replicas = replicas
+        self._points: list[int] = []
+        self._owners: list[int] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: int) -> None:
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            index = bisect.bisect_left(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def node_for(self, key: str) -> int:
+        """Get the node owning a key.
+
+        Raises:
+            LookupError: If the ring has no nodes
+        """
+        if not self._points:
+            raise LookupError("The hash ring has no nodes")
+        index = bisect.bisect_left(self._points, _hash(key))
+        return self._owners[index % len(self._owners)]
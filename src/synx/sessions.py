@@ -1,11 +1,39 @@
 import asyncio
+import itertools
+import re
+import shutil
 import threading
 import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
 from datetime import datetime
-from typing import Any
+from enum import Enum
+from pathlib import Path
 
 from mcp.server.fastmcp import Context
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from synx.logger import get_logger, log_to_client
+from synx.metrics import REGISTRY
+
+logger = get_logger()
+
+SESSIONS_ACTIVE = REGISTRY.gauge("synx_sessions_active", "Number of live sessions")
+SESSIONS_CREATED = REGISTRY.counter("synx_sessions_created_total", "Number of sessions created")
+SESSIONS_EVICTED = REGISTRY.counter("synx_sessions_evicted_total", "Number of sessions evicted, by reason")
+SESSIONS_MEMORY = REGISTRY.gauge(
+    "synx_sessions_memory_bytes", "Approximate memory held by the namespaces of live sessions"
+)
+
+
+class EvictionReason(str, Enum):
+    """Why a session was removed from the session manager."""
+
+    TTL = "ttl"
+    LRU = "lru"
+    MEMORY = "memory"
+    CLOSED = "closed"
+    WORKER_LOST = "worker_lost"
 
 
 class Session(BaseModel):
@@ -15,76 +43,448 @@ class Session(BaseModel):
 
     session_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     created_at: datetime = Field(default_factory=datetime.now)
+    last_used_at: datetime = Field(default_factory=datetime.now)
     lock: asyncio.Lock = Field(default_factory=asyncio.Lock, exclude=True)
-    globals: dict[str, Any] = Field(default_factory=dict, exclude=True)
-    locals: dict[str, Any] = Field(default_factory=dict, exclude=True)
     execution_count: int = Field(default=0)
+    memory_bytes: int = Field(default=0, description="Approximate size of the session namespace")
+    # Position in the least-recently-used order of the session manager
+    _last_use: int = PrivateAttr(default=0)
 
     def __str__(self) -> str:
         """String representation of Session."""
         return f"Session(id={self.session_id}, execution_count={self.execution_count})"
 
 
-class SessionManager:
-    """Manages code execution sessions."""
+class SessionStore:
+    """Directory holding the snapshots of spilled sessions (see synx.snapshots).
+
+    The namespace files of a snapshot are written by the worker owning the
+    session; the store only knows where snapshots live and keeps the session
+    metadata next to them.
+    """
+
+    METADATA_FILE = "session.json"
+    # Session ids become directory names: anything else is never looked up on disk
+    _VALID_ID = re.compile(r"[A-Za-z0-9_-]{1,128}")
+
+    def __init__(self, root: str | Path):
+        """Initialize the store.
+
+        Args:
+            root: Directory of the snapshots, created if needed
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, session_id: str) -> Path:
+        """Get the snapshot directory of a session.
+
+        Raises:
+            ValueError: If the session id cannot be used as a directory name
+        """
+        if not self._VALID_ID.fullmatch(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        return self.root / session_id
+
+    def exists(self, session_id: str) -> bool:
+        if not self._VALID_ID.fullmatch(session_id):
+            return False
+        return (self.path(session_id) / self.METADATA_FILE).exists()
+
+    def save_metadata(self, session: Session) -> None:
+        (self.path(session.session_id) / self.METADATA_FILE).write_text(session.model_dump_json())
+
+    def load_metadata(self, session_id: str) -> Session | None:
+        try:
+            return Session.model_validate_json((self.path(session_id) / self.METADATA_FILE).read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read the snapshot of session {session_id}: {e}")
+            return None
+
+    def delete(self, session_id: str) -> bool:
+        if not self.exists(session_id):
+            return False
+        shutil.rmtree(self.path(session_id), ignore_errors=True)
+        return True
+
+
+# Called after a session has been removed, e.g. to drop its namespace
+EvictionCallback = Callable[[Session, EvictionReason], Awaitable[None]]
 
-    exec_globals = {
-        "__builtins__": __builtins__,
-        "__name__": "__main__",
-        "__doc__": None,
-    }
+
+class _Shard:
+    """One partition of the session table, in least-recently-used order."""
+
+    __slots__ = ("lock", "sessions", "memory_bytes")
 
     def __init__(self):
-        """Initialize the session manager."""
-        self._sessions_lock = threading.Lock()
-        self._sessions: dict[str, Session] = {}
+        self.lock = threading.Lock()
+        self.sessions: OrderedDict[str, Session] = OrderedDict()
+        # Running total of the memory_bytes of the sessions of the shard
+        self.memory_bytes = 0
+
+
+class SessionManager:
+    """Manages code execution sessions.
+
+    Only session metadata lives here; namespaces are owned by the execution
+    backend worker each session is pinned to.
+
+    Sessions live in a table split into shards by session id. Each shard has
+    its own lock, held only around dictionary operations and never across an
+    await, so lookups of different sessions do not contend and a slow client
+    never stalls the others. Looking a session up by id takes no lock at all.
+
+    Sessions are kept in least-recently-used order and evicted when they stay
+    idle longer than the TTL, when there are more than `max_sessions` of them or
+    when their namespaces hold more than `memory_budget_bytes` overall. Sessions
+    that are executing code are never evicted. Eviction only visits the
+    sessions it removes plus one candidate per shard, so its cost does not grow
+    with the number of live sessions.
+    """
+
+    DEFAULT_SHARDS = 16
+
+    def __init__(
+        self,
+        max_sessions: int | None = None,
+        ttl_seconds: float | None = None,
+        memory_budget_bytes: int | None = None,
+        on_evict: EvictionCallback | None = None,
+        shards: int = DEFAULT_SHARDS,
+        id_factory: Callable[[], str] | None = None,
+    ):
+        """Initialize the session manager.
+
+        Args:
+            max_sessions: Optional maximum number of live sessions
+            ttl_seconds: Optional idle time after which a session expires
+            memory_budget_bytes: Optional budget for the namespaces of all sessions
+            on_evict: Optional callback awaited for every removed session
+            shards: Number of partitions of the session table
+            id_factory: Optional callable minting the ids of new sessions, e.g. to
+                route them to a given worker; random UUIDs otherwise
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.memory_budget_bytes = memory_budget_bytes
+        self.on_evict = on_evict
+        self.id_factory = id_factory
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        # Orders uses across shards, so the least recently used session overall can be found
+        self._clock = itertools.count()
+        self._reaper: asyncio.Task | None = None
+        # Removed sessions whose eviction callback has not finished yet, set once it has
+        self._releasing: dict[str, asyncio.Event] = {}
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def _touch(self, shard: _Shard, session: Session) -> None:
+        """Mark a session as just used. Must hold the shard lock."""
+        session.last_used_at = datetime.now()
+        session._last_use = next(self._clock)
+        shard.sessions.move_to_end(session.session_id)
+
+    def _insert(self, session: Session) -> None:
+        shard = self._shard(session.session_id)
+        with shard.lock:
+            shard.sessions[session.session_id] = session
+            shard.memory_bytes += session.memory_bytes
+            self._touch(shard, session)
+
+    def _remove(self, shard: _Shard, session: Session) -> None:
+        """Drop a session from its shard. Must hold the shard lock."""
+        del shard.sessions[session.session_id]
+        shard.memory_bytes -= session.memory_bytes
+
+    def __len__(self) -> int:
+        return sum(len(shard.sessions) for shard in self._shards)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the namespaces of all live sessions."""
+        return sum(shard.memory_bytes for shard in self._shards)
+
+    def _update_gauges(self) -> None:
+        SESSIONS_ACTIVE.set(len(self))
+        SESSIONS_MEMORY.set(self.memory_bytes)
 
     async def get_or_create_session(
-        self, ctx: Context, session_id: str | None = None
+        self, ctx: Context, session_id: str | None = None, locked: bool = False
     ) -> Session:
         """Get existing session or create a new one.
 
         Args:
             session_id: Optional session identifier
+            locked: Return the session with its lock held by the caller, who must
+                release it. New sessions are locked before they are registered,
+                so they cannot be evicted before the caller gets to use them.
 
         Returns:
             Session object
+
+        Raises:
+            KeyError: If session_id is given but does not exist
+        """
+        if session_id is None:
+            session = Session() if self.id_factory is None else Session(session_id=self.id_factory())
+            if locked:
+                # Never contended: nobody else knows the session yet
+                await session.lock.acquire()
+            try:
+                self._insert(session)
+                SESSIONS_CREATED.inc()
+                self._update_gauges()
+                await log_to_client(ctx, "info", f"Creating new session: {session.session_id}")
+                if self.max_sessions is not None and len(self) > self.max_sessions:
+                    await self._evicted(self._select_over_limits())
+            except BaseException:
+                if locked:
+                    session.lock.release()
+                raise
+            return session
+
+        shard = self._shard(session_id)
+        with shard.lock:
+            found_session = shard.sessions.get(session_id)
+            if found_session is not None:
+                self._touch(shard, found_session)
+        if found_session is None:
+            await log_to_client(ctx, "error", f"Session {session_id} not found")
+            raise KeyError(f"Session {session_id} not found")
+        await log_to_client(ctx, "debug", f"Session {session_id} found")
+        if locked:
+            await self.lock_session(found_session)
+        return found_session
+
+    async def lock_session(self, session: Session) -> None:
+        """Acquire the lock of a live session.
+
+        The caller must release it. Sessions are never evicted while locked.
+
+        Raises:
+            KeyError: If the session was removed before the lock was acquired
         """
-        with self._sessions_lock:
-            if session_id is None:
-                session = Session()
-                await ctx.log("info", f"Creating new session: {session.session_id}")
-                self._sessions[session.session_id] = session
-                return session
-            else:
-                found_session = self._sessions.get(session_id)
-                if found_session is None:
-                    await ctx.log("error", f"Session {session_id} not found")
-                    raise KeyError(f"Session {session_id} not found")
-                await ctx.log("info", f"Session {session_id} found")
-                return found_session
+        await session.lock.acquire()
+        if self._shard(session.session_id).sessions.get(session.session_id) is not session:
+            session.lock.release()
+            raise KeyError(f"Session {session.session_id} not found")
+
+    def adopt(self, session: Session) -> tuple[Session, bool]:
+        """Register a session created elsewhere, e.g. restored from a snapshot.
+
+        Args:
+            session: Session object
+
+        Returns:
+            The live session with that id, and whether it was just registered
+        """
+        shard = self._shard(session.session_id)
+        with shard.lock:
+            found = shard.sessions.get(session.session_id)
+            if found is not None:
+                return found, False
+            shard.sessions[session.session_id] = session
+            shard.memory_bytes += session.memory_bytes
+            self._touch(shard, session)
+        self._update_gauges()
+        return session, True
 
     def get_session(self, session_id: str) -> Session:
-        """Get session by ID.
+        """Get session by ID without marking it as used.
 
         Args:
             session_id: Session identifier
 
         Returns:
             Session object
+
+        Raises:
+            KeyError: If the session does not exist
         """
-        with self._sessions_lock:
-            return self._sessions[session_id]
-
-    def update_session(
-        self, session_id: str, exec_globals: dict[str, Any], exec_locals: dict[str, Any]
-    ) -> None:
-        with self._sessions_lock:
-            session = self._sessions[session_id]
-            session.globals.update(exec_globals)
-            session.locals.update(exec_locals)
+        # A single dictionary lookup is atomic, so reads take no lock
+        return self._shard(session_id).sessions[session_id]
+
+    def record_execution(self, session_id: str, memory_bytes: int | None = None) -> None:
+        """Count an execution of a session and mark it as used.
+
+        Does nothing if the session has been removed in the meantime.
+
+        Args:
+            session_id: Session identifier
+            memory_bytes: Optional new approximate size of the session namespace
+        """
+        shard = self._shard(session_id)
+        with shard.lock:
+            session = shard.sessions.get(session_id)
+            if session is None:
+                # Removed while it ran, e.g. its worker was lost
+                return
             session.execution_count += 1
+            self._touch(shard, session)
+            if memory_bytes is not None:
+                shard.memory_bytes += memory_bytes - session.memory_bytes
+                session.memory_bytes = memory_bytes
+        SESSIONS_MEMORY.set(self.memory_bytes)
+
+    def set_memory_bytes(self, session_id: str, memory_bytes: int) -> None:
+        """Update the approximate namespace size of a session, e.g. after restoring or forking it.
+
+        Does nothing if the session has been removed in the meantime.
+        """
+        shard = self._shard(session_id)
+        with shard.lock:
+            session = shard.sessions.get(session_id)
+            if session is None:
+                return
+            shard.memory_bytes += memory_bytes - session.memory_bytes
+            session.memory_bytes = memory_bytes
+        SESSIONS_MEMORY.set(self.memory_bytes)
 
     def list_sessions(self) -> list[str]:
-        with self._sessions_lock:
-            return list(self._sessions.keys())
+        session_ids: list[str] = []
+        for shard in self._shards:
+            with shard.lock:
+                session_ids.extend(shard.sessions)
+        return session_ids
+
+    async def delete_session(self, session_id: str, reason: EvictionReason = EvictionReason.CLOSED) -> bool:
+        """Remove a session explicitly.
+
+        Args:
+            session_id: Session identifier
+            reason: Why the session is removed
+
+        Returns:
+            True if the session existed
+        """
+        shard = self._shard(session_id)
+        with shard.lock:
+            session = shard.sessions.get(session_id)
+            if session is not None:
+                self._remove(shard, session)
+        if session is None:
+            return False
+        await self._evicted([(session, reason)])
+        return True
+
+    def _select_expired(self) -> list[tuple[Session, EvictionReason]]:
+        """Pop the idle sessions older than the TTL."""
+        if self.ttl_seconds is None:
+            return []
+        now = datetime.now()
+        victims: list[tuple[Session, EvictionReason]] = []
+        for shard in self._shards:
+            with shard.lock:
+                # Shards are in last-use order: stop at the first session that is recent enough
+                expired = []
+                for session in shard.sessions.values():
+                    if (now - session.last_used_at).total_seconds() <= self.ttl_seconds:
+                        break
+                    if not session.lock.locked():
+                        expired.append(session)
+                for session in expired:
+                    self._remove(shard, session)
+            victims.extend((session, EvictionReason.TTL) for session in expired)
+        return victims
+
+    def _pop_least_recently_used(self) -> Session | None:
+        """Pop the idle session used least recently across all shards."""
+        oldest: tuple[int, _Shard, Session] | None = None
+        for shard in self._shards:
+            with shard.lock:
+                candidate = next((s for s in shard.sessions.values() if not s.lock.locked()), None)
+            if candidate is not None and (oldest is None or candidate._last_use < oldest[0]):
+                oldest = (candidate._last_use, shard, candidate)
+        if oldest is None:
+            return None
+        _, shard, session = oldest
+        with shard.lock:
+            if shard.sessions.get(session.session_id) is not session:
+                return None
+            self._remove(shard, session)
+        return session
+
+    def _select_over_limits(self) -> list[tuple[Session, EvictionReason]]:
+        """Pop least recently used idle sessions until the count and memory limits are met."""
+        victims: list[tuple[Session, EvictionReason]] = []
+        for reason, exceeded in (
+            (EvictionReason.LRU, lambda: self.max_sessions is not None and len(self) > self.max_sessions),
+            (EvictionReason.MEMORY, lambda: self.memory_budget_bytes is not None and self.memory_bytes > self.memory_budget_bytes),
+        ):
+            while exceeded():
+                session = self._pop_least_recently_used()
+                if session is None:
+                    break
+                victims.append((session, reason))
+        return victims
+
+    async def enforce_limits(self) -> list[str]:
+        """Evict the sessions that exceed the TTL, count or memory limits.
+
+        Returns:
+            Identifiers of the evicted sessions
+        """
+        victims = self._select_expired() + self._select_over_limits()
+        await self._evicted(victims)
+        return [session.session_id for session, _ in victims]
+
+    async def _evicted(self, victims: list[tuple[Session, EvictionReason]]) -> None:
+        self._update_gauges()
+        # Registered before the first await, so nobody sees a victim neither live nor being released
+        for session, _ in victims:
+            self._releasing[session.session_id] = asyncio.Event()
+        try:
+            for session, reason in victims:
+                logger.info(f"Evicted session {session.session_id} ({reason.value}, ~{session.memory_bytes} bytes)")
+                SESSIONS_EVICTED.inc(reason=reason.value)
+                if self.on_evict is not None:
+                    try:
+                        await self.on_evict(session, reason)
+                    except Exception as e:
+                        logger.warning(f"Could not release evicted session {session.session_id}: {e}")
+                self._releasing.pop(session.session_id).set()
+        finally:
+            for session, _ in victims:
+                event = self._releasing.pop(session.session_id, None)
+                if event is not None:
+                    event.set()
+
+    def is_releasing(self, session_id: str) -> bool:
+        """Whether a removed session is still being released by the eviction callback."""
+        return session_id in self._releasing
+
+    async def wait_released(self, session_id: str) -> None:
+        """Wait until the eviction callback of a removed session has finished, if it is running."""
+        event = self._releasing.get(session_id)
+        if event is not None:
+            await event.wait()
+
+    def start_reaper(self, interval_seconds: float) -> None:
+        """Start a background task enforcing the limits periodically.
+
+        Must be called from a running event loop.
+
+        Args:
+            interval_seconds: Time between two sweeps
+        """
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap(interval_seconds))
+
+    async def stop_reaper(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+
+    async def _reap(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.enforce_limits()
+            except Exception as e:
+                logger.error(f"Session eviction sweep failed: {e}")
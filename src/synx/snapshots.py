@@ -0,0 +1,133 @@
+"""On-disk snapshots of session namespaces.
+
+A snapshot is one directory per session:
+
+    <session_id>/
+        session.json        session metadata, written by the server
+        namespace.pkl       picklable variables and imported modules
+        arrays/<name>.npy   NumPy arrays, memory-mapped copy-on-write on load
+
+The namespace files are written and read inside the worker that owns the
+session (see synx.worker), so large namespaces never cross into the server.
+Values are pickled with cloudpickle when it is installed, so functions and
+classes defined by user code survive; variables that cannot be pickled are
+left out of the snapshot.
+"""
+
+import importlib
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from types import ModuleType
+from typing import Any, cast
+
+try:
+    import cloudpickle  # type: ignore[import-untyped, unused-ignore]
+except ImportError:  # pragma: no cover - optional dependency
+    cloudpickle = None
+
+NAMESPACE_FILE = "namespace.pkl"
+ARRAYS_DIR = "arrays"
+# First bytes of every .npy file
+NPY_MAGIC = b"\x93NUMPY"
+
+
+def _dumps(value: Any) -> bytes:
+    if cloudpickle is not None:
+        return cast(bytes, cloudpickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def is_plain_array(value: Any) -> bool:
+    """Tell whether a value is a NumPy array that can be saved without pickling."""
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(value, numpy.ndarray) and not value.dtype.hasobject
+
+
+def dump_namespace(namespace: Mapping[str, Any], path: str | Path) -> list[str]:
+    """Write a namespace to a snapshot directory, replacing any previous snapshot.
+
+    The snapshot is written next to its final location and renamed into place,
+    so a crash never leaves a half-written snapshot behind.
+
+    Args:
+        namespace: Session namespace
+        path: Snapshot directory
+
+    Returns:
+        Names of the variables left out because they could not be pickled
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{target.name}-", dir=target.parent))
+    try:
+        arrays_dir = staging / ARRAYS_DIR
+        arrays_dir.mkdir()
+        modules: dict[str, str] = {}
+        arrays: list[str] = []
+        values: dict[str, Any] = {}
+        for name, value in namespace.items():
+            if name.startswith("__"):
+                continue
+            if isinstance(value, ModuleType):
+                modules[name] = value.__name__
+            elif is_plain_array(value):
+                sys.modules["numpy"].save(arrays_dir / f"{name}.npy", value, allow_pickle=False)
+                arrays.append(name)
+            else:
+                values[name] = value
+
+        # One pickle keeps objects shared between variables shared after loading
+        skipped: list[str] = []
+        try:
+            pickled = _dumps(values)
+        except Exception:
+            for name in list(values):
+                try:
+                    _dumps(values[name])
+                except Exception:
+                    skipped.append(name)
+                    del values[name]
+            pickled = _dumps(values)
+
+        with open(staging / NAMESPACE_FILE, "wb") as f:
+            pickle.dump({"modules": modules, "arrays": arrays, "values": pickled}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return skipped
+
+
+def load_namespace(path: str | Path) -> dict[str, Any]:
+    """Read the variables of a snapshot directory.
+
+    Arrays are memory-mapped copy-on-write, so loading costs no more than
+    the pages that are actually touched, and changes never reach the file.
+
+    Args:
+        path: Snapshot directory
+
+    Returns:
+        Variables of the snapshot, by name
+    """
+    source = Path(path)
+    with open(source / NAMESPACE_FILE, "rb") as f:
+        data = pickle.load(f)
+    values: dict[str, Any] = pickle.loads(data["values"])
+    for name, module in data["modules"].items():
+        try:
+            values[name] = importlib.import_module(module)
+        except ImportError:
+            pass
+    if data["arrays"]:
+        numpy = importlib.import_module("numpy")
+        for name in data["arrays"]:
+            values[name] = numpy.load(source / ARRAYS_DIR / f"{name}.npy", mmap_mode="c")
+    return values
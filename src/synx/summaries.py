@@ -0,0 +1,231 @@
+"""Bounded, size-aware summaries of variable values.
+
+Values reported back to the client go through `summarize`, which keeps the
+result JSON-compatible and roughly within a byte budget regardless of how large
+the value is. Small scalars, strings, lists, tuples and dicts come back
+unchanged; large ones, and other sized values such as sets or ranges, are
+replaced by a summary dict with their type, size information and a truncated
+preview.
+
+Summarizers are looked up by the fully qualified name of the value's type (and
+its bases), so third-party types such as `numpy.ndarray` can be registered
+without importing their modules up front.
+"""
+
+import json
+import reprlib
+import sys
+import threading
+from collections.abc import Callable
+from itertools import islice
+from typing import Any
+
+# Summarizer signature: (value, byte budget) -> JSON-compatible summary
+Summarizer = Callable[[Any, int], Any]
+
+_summarizers: dict[str, Summarizer] = {}
+
+_SCALARS = (bool, int, float, type(None))
+
+# Containers nested deeper than this are summarized by their repr
+MAX_DEPTH = 32
+
+# Ids of the values being summarized by the current thread, outermost first
+_active = threading.local()
+
+
+def _type_key(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def register_summarizer(type_: type | str, summarizer: Summarizer) -> None:
+    """Register the summarizer used for a type and its subclasses.
+
+    Args:
+        type_: Type or its fully qualified name (e.g. "numpy.ndarray")
+        summarizer: Callable building the summary of a value within a byte budget
+    """
+    key = type_ if isinstance(type_, str) else _type_key(type_)
+    _summarizers[key] = summarizer
+
+
+def _lookup(cls: type) -> Summarizer | None:
+    for base in cls.__mro__:
+        summarizer = _summarizers.get(_type_key(base))
+        if summarizer is not None:
+            return summarizer
+    return None
+
+
+def _truncate(text: str, budget: int) -> str:
+    return text if len(text) <= budget else text[:budget] + "..."
+
+
+def _size(summary: Any) -> int:
+    return len(json.dumps(summary, default=str))
+
+
+def summarize(value: Any, budget: int) -> Any:
+    """Build a JSON-compatible summary of a value within a byte budget.
+
+    Values that contain themselves or are nested deeper than MAX_DEPTH are cut
+    with a reprlib preview, and so is a value whose summarizer fails, so one
+    odd variable never breaks the report of the others.
+
+    Args:
+        value: Value to summarize
+        budget: Approximate maximum size in bytes of the serialized summary
+
+    Returns:
+        The value itself if it is a small scalar, string, list, tuple or dict,
+        otherwise a summary
+    """
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, str):
+        return _truncate(value, budget)
+    stack = _stack()
+    if len(stack) >= MAX_DEPTH or id(value) in stack:
+        return _fallback(value, budget)
+    stack.append(id(value))
+    try:
+        return _summarize(value, budget)
+    except MemoryError:
+        raise
+    except Exception:
+        return _fallback(value, budget)
+    finally:
+        stack.pop()
+
+
+def _stack() -> list[int]:
+    stack = getattr(_active, "stack", None)
+    if stack is None:
+        stack = _active.stack = []
+    return stack
+
+
+def _summarize(value: Any, budget: int) -> Any:
+    summarizer = _lookup(type(value))
+    if summarizer is not None:
+        return summarizer(value, budget)
+    if hasattr(value, "__len__"):
+        return _summarize_sized(value, budget)
+    # If not serializable, convert to string representation
+    return _truncate(str(value), budget)
+
+
+def _fallback(value: Any, budget: int) -> str:
+    try:
+        return _truncate(reprlib.repr(value), budget)
+    except Exception:
+        return f"<{type(value).__name__}>"
+
+
+def _summarize_sized(value: Any, budget: int) -> dict[str, Any]:
+    return {
+        "type": type(value).__name__,
+        "len": len(value),
+        "preview": _truncate(reprlib.repr(value), budget),
+    }
+
+
+def _summarize_sequence(value: list | tuple, budget: int) -> Any:
+    items: list[Any] = []
+    remaining = budget
+    for item in value:
+        if remaining <= 0:
+            return {
+                "type": type(value).__name__,
+                "len": len(value),
+                "preview": items,
+                "truncated": True,
+            }
+        summary = summarize(item, remaining)
+        remaining -= _size(summary) + 2
+        items.append(summary)
+    return items
+
+
+def _summarize_mapping(value: dict, budget: int) -> Any:
+    items: dict[str, Any] = {}
+    remaining = budget
+    for key, item in value.items():
+        if remaining <= 0:
+            return {
+                "type": type(value).__name__,
+                "len": len(value),
+                "preview": items,
+                "truncated": True,
+            }
+        text = _key_text(key, remaining, items)
+        remaining -= len(text) + 4
+        summary = summarize(item, remaining)
+        remaining -= _size(summary)
+        items[text] = summary
+    return items
+
+
+def _key_text(key: Any, budget: int, taken: dict[str, Any]) -> str:
+    """Render a mapping key as a string within a budget, distinct from the keys already taken."""
+    text = _truncate(key if isinstance(key, str) else repr(key), budget)
+    if text not in taken:
+        return text
+    # e.g. 1 and "1", or long keys sharing their first characters
+    n = 2
+    while f"{text} #{n}" in taken:
+        n += 1
+    return f"{text} #{n}"
+
+
+def _summarize_bytes(value: bytes | bytearray | memoryview, budget: int) -> dict[str, Any]:
+    data = bytes(value[: budget // 4])
+    return {
+        "type": type(value).__name__,
+        "len": len(value),
+        "preview": _truncate(repr(data), budget),
+    }
+
+
+def _summarize_ndarray(value: Any, budget: int) -> dict[str, Any]:
+    np = sys.modules["numpy"]
+    return {
+        "type": "ndarray",
+        "shape": list(value.shape),
+        "dtype": str(value.dtype),
+        "nbytes": int(value.nbytes),
+        "preview": _truncate(np.array2string(value, threshold=100, edgeitems=3), budget),
+    }
+
+
+def approximate_size(value: Any, sample: int = 1000) -> int:
+    """Approximate the memory held by a value without walking all of it.
+
+    Buffers report their `nbytes`; containers add the size of their items,
+    extrapolated from the first `sample` ones.
+
+    Args:
+        value: Value to measure
+        sample: Maximum number of container items to measure
+
+    Returns:
+        Approximate size in bytes
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, list | tuple | set | frozenset | dict) and value:
+        items = value.values() if isinstance(value, dict) else value
+        measured = [sys.getsizeof(item) for item in islice(items, sample)]
+        size += sum(measured) * len(value) // len(measured)
+    return size
+
+
+register_summarizer(list, _summarize_sequence)
+register_summarizer(tuple, _summarize_sequence)
+register_summarizer(dict, _summarize_mapping)
+register_summarizer(bytes, _summarize_bytes)
+register_summarizer(bytearray, _summarize_bytes)
+register_summarizer(memoryview, _summarize_bytes)
+register_summarizer("numpy.ndarray", _summarize_ndarray)
@@ -0,0 +1,928 @@
+"""Worker-side execution runtime for Synx.
+
+Everything in this module runs inside an execution backend worker (a thread or
+a child process). Session namespaces live here, keyed by session id, so the
+state of a session stays with the worker it is pinned to.
+"""
+
+import asyncio
+import copy
+import cProfile
+import ctypes
+import gc
+import importlib
+import math
+import mmap
+import os
+import pstats
+import resource
+import signal
+import sys
+import tempfile
+import threading
+import time
+from ast import PyCF_ALLOW_TOP_LEVEL_AWAIT
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from enum import Enum
+from inspect import CO_COROUTINE
+from multiprocessing.connection import Connection, Listener
+from types import FunctionType
+from typing import Any, NoReturn
+
+from pydantic import BaseModel, Field
+
+from synx.capture import OutputCallback, capture_output
+from synx.code_cache import CodeCache, CodeCacheStats
+from synx.config import VariablesMode
+from synx.snapshots import NPY_MAGIC, dump_namespace, is_plain_array, load_namespace
+from synx.summaries import approximate_size, summarize
+
+
+class WorkerSettings(BaseModel):
+    """Process-wide settings applied once when a worker starts."""
+
+    code_cache_size: int = Field(default=256, description="Maximum number of cached compiled snippets")
+    preload_modules: list[str] = Field(
+        default_factory=list, description="Modules imported when the worker starts"
+    )
+    cpu_time_limit_seconds: int | None = Field(
+        default=None, description="CPU time limit of a single execution (worker processes only)"
+    )
+    memory_limit_mb: int | None = Field(
+        default=None, description="Address space limit of the worker (worker processes only)"
+    )
+    array_resource_min_bytes: int | None = Field(
+        default=None, description="Arrays this large are reported as resources instead of previews; None disables"
+    )
+    array_export_dir: str | None = Field(
+        default=None, description="Directory where arrays are written when their resource is read"
+    )
+
+
+# URI template of the resource serving an array variable of a session
+ARRAY_URI = "synx://sessions/{session_id}/arrays/{name}"
+
+
+class WorkerStats(BaseModel):
+    """Counters reported by a worker."""
+
+    code_cache: CodeCacheStats = Field(description="Compiled-code cache counters")
+
+
+class ExecutionOptions(BaseModel):
+    """Per-execution options passed from the server to a worker."""
+
+    variables_mode: VariablesMode = Field(
+        default=VariablesMode.VALUES, description="Report changed variables with their values or only their types"
+    )
+    preview_bytes: int = Field(default=1024, description="Byte budget of the summary of each variable")
+    rollback_on_error: bool = Field(
+        default=False, description="Restore the namespace as it was before the execution if it fails"
+    )
+    timeout_seconds: float | None = Field(default=None, description="Wall-clock limit of the execution")
+    profile: bool = Field(default=False, description="Profile the user code with cProfile")
+
+
+# Number of functions reported by a profiled execution
+PROFILE_TOP = 20
+
+
+class ExecutionTimings(BaseModel):
+    """Time spent in every phase of an execution, in milliseconds.
+
+    The worker measures the phases it runs; the backend adds the time spent
+    waiting for the worker and the executor the time spent before it.
+    """
+
+    session_ms: float = Field(default=0.0, description="Looking up, creating or restoring the session")
+    lock_wait_ms: float = Field(default=0.0, description="Waiting for other executions of the session")
+    queue_ms: float = Field(default=0.0, description="Waiting for the worker and transferring the request and result")
+    snapshot_ms: float = Field(default=0.0, description="Copying the namespace for rollback_on_error")
+    compile_ms: float = Field(default=0.0, description="Compiling the code, or fetching it from the code cache")
+    exec_ms: float = Field(default=0.0, description="Running the code")
+    capture_ms: float = Field(default=0.0, description="Collecting output and changed variables")
+    serialize_ms: float = Field(default=0.0, description="Summarizing changed variables")
+    total_ms: float = Field(default=0.0, description="Whole execution as seen by the server")
+
+    @property
+    def worker_ms(self) -> float:
+        return self.snapshot_ms + self.compile_ms + self.exec_ms + self.capture_ms + self.serialize_ms
+
+
+class ProfileEntry(BaseModel):
+    """One function of the profile of an execution."""
+
+    function: str = Field(description="Function, as file:line(name)")
+    calls: int = Field(description="Number of calls")
+    self_ms: float = Field(description="Time spent in the function itself")
+    cumulative_ms: float = Field(description="Time spent in the function and the functions it called")
+
+
+class ErrorKind(str, Enum):
+    """What made an execution fail."""
+
+    EXCEPTION = "exception"
+    TIMEOUT = "timeout"
+    CPU_LIMIT = "cpu_limit"
+    MEMORY_LIMIT = "memory_limit"
+    WORKER_LOST = "worker_lost"
+
+
+class ExecutionError(BaseModel):
+    """Structured error of a failed execution."""
+
+    kind: ErrorKind = Field(description="What made the execution fail")
+    message: str = Field(description="Error message")
+
+
+class LimitExceeded(BaseException):
+    """Raised inside user code when an execution limit is hit.
+
+    It derives from BaseException so that `except Exception` blocks in user
+    code cannot swallow it.
+    """
+
+    kind = ErrorKind.TIMEOUT
+    message = "Execution limit exceeded"
+
+    def __init__(self, message: str | None = None):
+        super().__init__(message or self.message)
+
+
+class ExecutionTimeout(LimitExceeded):
+    kind = ErrorKind.TIMEOUT
+    message = "Execution timed out"
+
+
+class CPULimitExceeded(LimitExceeded):
+    kind = ErrorKind.CPU_LIMIT
+    message = "Execution exceeded its CPU time limit"
+
+
+class WorkerResult(BaseModel):
+    """Result of running a code block inside a worker."""
+
+    stdout: str = Field(default="", description="Standard output of the execution")
+    stderr: str = Field(default="", description="Standard error of the execution")
+    variables: dict[str, Any] = Field(
+        default_factory=dict, description="Variables created or rebound during the execution"
+    )
+    error: ExecutionError | None = Field(default=None, description="Error if the execution failed")
+    namespace_bytes: int = Field(default=0, description="Approximate size of the session namespace")
+    recycle: bool = Field(default=False, description="The worker should be replaced after this execution")
+    timings: ExecutionTimings | None = Field(default=None, description="Time spent in every phase")
+    peak_memory_delta_bytes: int | None = Field(
+        default=None, description="Growth of the peak resident memory of the worker process (worker processes only)"
+    )
+    profile: list[ProfileEntry] | None = Field(default=None, description="Top functions by self time, if profiled")
+
+
+class ForkedWorker(BaseModel):
+    """Where the server reaches a worker process forked from another one."""
+
+    address: str = Field(description="Unix socket address the forked worker listens on")
+    authkey: bytes = Field(description="Authentication key of the connection")
+    pid: int = Field(description="Process id of the forked worker")
+
+
+class Namespace(dict):
+    """Persistent namespace of a session that records which names get bound.
+
+    User code runs directly against it (as both globals and locals), so an
+    execution costs the same no matter how much state the session holds.
+    Top-level assignments, imports and definitions go through `__setitem__`.
+    Functions writing names through `global` bypass it: new names are caught
+    by a size check when changes are collected, and once the namespace holds
+    functions or classes (whose code may run `global` statements), every
+    name is also checked for a rebound value.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.changed: set[str] = set()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._known: set[str] = set(self)
+        # id() of the value of every name when changes were last collected
+        self._ids: dict[str, int] = {key: id(value) for key, value in self.items()}
+        self._has_code = any(isinstance(value, FunctionType | type) for value in self.values())
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.changed.add(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.changed.add(key)
+        super().__delitem__(key)
+
+    def collect_changes(self) -> set[str]:
+        """Return the names bound or deleted since the last call and reset them."""
+        changed, self.changed = self.changed, set()
+        for key in changed:
+            if key in self:
+                value = self[key]
+                self._known.add(key)
+                self._ids[key] = id(value)
+                self._has_code = self._has_code or isinstance(value, FunctionType | type)
+            else:
+                self._known.discard(key)
+                self._ids.pop(key, None)
+        if len(self) != len(self._known):
+            missed = self.keys() ^ self._known
+            changed |= missed
+            self._known = set(self)
+            for key in missed:
+                if key in self:
+                    self._ids[key] = id(self[key])
+                else:
+                    self._ids.pop(key, None)
+        if self._has_code:
+            # Costs one pass over the names, not their values
+            for key, value in self.items():
+                if self._ids.get(key) != id(value):
+                    changed.add(key)
+                    self._ids[key] = id(value)
+        return changed
+
+    def bind(self, key: str, value: Any) -> None:
+        """Bind a name without reporting it as changed by the next execution."""
+        super().__setitem__(key, value)
+        self.changed.discard(key)
+        self._known.add(key)
+        self._ids[key] = id(value)
+
+    def restore(self, snapshot: dict[str, Any]) -> None:
+        """Roll the namespace back to a snapshot taken with dict(namespace)."""
+        self.clear()
+        self.update(snapshot)
+        self.changed = set()
+        self._reset()
+
+
+def _new_namespace() -> Namespace:
+    return Namespace(
+        {
+            "__builtins__": __builtins__,
+            "__name__": "__main__",
+            "__doc__": None,
+        }
+    )
+
+
+# Compiled snippets shared by every session of this worker
+_code_cache = CodeCache()
+
+# Session namespaces owned by this worker
+_namespaces: dict[str, Namespace] = {}
+# Approximate size of every variable of a session: session_id -> name -> bytes
+_sizes: dict[str, dict[str, int]] = {}
+# Running total of _sizes per session
+_namespace_bytes: dict[str, int] = {}
+
+_settings = WorkerSettings()
+# Limits are enforced with signals and rlimits, so only in the main thread of a worker process (see serve)
+_enforce_limits = False
+# Connection to the server, in worker processes only
+_conn: Connection | None = None
+# Event loop of every session that ran code with top-level await; tasks left running continue on its next run
+_loops: dict[str, asyncio.AbstractEventLoop] = {}
+# Namespaces a forked worker inherited but does not serve; kept alive so their pages are never written
+_inherited: list[dict[str, Namespace]] = []
+# Thread ident -> session id of the execution running on that thread
+_running: dict[int, str] = {}
+_running_lock = threading.Lock()
+
+
+def _on_alarm(signum: int, frame: Any) -> None:
+    raise ExecutionTimeout()
+
+
+def _on_cpu_limit(signum: int, frame: Any) -> None:
+    raise CPULimitExceeded()
+
+
+@contextmanager
+def _limits(timeout_seconds: float | None) -> Iterator[None]:
+    """Arm the wall-clock and CPU time limits of one execution."""
+    if not _enforce_limits:
+        yield
+        return
+    cpu_seconds = _settings.cpu_time_limit_seconds
+    if cpu_seconds:
+        # RLIMIT_CPU counts the whole process lifetime: move the soft limit past the time used so far
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_seconds
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    if timeout_seconds:
+        signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        if cpu_seconds:
+            resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def _error_kind(error: BaseException) -> ErrorKind:
+    if isinstance(error, LimitExceeded):
+        return error.kind
+    if isinstance(error, MemoryError):
+        return ErrorKind.MEMORY_LIMIT
+    return ErrorKind.EXCEPTION
+
+
+def _report_variables(session_id: str, changed: dict[str, Any], options: ExecutionOptions) -> dict[str, Any]:
+    if options.variables_mode == VariablesMode.TYPES:
+        return {key: type(value).__name__ for key, value in changed.items()}
+    min_bytes = _settings.array_resource_min_bytes
+    variables = {}
+    for key, value in changed.items():
+        if min_bytes is not None and is_plain_array(value) and value.nbytes >= min_bytes:
+            # Large arrays are only referenced; their data is fetched through the resource
+            variables[key] = {
+                "type": "ndarray",
+                "shape": list(value.shape),
+                "dtype": str(value.dtype),
+                "nbytes": int(value.nbytes),
+                "resource": ARRAY_URI.format(session_id=session_id, name=key),
+            }
+        else:
+            variables[key] = summarize(value, options.preview_bytes)
+    return variables
+
+
+def execute(
+    session_id: str,
+    code: str,
+    options: ExecutionOptions | None = None,
+    emit: OutputCallback | None = None,
+) -> WorkerResult:
+    """Execute a code block against the namespace of a session.
+
+    Only variables created or rebound by this execution are reported, so
+    untouched state is never serialized no matter how large it is. Reported
+    values are bounded summaries (see synx.summaries).
+
+    A failed execution keeps whatever it bound before failing, unless
+    `options.rollback_on_error` is set, in which case a shallow snapshot of the
+    namespace is taken first and restored on error.
+
+    In a worker process, `options.timeout_seconds` and the CPU time limit of
+    the worker settings interrupt the code with a LimitExceeded error. A
+    MemoryError under a worker memory limit asks for the worker to be recycled.
+
+    The code may use `await` at the top level. Such code runs to completion
+    on an event loop owned by the session, so awaited I/O within one execution
+    overlaps while the worker waits for it. Tasks the code leaves running stay
+    on that loop and make progress during later executions that await.
+
+    Every result carries the time spent in each phase of the execution and, in
+    a worker process, how much the peak resident memory grew. With
+    `options.profile` the code runs under cProfile and the top functions by
+    self time are reported.
+
+    Args:
+        session_id: Session identifier
+        code: Python code to execute
+        options: Optional execution options. If None, uses default settings.
+        emit: Optional callback receiving output chunks while the code runs
+
+    Returns:
+        WorkerResult object
+    """
+    options = options or ExecutionOptions()
+    namespace = _namespaces.get(session_id)
+    if namespace is None:
+        namespace = _namespaces[session_id] = _new_namespace()
+    started = time.perf_counter()
+    snapshot = dict(namespace) if options.rollback_on_error else None
+    peak_rss = _peak_rss() if _enforce_limits else None
+    profiler = cProfile.Profile() if options.profile else None
+
+    # Capture stdout/stderr of this execution only
+    thread_id = threading.get_ident()
+    with capture_output(emit) as output:
+        with _running_lock:
+            _running[thread_id] = session_id
+        compiling = time.perf_counter()
+        compiled_at = None
+        error: BaseException | None
+        try:
+            with _limits(options.timeout_seconds):
+                compiled = _code_cache.compile(code, PyCF_ALLOW_TOP_LEVEL_AWAIT)
+                compiled_at = time.perf_counter()
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    if compiled.co_flags & CO_COROUTINE:
+                        # eval, unlike exec, returns the coroutine of code using top-level await
+                        _run_coroutine(session_id, eval(compiled, namespace))
+                    else:
+                        exec(compiled, namespace)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        except (Exception, SystemExit, LimitExceeded) as e:
+            error = e
+        else:
+            error = None
+        finally:
+            with _running_lock:
+                _running.pop(thread_id, None)
+        executed_at = time.perf_counter()
+        compiled_at = compiled_at or executed_at
+
+    if error is not None and snapshot is not None:
+        namespace.restore(snapshot)
+
+    # Only changed variables need to be measured again
+    sizes = _sizes.setdefault(session_id, {})
+    namespace_bytes = _namespace_bytes.get(session_id, 0)
+    changed: dict[str, Any] = {}
+    for key in namespace.collect_changes():
+        if key.startswith("__"):
+            continue
+        namespace_bytes -= sizes.pop(key, 0)
+        if key in namespace:
+            changed[key] = namespace[key]
+            sizes[key] = approximate_size(changed[key])
+            namespace_bytes += sizes[key]
+    _namespace_bytes[session_id] = namespace_bytes
+    stdout = output.getvalue("stdout")
+    stderr = output.getvalue("stderr")
+    captured_at = time.perf_counter()
+
+    error_info = None
+    variables: dict[str, Any] = {}
+    if error is not None:
+        kind = _error_kind(error)
+        if kind == ErrorKind.EXCEPTION and stderr:
+            error_message = stderr.strip()
+        else:
+            error_message = str(error) or type(error).__name__
+        stderr = f"Error: {error_message}"
+        error_info = ExecutionError(kind=kind, message=error_message)
+    else:
+        variables = _report_variables(session_id, changed, options)
+
+    timings = ExecutionTimings(
+        snapshot_ms=(compiling - started) * 1000,
+        compile_ms=(compiled_at - compiling) * 1000,
+        exec_ms=(executed_at - compiled_at) * 1000,
+        capture_ms=(captured_at - executed_at) * 1000,
+        serialize_ms=(time.perf_counter() - captured_at) * 1000,
+    )
+    return WorkerResult(
+        stdout=stdout,
+        stderr=stderr,
+        variables=variables,
+        error=error_info,
+        namespace_bytes=namespace_bytes,
+        recycle=(
+            error_info is not None
+            and error_info.kind == ErrorKind.MEMORY_LIMIT
+            and _enforce_limits
+            and bool(_settings.memory_limit_mb)
+        ),
+        timings=timings,
+        peak_memory_delta_bytes=max(_peak_rss() - peak_rss, 0) if peak_rss is not None else None,
+        profile=_top_functions(profiler) if profiler is not None else None,
+    )
+
+
+def _run_coroutine(session_id: str, coroutine: Any) -> None:
+    loop = _loops.get(session_id)
+    if loop is None:
+        loop = _loops[session_id] = asyncio.new_event_loop()
+    task = loop.create_task(coroutine)
+    try:
+        loop.run_until_complete(task)
+    except BaseException:
+        if not task.done():
+            # Interrupted while the loop waited (e.g. a timeout): the task must not resume on a later run
+            task.cancel()
+        elif not task.cancelled():
+            # Mark the error as retrieved, it is reported by execute
+            task.exception()
+        raise
+
+
+def _close_loop(session_id: str) -> None:
+    loop = _loops.pop(session_id, None)
+    if loop is None:
+        return
+    if loop.is_running():
+        # Still driven by a stuck worker thread that is being abandoned; it can only be stopped from there
+        loop.call_soon_threadsafe(loop.stop)
+        return
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    try:
+        # A loop cannot run while another one runs in the same thread, e.g. when called from the server loop
+        if asyncio._get_running_loop() is None:
+            # Same teardown as asyncio.run: pending tasks get to handle their cancellation
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+
+
+def _peak_rss() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _top_functions(profiler: cProfile.Profile) -> list[ProfileEntry]:
+    entries = []
+    # Filled in at runtime, so missing from the type stubs
+    stats: dict[tuple[str, int, str], tuple[Any, ...]] = pstats.Stats(profiler).stats  # type: ignore[attr-defined]
+    for (filename, line, name), (_, calls, self_time, cumulative, _) in stats.items():
+        if filename == "~" and "_lsprof.Profiler" in name:
+            continue
+        function = name if filename == "~" else f"{filename}:{line}({name})"
+        entries.append(
+            ProfileEntry(function=function, calls=calls, self_ms=self_time * 1000, cumulative_ms=cumulative * 1000)
+        )
+    entries.sort(key=lambda entry: entry.self_ms, reverse=True)
+    return entries[:PROFILE_TOP]
+
+
+def release(session_id: str) -> None:
+    """Drop the namespace of a session from this worker.
+
+    Args:
+        session_id: Session identifier
+    """
+    _namespaces.pop(session_id, None)
+    _sizes.pop(session_id, None)
+    _namespace_bytes.pop(session_id, None)
+    _close_loop(session_id)
+
+
+def snapshot(session_id: str, path: str) -> list[str]:
+    """Write the namespace of a session to a snapshot directory.
+
+    Args:
+        session_id: Session identifier
+        path: Snapshot directory
+
+    Returns:
+        Names of the variables left out because they could not be pickled
+    """
+    namespace = _namespaces.get(session_id)
+    if namespace is None:
+        raise KeyError(f"Session {session_id} has no namespace in this worker")
+    return dump_namespace(namespace, path)
+
+
+def export_array(session_id: str, name: str) -> str:
+    """Write an array variable of a session to a new .npy file.
+
+    The file goes to the array export directory (shared memory when
+    available), so the array never has to be pickled through the worker pipe.
+
+    Args:
+        session_id: Session identifier
+        name: Variable name
+
+    Returns:
+        Path of the file; the caller deletes it once read
+    """
+    namespace = _namespaces.get(session_id)
+    if namespace is None:
+        raise KeyError(f"Session {session_id} has no namespace in this worker")
+    value = namespace.get(name)
+    if not is_plain_array(value):
+        raise TypeError(f"Variable {name} is not a NumPy array")
+    fd, path = tempfile.mkstemp(prefix="synx-", suffix=".npy", dir=_settings.array_export_dir)
+    with os.fdopen(fd, "wb") as f:
+        sys.modules["numpy"].save(f, value, allow_pickle=False)
+    return path
+
+
+def bind_blob(
+    session_id: str, name: str, path: str, dtype: str | None = None, shape: list[int] | None = None
+) -> int:
+    """Bind a blob file into the namespace of a session without reading it.
+
+    .npy blobs become NumPy arrays, other blobs become NumPy arrays when a
+    dtype is given and read-only memoryviews otherwise. Arrays are mapped
+    copy-on-write, so writes stay private to the session. Mapped pages are
+    shared with every other session bound to the same blob and do not count
+    towards the session size.
+
+    Args:
+        session_id: Session identifier
+        name: Variable name
+        path: Blob file
+        dtype: NumPy dtype of a raw blob
+        shape: Shape of a raw blob, flat if omitted
+
+    Returns:
+        Approximate size of the session namespace
+    """
+    with open(path, "rb") as f:
+        npy = f.read(len(NPY_MAGIC)) == NPY_MAGIC
+        if not npy and dtype is None:
+            # Empty files cannot be mapped
+            empty = os.fstat(f.fileno()).st_size == 0
+            value: Any = memoryview(b"" if empty else mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    if npy:
+        value = importlib.import_module("numpy").load(path, mmap_mode="c", allow_pickle=False)
+    elif dtype is not None:
+        value = importlib.import_module("numpy").memmap(path, dtype=dtype, mode="c", shape=tuple(shape) if shape else None)
+
+    namespace = _namespaces.get(session_id)
+    if namespace is None:
+        namespace = _namespaces[session_id] = _new_namespace()
+    namespace.bind(name, value)
+    _namespace_bytes[session_id] = _namespace_bytes.get(session_id, 0) - _sizes.setdefault(session_id, {}).pop(name, 0)
+    return _namespace_bytes[session_id]
+
+
+def _rebind(function: FunctionType, namespace: Namespace) -> FunctionType:
+    rebound = FunctionType(function.__code__, namespace, function.__name__, function.__defaults__, function.__closure__)
+    rebound.__kwdefaults__ = function.__kwdefaults__
+    rebound.__qualname__ = function.__qualname__
+    rebound.__annotations__ = function.__annotations__
+    rebound.__doc__ = function.__doc__
+    rebound.__dict__.update(function.__dict__)
+    return rebound
+
+
+def restore(session_id: str, path: str) -> int:
+    """Replace the namespace of a session with the content of a snapshot directory.
+
+    Args:
+        session_id: Session identifier
+        path: Snapshot directory
+
+    Returns:
+        Approximate size of the restored namespace
+    """
+    values = load_namespace(path)
+    namespace = _new_namespace()
+    for name, value in values.items():
+        if isinstance(value, FunctionType) and value.__module__ == "__main__":
+            # Functions defined by user code must see the live namespace as their globals again
+            values[name] = _rebind(value, namespace)
+    namespace.restore({**namespace, **values})
+    _namespaces[session_id] = namespace
+    sizes = _sizes[session_id] = {name: approximate_size(value) for name, value in values.items()}
+    _namespace_bytes[session_id] = sum(sizes.values())
+    return _namespace_bytes[session_id]
+
+
+def clone(session_id: str, new_session_id: str) -> int:
+    """Copy the namespace of a session into a new session of this worker.
+
+    Fallback of `fork` for workers that cannot fork (threads): variables are
+    deep-copied, and the ones that cannot be copied (modules, open files...)
+    are shared by both sessions.
+
+    Args:
+        session_id: Session to copy
+        new_session_id: Identifier of the new session
+
+    Returns:
+        Approximate size of the new namespace
+    """
+    source = _namespaces[session_id]
+    namespace = _new_namespace()
+    memo: dict[int, Any] = {}
+    values: dict[str, Any] = {}
+    for name, value in source.items():
+        if name.startswith("__"):
+            continue
+        try:
+            value = copy.deepcopy(value, memo)
+        except Exception:
+            pass
+        if isinstance(value, FunctionType) and value.__module__ == "__main__":
+            value = _rebind(value, namespace)
+        values[name] = value
+    namespace.restore({**namespace, **values})
+    _namespaces[new_session_id] = namespace
+    _sizes[new_session_id] = dict(_sizes.get(session_id, {}))
+    _namespace_bytes[new_session_id] = _namespace_bytes.get(session_id, 0)
+    return _namespace_bytes[new_session_id]
+
+
+def fork(session_id: str, new_session_id: str) -> ForkedWorker:
+    """Fork this worker process into a new worker owning a copy of a session.
+
+    The new process shares every memory page with this one until either side
+    writes to it, so forking costs about the same whatever the session holds.
+    It is double-forked, so it never lingers as a zombie child of this worker,
+    and it serves only the new session, on a Unix socket the server connects to.
+
+    Args:
+        session_id: Session to copy
+        new_session_id: Identifier of the session served by the new worker
+
+    Returns:
+        ForkedWorker telling the server how to reach the new worker
+    """
+    if session_id not in _namespaces:
+        raise KeyError(f"Session {session_id} has no namespace in this worker")
+    if _conn is None:
+        raise RuntimeError("Only worker processes can fork")
+    authkey = os.urandom(32)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        if os.fork() == 0:
+            _serve_fork(session_id, new_session_id, authkey, write_fd)
+        os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_fd, "rb") as pipe:
+        message = pipe.read().decode()
+    if not message:
+        raise RuntimeError("Forked worker did not start")
+    child_pid, address = message.split(" ", 1)
+    return ForkedWorker(address=address, authkey=authkey, pid=int(child_pid))
+
+
+def _serve_fork(session_id: str, new_session_id: str, authkey: bytes, ready_fd: int) -> NoReturn:
+    try:
+        # The pipe to the server belongs to the parent worker
+        if _conn is not None:
+            _conn.close()
+        # Inherited objects are left out of future collections: scanning them would copy their pages
+        gc.freeze()
+        namespace = _namespaces[session_id]
+        sizes, namespace_bytes = _sizes.get(session_id, {}), _namespace_bytes.get(session_id, 0)
+        _inherited.append(dict(_namespaces))
+        _namespaces.clear()
+        _sizes.clear()
+        _namespace_bytes.clear()
+        _namespaces[new_session_id] = namespace
+        _sizes[new_session_id] = sizes
+        _namespace_bytes[new_session_id] = namespace_bytes
+
+        listener = Listener(family="AF_UNIX", authkey=authkey)
+        os.write(ready_fd, f"{os.getpid()} {listener.address}".encode())
+        os.close(ready_fd)
+        # Give up if the server never connects
+        signal.alarm(30)
+        try:
+            conn = listener.accept()
+        finally:
+            signal.alarm(0)
+            listener.close()
+        conn.send(("ready", []))
+        _serve_requests(conn)
+    finally:
+        os._exit(0)
+
+
+def interrupt(session_id: str) -> bool:
+    """Raise ExecutionTimeout in the thread running an execution of a session.
+
+    Used by the thread backend, where signals cannot reach worker threads. The
+    exception is delivered at the next bytecode boundary, so code blocked in a
+    C call is only interrupted once the call returns. The event loop of the
+    session is woken up, so code awaiting I/O is interrupted right away.
+
+    Args:
+        session_id: Session identifier
+
+    Returns:
+        True if an execution of the session was running and got interrupted
+    """
+    with _running_lock:
+        for thread_id, running in _running.items():
+            if running == session_id:
+                ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                    ctypes.c_ulong(thread_id), ctypes.py_object(ExecutionTimeout)
+                )
+                loop = _loops.get(session_id)
+                if loop is not None and loop.is_running():
+                    loop.call_soon_threadsafe(lambda: None)
+                return True
+    return False
+
+
+def stats() -> WorkerStats:
+    """Get the counters of this worker."""
+    return WorkerStats(code_cache=_code_cache.stats())
+
+
+def preload(modules: list[str]) -> list[str]:
+    """Import modules ahead of user code, so importing them later is a lookup in sys.modules.
+
+    Args:
+        modules: Names of the modules to import
+
+    Returns:
+        Names of the modules that could not be imported
+    """
+    failed = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            failed.append(name)
+    return failed
+
+
+def configure(settings: WorkerSettings) -> None:
+    """Apply process-wide worker settings. Modules are preloaded separately (see preload).
+
+    Args:
+        settings: Worker settings
+    """
+    global _settings
+    _settings = settings
+    _code_cache.resize(settings.code_cache_size)
+
+
+def _install_limits(settings: WorkerSettings) -> None:
+    """Enable the execution limits in the main thread of a worker process."""
+    global _enforce_limits
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    if settings.memory_limit_mb:
+        limit = settings.memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _enforce_limits = True
+
+
+OPERATIONS: dict[str, Callable[..., Any]] = {
+    "execute": execute,
+    "release": release,
+    "snapshot": snapshot,
+    "restore": restore,
+    "clone": clone,
+    "fork": fork,
+    "export_array": export_array,
+    "bind_blob": bind_blob,
+    "stats": stats,
+}
+
+
+def handle(op: str, kwargs: dict[str, Any], emit: OutputCallback | None = None) -> Any:
+    """Dispatch a backend request to the matching worker operation.
+
+    Args:
+        op: Operation name (see OPERATIONS)
+        kwargs: Keyword arguments for the operation
+        emit: Optional output callback, only passed to streaming operations
+
+    Returns:
+        Whatever the operation returns
+    """
+    if emit is not None:
+        kwargs = {**kwargs, "emit": emit}
+    try:
+        return OPERATIONS[op](**kwargs)
+    except LimitExceeded as e:
+        # The limit fired right after the user code had finished
+        return WorkerResult(stderr=f"Error: {e}", error=ExecutionError(kind=e.kind, message=str(e)))
+
+
+def serve(conn: Connection, settings: WorkerSettings | None = None) -> None:
+    """Request loop of a worker process.
+
+    Sends ("ready", failed preloads) once the worker is configured, then reads
+    (op, kwargs, stream) requests from the connection until it is closed or a
+    None sentinel arrives, and answers each one with ("ok", result) or
+    ("error", message). Streaming requests may be preceded by any number of
+    ("output", (stream name, text)) messages.
+
+    Args:
+        conn: Worker end of the pipe shared with the parent process
+        settings: Optional worker settings applied before serving
+    """
+    global _conn
+    _conn = conn
+    settings = settings or WorkerSettings()
+    configure(settings)
+    failed = preload(settings.preload_modules)
+    _install_limits(settings)
+    conn.send(("ready", failed))
+    _serve_requests(conn)
+
+
+def _serve_requests(conn: Connection) -> None:
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        op, kwargs, stream = request
+        emit = (lambda name, text: conn.send(("output", (name, text)))) if stream else None
+        try:
+            conn.send(("ok", handle(op, kwargs, emit)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
@@ -0,0 +1,26 @@
+"""Shared test fixtures."""
+
+import pytest
+
+
+class FakeContext:
+    """Minimal stand-in for the MCP request context."""
+
+    def __init__(self):
+        self.messages: list[tuple[str, str]] = []
+        self.streamed: list[tuple[str, str]] = []
+
+    async def log(self, level: str, message: str, logger_name: str | None = None) -> None:
+        if logger_name is None:
+            self.messages.append((level, message))
+        else:
+            self.streamed.append((logger_name, message))
+
+    async def report_progress(self, progress: float, total=None, message=None) -> None:
+        pass
+
+
+@pytest.fixture
+def make_context() -> type[FakeContext]:
+    """Class creating fake MCP request contexts, one per call."""
+    return FakeContext
@@ -0,0 +1,53 @@
+"""Tests for the compiled-code cache."""
+
+import pytest
+
+from synx.code_cache import CodeCache
+
+
+class TestCodeCache:
+    """Test cases for CodeCache."""
+
+    def test_hits_and_misses(self):
+        """Test that repeated sources are served from the cache."""
+        cache = CodeCache(maxsize=4)
+        first = cache.compile("x = 1")
+        second = cache.compile("x = 1")
+        assert first is second
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+    def test_flags_are_part_of_the_key(self):
+        """Test that the same source with other flags is compiled again."""
+        cache = CodeCache(maxsize=4)
+        cache.compile("x = 1")
+        cache.compile("x = 1", flags=0x2000)
+        assert cache.stats().misses == 2
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is dropped first."""
+        cache = CodeCache(maxsize=2)
+        cache.compile("a = 1")
+        cache.compile("b = 1")
+        cache.compile("a = 1")
+        cache.compile("c = 1")
+        cache.compile("a = 1")
+        cache.compile("b = 1")
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.size) == (2, 4, 2)
+
+    def test_syntax_errors_are_cached(self):
+        """Test that a broken snippet is only parsed once."""
+        cache = CodeCache(maxsize=4)
+        for _ in range(2):
+            with pytest.raises(SyntaxError):
+                cache.compile("x = = 1")
+        stats = cache.stats()
+        assert (stats.hits, stats.misses) == (1, 1)
+
+    def test_disabled_cache(self):
+        """Test that a zero-sized cache always compiles."""
+        cache = CodeCache(maxsize=0)
+        cache.compile("x = 1")
+        cache.compile("x = 1")
+        assert cache.stats().misses == 2
@@ -0,0 +1,818 @@
+"""Tests for the code executor and its execution backends."""
+
+import asyncio
+import io
+import os
+import time
+
+import numpy as np
+
+from synx import worker
+from synx.backends import WorkerError
+from synx.code_executor import BatchItem, PythonExecutor
+from synx.config import AppConfig, ExecutorBackend, VariablesMode
+from synx.worker import ErrorKind
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _with_executor(backend: ExecutorBackend, workers: int, body, **config):
+    executor = PythonExecutor(AppConfig(executor_backend=backend, executor_workers=workers, **config))
+    try:
+        return await body(executor)
+    finally:
+        await executor.shutdown()
+
+
+class TestPythonExecutor:
+    """Test cases for PythonExecutor."""
+
+    def test_execute_simple_code(self, make_context):
+        """Test running simple Python code."""
+
+        async def body(executor):
+            return await executor.execute(make_context(), "result = 2 + 2\nprint('hi')")
+
+        state = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert state.stdout == "hi\n"
+        assert state.stderr == ""
+        assert state.variables["result"] == 4
+        assert state.session.execution_count == 1
+
+    def test_execute_error(self, make_context):
+        """Test running code that raises."""
+
+        async def body(executor):
+            return await executor.execute(make_context(), "1 / 0")
+
+        state = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert "division by zero" in state.stderr
+        assert state.session.execution_count == 0
+
+    def test_execute_syntax_error(self, make_context):
+        """Test that syntax errors are reported, also when served from the cache."""
+
+        async def body(executor):
+            ctx = make_context()
+            first = await executor.execute(ctx, "x = = 1")
+            second = await executor.execute(ctx, "x = = 1")
+            return first, second, await executor.backend.stats()
+
+        first, second, stats = run(_with_executor(ExecutorBackend.PROCESS, 1, body))
+        assert "invalid syntax" in first.stderr
+        assert second.stderr == first.stderr
+        assert (stats[0].code_cache.hits, stats[0].code_cache.misses) == (1, 1)
+
+    def test_session_state_persists(self, make_context):
+        """Test that a session keeps its state between executions."""
+
+        async def body(executor):
+            ctx = make_context()
+            first = await executor.execute(ctx, "x = 10")
+            second = await executor.execute(ctx, "y = x * 2", first.session.session_id)
+            return second
+
+        state = run(_with_executor(ExecutorBackend.THREAD, 2, body))
+        assert state.variables == {"y": 20}
+        assert state.session.execution_count == 2
+
+    def test_only_changed_variables_are_reported(self, make_context):
+        """Test that untouched variables are not reported again."""
+
+        async def body(executor):
+            ctx = make_context()
+            first = await executor.execute(ctx, "a = [1, 2]\nb = 'x'")
+            session_id = first.session.session_id
+            second = await executor.execute(ctx, "print(a)", session_id)
+            third = await executor.execute(ctx, "b = 'y'\nc = a", session_id)
+            return first, second, third
+
+        first, second, third = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert first.variables == {"a": [1, 2], "b": "x"}
+        assert second.variables == {}
+        assert third.variables == {"b": "y", "c": [1, 2]}
+
+    def test_functions_see_session_names(self, make_context):
+        """Test that functions defined in a session resolve its top-level names."""
+
+        async def body(executor):
+            ctx = make_context()
+            first = await executor.execute(ctx, "base = 10\ndef add(n):\n    return base + n")
+            return await executor.execute(ctx, "total = add(5)", first.session.session_id)
+
+        state = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert state.variables == {"total": 15}
+
+    def test_names_bound_through_global_are_reported(self, make_context):
+        """Test that names bound by `global` statements are tracked."""
+
+        async def body(executor):
+            code = "def setup():\n    global loaded\n    loaded = 1\nsetup()"
+            return await executor.execute(make_context(), code)
+
+        state = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert state.variables["loaded"] == 1
+
+    def test_names_rebound_through_global_are_reported(self, make_context):
+        """Test that rebinding an existing name through `global` is reported and re-sized."""
+
+        async def body(executor):
+            ctx = make_context()
+            first = await executor.execute(ctx, "counter = 0\ndef inc():\n    global counter\n    counter += 1")
+            session_id = first.session.session_id
+            called = await executor.execute(ctx, "inc()", session_id)
+            grow = "def grow():\n    global counter\n    counter = bytearray(10_000_000)"
+            grown = await executor.execute(ctx, f"{grow}\ngrow()", session_id)
+            return called, grown
+
+        called, grown = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert called.variables == {"counter": 1}
+        assert "counter" in grown.variables
+        assert grown.session.memory_bytes >= 10_000_000
+
+    def test_failed_execution_rollback(self, make_context):
+        """Test that a failed execution keeps its bindings unless rolled back."""
+
+        async def body(executor):
+            ctx = make_context()
+            first = await executor.execute(ctx, "x = 1")
+            session_id = first.session.session_id
+            await executor.execute(ctx, "x = 2\n1 / 0", session_id)
+            kept = await executor.execute(ctx, "y = x", session_id)
+            await executor.execute(ctx, "x = 3\n1 / 0", session_id, rollback_on_error=True)
+            rolled_back = await executor.execute(ctx, "z = x", session_id)
+            return kept, rolled_back
+
+        kept, rolled_back = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert kept.variables == {"y": 2}
+        assert rolled_back.variables == {"z": 2}
+
+    def test_variables_types_mode(self, make_context):
+        """Test reporting only the names and types of changed variables."""
+
+        async def body(executor):
+            return await executor.execute(
+                make_context(), "n = 1\ns = {1, 2}", variables_mode=VariablesMode.TYPES
+            )
+
+        state = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert state.variables == {"n": "int", "s": "set"}
+
+    def test_blocking_code_does_not_block_event_loop(self, make_context, tmp_path):
+        """Test that sessions on different workers run concurrently while the event loop keeps running."""
+        # Each snippet blocks until the other one and the event loop have signalled through a file
+        code = (
+            "import os, time\n"
+            "open({me!r}, 'w').close()\n"
+            "deadline = time.monotonic() + 10\n"
+            "while not (os.path.exists({other!r}) and os.path.exists({loop!r})) and time.monotonic() < deadline:\n"
+            "    time.sleep(0.01)\n"
+            "released = os.path.exists({loop!r})"
+        )
+        first, second, loop = (str(tmp_path / name) for name in ("first", "second", "loop"))
+
+        async def body(executor):
+            ctx = make_context()
+            runs = asyncio.gather(
+                executor.execute(ctx, code.format(me=first, other=second, loop=loop)),
+                executor.execute(ctx, code.format(me=second, other=first, loop=loop)),
+            )
+            # Only reached while both snippets are blocked if neither holds the event loop
+            while not (os.path.exists(first) and os.path.exists(second)):
+                await asyncio.sleep(0.01)
+            open(loop, "w").close()
+            return await runs
+
+        states = run(_with_executor(ExecutorBackend.THREAD, 2, body))
+        assert [state.variables.get("released") for state in states] == [True, True]
+
+    def test_concurrent_output_is_isolated(self, make_context):
+        """Test that overlapping executions do not mix their output."""
+        code = "import time\nfor i in range(5):\n    print('{tag}', i)\n    time.sleep(0.02)"
+
+        async def body(executor):
+            ctx = make_context()
+            return await asyncio.gather(
+                executor.execute(ctx, code.format(tag="a")),
+                executor.execute(ctx, code.format(tag="b")),
+            )
+
+        first, second = run(_with_executor(ExecutorBackend.THREAD, 2, body))
+        assert first.stdout == "".join(f"a {i}\n" for i in range(5))
+        assert second.stdout == "".join(f"b {i}\n" for i in range(5))
+
+    def test_output_is_streamed(self, make_context):
+        """Test that output chunks reach the client as log notifications."""
+
+        async def body(executor):
+            ctx = make_context()
+            await executor.execute(ctx, "import sys\nprint('one')\nprint('two', file=sys.stderr)")
+            return ctx.streamed
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            streamed = run(_with_executor(backend, 1, body))
+            assert streamed == [("synx.stdout", "one\n"), ("synx.stderr", "two\n")]
+
+    def test_streamed_output_is_batched(self, make_context):
+        """Test that a tight print loop is forwarded in a few chunks that add up to the whole output."""
+
+        async def body(executor):
+            ctx = make_context()
+            state = await executor.execute(ctx, "for i in range(20000):\n    print(i)")
+            return state, ctx.streamed
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            state, streamed = run(_with_executor(backend, 1, body))
+            assert len(streamed) < 100
+            assert "".join(text for _, text in streamed) == state.stdout
+
+    def test_output_of_user_threads_stays_off_stdout(self, make_context, capfd):
+        """Test that output written outside the execution context goes to stderr."""
+
+        async def body(executor):
+            code = "import threading\nthread = threading.Thread(target=print, args=('stray',))\nthread.start()\nthread.join()"
+            return await executor.execute(make_context(), code)
+
+        state = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        captured = capfd.readouterr()
+        assert state.error is None
+        assert "stray" not in captured.out and "stray" in captured.err
+
+    def test_close_session_releases_namespace(self, make_context):
+        """Test that closing a session drops its namespace from the worker."""
+
+        async def body(executor):
+            ctx = make_context()
+            state = await executor.execute(ctx, "x = 1")
+            session_id = state.session.session_id
+            closed = await executor.close_session(ctx, session_id)
+            closed_again = await executor.close_session(ctx, session_id)
+            return session_id, closed, closed_again
+
+        session_id, closed, closed_again = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert closed is True
+        assert closed_again is False
+        assert session_id not in worker._namespaces
+
+    def test_new_sessions_are_not_evicted_before_running(self, make_context):
+        """Test that concurrent new sessions over max_sessions do not evict each other before running."""
+
+        class SlowContext(make_context):
+            async def log(self, level: str, message: str, logger_name: str | None = None) -> None:
+                await asyncio.sleep(0.01)
+
+        async def body(executor):
+            states = await asyncio.gather(*(executor.execute(SlowContext(), "x = 1") for _ in range(5)))
+            # Sessions locked while over the limit are evicted by the next sweep
+            await executor.session_manager.enforce_limits()
+            return states, executor.session_manager.list_sessions()
+
+        states, live = run(_with_executor(ExecutorBackend.THREAD, 2, body, max_sessions=2))
+        assert all(state.error is None and state.variables == {"x": 1} for state in states)
+        assert len(live) == 2
+        # Evicted sessions did not leave their namespace behind
+        assert {state.session.session_id for state in states} & set(worker._namespaces) == set(live)
+
+    def test_process_backend_session_state_persists(self, make_context):
+        """Test that the process backend keeps session state in its worker."""
+
+        async def body(executor):
+            ctx = make_context()
+            first = await executor.execute(ctx, "import os\nx = 21")
+            second = await executor.execute(ctx, "y = x * 2", first.session.session_id)
+            third = await executor.execute(ctx, "z = os.getpid()", first.session.session_id)
+            return second, third
+
+        second, third = run(_with_executor(ExecutorBackend.PROCESS, 2, body))
+        assert second.variables["y"] == 42
+        assert third.variables["z"] != __import__("os").getpid()
+
+
+class TestExecutionLimits:
+    """Test cases for execution timeouts and resource limits."""
+
+    def test_thread_timeout_interrupts_loop(self, make_context):
+        """Test that a runaway loop is interrupted and the session stays usable."""
+
+        async def body(executor):
+            ctx = make_context()
+            session_id = (await executor.execute(ctx, "x = 1")).session.session_id
+            code = "while True:\n    try:\n        pass\n    except Exception:\n        pass"
+            stuck = await executor.execute(ctx, code, session_id, timeout=0.3)
+            after = await executor.execute(ctx, "y = x + 1", session_id)
+            return stuck, after
+
+        stuck, after = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert stuck.error is not None and stuck.error.kind == ErrorKind.TIMEOUT
+        assert after.error is None and after.variables["y"] == 2
+
+    def test_process_timeout_keeps_worker(self, make_context):
+        """Test that a worker process stops a timed out execution by itself."""
+
+        async def body(executor):
+            ctx = make_context()
+            session_id = (await executor.execute(ctx, "x = 1")).session.session_id
+            slept = await executor.execute(ctx, "import time\ntime.sleep(30)", session_id, timeout=0.3)
+            after = await executor.execute(ctx, "y = x + 1", session_id)
+            return slept, after
+
+        slept, after = run(_with_executor(ExecutorBackend.PROCESS, 1, body))
+        assert slept.error is not None and slept.error.kind == ErrorKind.TIMEOUT
+        assert after.variables["y"] == 2
+
+    def test_unresponsive_worker_is_recycled(self, make_context):
+        """Test that a worker ignoring its timeout is killed and replaced."""
+        code = "import signal\nsignal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})\nwhile True:\n    pass"
+
+        async def body(executor):
+            ctx = make_context()
+            session_id = (await executor.execute(ctx, "x = 1")).session.session_id
+            stuck = await executor.execute(ctx, code, session_id, timeout=0.3)
+            after = await executor.execute(ctx, "y = 2")
+            return session_id, stuck, executor.session_manager.list_sessions(), after
+
+        session_id, stuck, sessions, after = run(
+            _with_executor(ExecutorBackend.PROCESS, 1, body, worker_kill_grace_seconds=0.5)
+        )
+        assert stuck.error is not None and stuck.error.kind == ErrorKind.TIMEOUT
+        # The session went away with its worker; the replacement serves new sessions
+        assert session_id not in sessions
+        assert after.error is None and after.variables["y"] == 2
+
+    def test_cpu_limit(self, make_context):
+        """Test the per-execution CPU time limit of worker processes."""
+
+        async def body(executor):
+            ctx = make_context()
+            first = await executor.execute(ctx, "while True:\n    pass", timeout=30)
+            second = await executor.execute(ctx, "while True:\n    pass", timeout=30)
+            return first, second
+
+        first, second = run(_with_executor(ExecutorBackend.PROCESS, 1, body, execution_cpu_seconds=1))
+        assert first.error is not None and first.error.kind == ErrorKind.CPU_LIMIT
+        # The limit is granted again to every execution
+        assert second.error is not None and second.error.kind == ErrorKind.CPU_LIMIT
+
+    def test_memory_limit_recycles_worker(self, make_context):
+        """Test that exceeding the worker memory limit fails cleanly and recycles the worker."""
+
+        async def body(executor):
+            ctx = make_context()
+            big = await executor.execute(ctx, "block = bytearray(4 * 1024 ** 3)")
+            after = await executor.execute(ctx, "small = bytearray(1024)")
+            return big, after, executor.session_manager.list_sessions()
+
+        big, after, sessions = run(_with_executor(ExecutorBackend.PROCESS, 1, body, worker_memory_limit_mb=1024))
+        assert big.error is not None and big.error.kind == ErrorKind.MEMORY_LIMIT
+        assert big.session.session_id not in sessions
+        assert after.error is None
+
+
+class TestWarmPool:
+    """Test cases for preloaded and spare workers."""
+
+    def test_workers_preload_modules(self, make_context):
+        """Test that user code finds the preload modules already imported."""
+
+        async def body(executor):
+            return await executor.execute(make_context(), "import sys\nloaded = 'numpy' in sys.modules")
+
+        state = run(_with_executor(ExecutorBackend.PROCESS, 1, body, preload_modules=["numpy"]))
+        assert state.variables["loaded"] is True
+
+    def test_recycled_worker_is_replaced_by_spare(self, make_context):
+        """Test that a spare takes over a recycled worker and the spares are refilled."""
+
+        async def body(executor):
+            backend = executor.backend
+            spare_pid = backend._spares[0].process.pid
+            await executor.execute(make_context(), "block = bytearray(4 * 1024 ** 3)")
+            await asyncio.gather(*backend._refills)
+            return spare_pid, backend._processes[0].process.pid, len(backend._spares)
+
+        spare_pid, worker_pid, spares = run(
+            _with_executor(ExecutorBackend.PROCESS, 1, body, worker_memory_limit_mb=1024, worker_spares=1)
+        )
+        assert worker_pid == spare_pid
+        assert spares == 1
+
+
+class TestSessionStore:
+    """Test cases for spilling sessions to disk and restoring them."""
+
+    def _store_config(self, tmp_path, **config):
+        return {"session_store_dir": str(tmp_path / "sessions"), **config}
+
+    def test_evicted_session_is_restored(self, make_context, tmp_path):
+        """Test that a session evicted as least recently used comes back on its next run."""
+
+        async def body(executor):
+            ctx = make_context()
+            first = await executor.execute(ctx, "import numpy as np\ndata = np.arange(5)\nn = 41")
+            session_id = first.session.session_id
+            await executor.execute(ctx, "other = 1")
+            evicted = session_id not in executor.session_manager.list_sessions()
+            restored = await executor.execute(ctx, "n += 1\ntotal = int(data.sum())", session_id)
+            return evicted, restored
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            evicted, restored = run(_with_executor(backend, 1, body, **self._store_config(tmp_path, max_sessions=1)))
+            assert evicted
+            assert restored.error is None
+            assert restored.variables == {"n": 42, "total": 10}
+            assert restored.session.execution_count == 2
+
+    def test_run_during_spill_waits_for_the_snapshot(self, make_context, tmp_path):
+        """Test that a run arriving while its session is spilled adopts the snapshot once it is complete."""
+
+        async def body(executor):
+            ctx = make_context()
+            session_id = (await executor.execute(ctx, "x = 1")).session.session_id
+            await executor.execute(ctx, "other = 1")
+            backend = executor.backend
+            snapshot, release = backend.snapshot, backend.release
+
+            async def slow_snapshot(*args):
+                await asyncio.sleep(0.1)
+                return await snapshot(*args)
+
+            async def slow_release(*args):
+                await asyncio.sleep(0.1)
+                return await release(*args)
+
+            backend.snapshot, backend.release = slow_snapshot, slow_release
+            executor.session_manager.max_sessions = 1
+            _, during = await asyncio.gather(
+                executor.session_manager.enforce_limits(), executor.execute(ctx, "x += 1", session_id)
+            )
+            after = await executor.execute(ctx, "x += 1", session_id)
+            return during, after
+
+        during, after = run(_with_executor(ExecutorBackend.THREAD, 1, body, **self._store_config(tmp_path)))
+        assert during.error is None and during.variables == {"x": 2}
+        assert after.error is None and after.variables == {"x": 3}
+
+    def test_sessions_survive_restart(self, make_context, tmp_path):
+        """Test that live sessions are spilled on shutdown and restored by a new executor."""
+        config = self._store_config(tmp_path)
+
+        async def before(executor):
+            return (await executor.execute(make_context(), "x = 'kept'")).session.session_id
+
+        session_id = run(_with_executor(ExecutorBackend.PROCESS, 1, before, **config))
+
+        async def after(executor):
+            return await executor.execute(make_context(), "y = x.upper()", session_id)
+
+        state = run(_with_executor(ExecutorBackend.PROCESS, 1, after, **config))
+        assert state.variables["y"] == "KEPT"
+
+    def test_closing_spilled_session_deletes_snapshot(self, make_context, tmp_path):
+        """Test that close_session also removes a spilled session."""
+        config = self._store_config(tmp_path)
+
+        async def before(executor):
+            return (await executor.execute(make_context(), "x = 1")).session.session_id
+
+        session_id = run(_with_executor(ExecutorBackend.THREAD, 1, before, **config))
+
+        async def after(executor):
+            closed = await executor.close_session(make_context(), session_id)
+            return closed, executor.store.exists(session_id)
+
+        assert run(_with_executor(ExecutorBackend.THREAD, 1, after, **config)) == (True, False)
+
+
+class TestForkSession:
+    """Test cases for forking sessions."""
+
+    def test_forks_are_independent(self, make_context):
+        """Test that a fork starts from the state of its session and then diverges from it."""
+
+        async def body(executor):
+            ctx = make_context()
+            setup = "import numpy as np\ndata = np.arange(1000)\nitems = [1]\ndef total():\n    return int(data.sum())"
+            session_id = (await executor.execute(ctx, setup)).session.session_id
+            fork = await executor.fork_session(ctx, session_id)
+            in_fork = await executor.execute(ctx, "items.append(2)\ndata[:] = 0\nt = total()", fork.session_id)
+            in_source = await executor.execute(ctx, "n = len(items)\nt = total()", session_id)
+            closed = await executor.close_session(ctx, fork.session_id)
+            after_close = await executor.execute(ctx, "m = len(items)", session_id)
+            return in_fork, in_source, closed, after_close
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            in_fork, in_source, closed, after_close = run(_with_executor(backend, 1, body))
+            assert in_fork.variables["t"] == 0
+            assert in_source.variables == {"n": 1, "t": 499500}
+            assert closed
+            assert after_close.variables["m"] == 1
+
+    def test_fork_during_spill_copies_the_snapshot(self, make_context, tmp_path):
+        """Test that forking a session while it is spilled waits for the snapshot and copies its state."""
+
+        async def body(executor):
+            ctx = make_context()
+            session_id = (await executor.execute(ctx, "x = 1")).session.session_id
+            await executor.execute(ctx, "other = 1")
+            snapshot = executor.backend.snapshot
+
+            async def slow_snapshot(*args):
+                await asyncio.sleep(0.1)
+                return await snapshot(*args)
+
+            executor.backend.snapshot = slow_snapshot
+            executor.session_manager.max_sessions = 1
+            _, fork = await asyncio.gather(
+                executor.session_manager.enforce_limits(), executor.fork_session(ctx, session_id)
+            )
+            executor.session_manager.max_sessions = None
+            return await executor.execute(ctx, "y = x + 1", fork.session_id)
+
+        state = run(_with_executor(ExecutorBackend.THREAD, 1, body, session_store_dir=str(tmp_path / "sessions")))
+        assert state.error is None and state.variables == {"y": 2}
+
+    def test_process_fork_gets_its_own_worker(self, make_context):
+        """Test that a forked session runs in a dedicated worker process stopped on close."""
+
+        async def body(executor):
+            ctx = make_context()
+            pid = "import os\npid = os.getpid()"
+            session_id = (await executor.execute(ctx, pid)).session.session_id
+            fork = await executor.fork_session(ctx, session_id)
+            fork_pid = (await executor.execute(ctx, pid, fork.session_id)).variables["pid"]
+            source_pid = (await executor.execute(ctx, pid, session_id)).variables["pid"]
+            process = executor.backend._processes[executor.backend._affinity[fork.session_id]].process
+            await executor.close_session(ctx, fork.session_id)
+            return fork_pid, source_pid, process
+
+        fork_pid, source_pid, process = run(_with_executor(ExecutorBackend.PROCESS, 1, body))
+        assert fork_pid != source_pid
+        assert not process.is_alive()
+
+
+class TestExecuteBatch:
+    """Test cases for batch execution."""
+
+    def test_batch_order_and_isolation(self, make_context):
+        """Test that items of a session run in order and unknown sessions fail alone."""
+
+        async def body(executor):
+            ctx = make_context()
+            session_id = (await executor.execute(ctx, "x = 0")).session.session_id
+            items = [
+                BatchItem(code="x += 1", session_id=session_id),
+                BatchItem(code="y = 'new'"),
+                BatchItem(code="x *= 10", session_id=session_id),
+                BatchItem(code="z = 1", session_id="missing"),
+            ]
+            streamed = []
+
+            async def on_result(result):
+                streamed.append(result.index)
+
+            results = await executor.execute_batch(ctx, items, on_result=on_result)
+            return session_id, results, streamed
+
+        session_id, results, streamed = run(_with_executor(ExecutorBackend.PROCESS, 2, body))
+        assert [result.index for result in results] == [0, 1, 2, 3]
+        assert results[0].state.variables["x"] == 1
+        assert results[2].state.variables["x"] == 10
+        assert results[1].state.session.session_id != session_id
+        assert results[3].state is None and "missing" in results[3].error.message
+        assert sorted(streamed) == [0, 1, 2, 3]
+        assert streamed.index(0) < streamed.index(2)
+
+    def test_failing_group_does_not_abort_the_batch(self, make_context):
+        """Test that an error escaping one session's items is reported per item while other groups complete."""
+
+        async def body(executor):
+            ctx = make_context()
+            broken = (await executor.execute(ctx, "x = 0")).session.session_id
+            healthy = (await executor.execute(ctx, "x = 0")).session.session_id
+            execute = executor.backend.execute
+
+            async def failing_execute(session_id, *args, **kwargs):
+                if session_id == broken:
+                    raise ConnectionResetError("worker connection reset")
+                await asyncio.sleep(0.05)
+                return await execute(session_id, *args, **kwargs)
+
+            executor.backend.execute = failing_execute
+            items = [BatchItem(code="x += 1", session_id=broken), BatchItem(code="x += 1", session_id=healthy)]
+            return await executor.execute_batch(ctx, items)
+
+        results = run(_with_executor(ExecutorBackend.THREAD, 2, body))
+        assert [result.index for result in results] == [0, 1]
+        assert results[0].failed
+        assert results[1].state.error is None and results[1].state.variables == {"x": 1}
+
+    def test_sessions_run_in_parallel(self, make_context):
+        """Test that items of different sessions run concurrently."""
+
+        async def body(executor):
+            items = [BatchItem(code="import time\ntime.sleep(0.5)") for _ in range(4)]
+            start = time.perf_counter()
+            results = await executor.execute_batch(make_context(), items)
+            return results, time.perf_counter() - start
+
+        results, elapsed = run(_with_executor(ExecutorBackend.THREAD, 4, body))
+        assert not any(result.failed for result in results)
+        assert elapsed < 1.5
+
+
+class TestArrayResources:
+    """Test cases for large arrays served as resources."""
+
+    def test_large_arrays_are_referenced(self, make_context):
+        """Test that large arrays are reported by URI and read back losslessly."""
+
+        async def body(executor):
+            ctx = make_context()
+            state = await executor.execute(ctx, "import numpy as np\nbig = np.arange(100_000, dtype=np.float32)\nsmall = np.arange(3)")
+            data = await executor.read_array(ctx, state.session.session_id, "big")
+            try:
+                await executor.read_array(ctx, state.session.session_id, "np")
+            except WorkerError as e:
+                not_array = str(e)
+            return state, data, not_array
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            state, data, not_array = run(_with_executor(backend, 1, body, array_resource_min_bytes=1024))
+            big = state.variables["big"]
+            assert big["resource"] == f"synx://sessions/{state.session.session_id}/arrays/big"
+            assert (big["shape"], big["dtype"]) == ([100_000], "float32")
+            assert "resource" not in state.variables["small"]
+            array = np.load(io.BytesIO(data))
+            assert array.dtype == np.float32 and array[-1] == 99_999
+            assert "not a NumPy array" in not_array
+
+    def test_arrays_of_spilled_sessions_are_read(self, make_context, tmp_path):
+        """Test that reading an array of a spilled session restores the session first."""
+
+        async def body(executor):
+            ctx = make_context()
+            session_id = (await executor.execute(ctx, "import numpy as np\nbig = np.arange(10_000)")).session.session_id
+            await executor.execute(ctx, "other = 1")
+            spilled = session_id not in executor.session_manager.list_sessions()
+            return spilled, await executor.read_array(ctx, session_id, "big")
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            config = {"session_store_dir": str(tmp_path / backend.value), "max_sessions": 1}
+            spilled, data = run(_with_executor(backend, 1, body, **config))
+            assert spilled
+            assert np.load(io.BytesIO(data))[-1] == 9_999
+
+
+class TestBlobs:
+    """Test cases for uploading blobs and binding them into sessions."""
+
+    def test_npy_blob_is_shared_copy_on_write(self, make_context, tmp_path):
+        """Test that sessions bound to the same .npy blob share it without seeing each other's writes."""
+        buffer = io.BytesIO()
+        np.save(buffer, np.arange(1000, dtype=np.int64))
+
+        async def body(executor):
+            ctx = make_context()
+            info = await executor.upload_blob(ctx, buffer.getvalue())
+            first = await executor.bind_blob(ctx, info.blob_id, "data")
+            second = await executor.bind_blob(ctx, info.blob_id, "data")
+            written = await executor.execute(ctx, "data[0] = -1\ntotal = int(data.sum())", first.session_id)
+            untouched = await executor.execute(ctx, "total = int(data.sum())\nmapped = type(data).__name__", second.session_id)
+            return info, written, untouched
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            info, written, untouched = run(_with_executor(backend, 2, body, blob_dir=str(tmp_path)))
+            assert info.npy and info.size > 8000
+            assert written.variables["total"] == 499500 - 1
+            assert "data" not in written.variables
+            assert untouched.variables == {"total": 499500, "mapped": "memmap"}
+
+    def test_raw_blobs(self, make_context, tmp_path):
+        """Test binding a raw blob as a memoryview or as a typed array."""
+        raw = np.arange(6, dtype=np.float32).tobytes()
+
+        async def body(executor):
+            ctx = make_context()
+            info = await executor.upload_blob(ctx, raw)
+            again = await executor.upload_blob(ctx, raw)
+            session = await executor.bind_blob(ctx, info.blob_id, "view")
+            await executor.bind_blob(ctx, info.blob_id, "arr", session.session_id, dtype="float32", shape=[2, 3])
+            state = await executor.execute(ctx, "n = len(view)\nshape = arr.shape\nlast = float(arr[1, 2])", session.session_id)
+            try:
+                await executor.bind_blob(ctx, "0" * 64, "missing", session.session_id)
+            except KeyError:
+                missing = True
+            return info, again, state, missing
+
+        info, again, state, missing = run(_with_executor(ExecutorBackend.PROCESS, 1, body, blob_dir=str(tmp_path)))
+        assert again == info and not info.npy
+        assert len(list(tmp_path.iterdir())) == 1
+        assert state.variables == {"n": 24, "shape": [2, 3], "last": 5.0}
+        assert missing
+
+
+class TestExecutionTimings:
+    """Test cases for per-execution timings and profiling."""
+
+    def test_phases_are_timed(self, make_context):
+        """Test the timing breakdown and the peak memory growth of an execution."""
+
+        async def body(executor):
+            return await executor.execute(make_context(), "import time\ntime.sleep(0.05)\nblock = bytearray(64 * 1024 * 1024)")
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            state = run(_with_executor(backend, 1, body))
+            timings = state.timings
+            assert timings.exec_ms >= 50
+            assert timings.total_ms >= timings.exec_ms + timings.compile_ms + timings.serialize_ms
+            assert min(timings.session_ms, timings.lock_wait_ms, timings.queue_ms, timings.capture_ms) >= 0
+            assert state.profile is None
+            if backend == ExecutorBackend.PROCESS:
+                assert state.peak_memory_delta_bytes >= 32 * 1024 * 1024
+            else:
+                assert state.peak_memory_delta_bytes is None
+
+    def test_profile_reports_hotspots(self, make_context):
+        """Test that profiled executions report the functions of the user code."""
+        code = "def hot():\n    return sum(i * i for i in range(200_000))\n\nfor _ in range(3):\n    hot()"
+
+        async def body(executor):
+            return await executor.execute(make_context(), code, profile=True)
+
+        state = run(_with_executor(ExecutorBackend.PROCESS, 1, body))
+        hot = next(entry for entry in state.profile if entry.function.endswith("(hot)"))
+        assert hot.calls == 3
+        assert hot.cumulative_ms >= hot.self_ms > 0
+        assert len(state.profile) <= 20
+
+
+class TestTopLevelAwait:
+    """Test cases for code using top-level await."""
+
+    def test_awaits_overlap(self, make_context):
+        """Test that awaited sleeps run concurrently and bind session variables."""
+        code = (
+            "import asyncio\n"
+            "async def fetch(i):\n"
+            "    await asyncio.sleep(0.2)\n"
+            "    return i\n"
+            "results = await asyncio.gather(*(fetch(i) for i in range(10)))"
+        )
+
+        async def body(executor):
+            ctx = make_context()
+            state = await executor.execute(ctx, code)
+            after = await executor.execute(ctx, "total = sum(results)", state.session.session_id)
+            return state, after
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            state, after = run(_with_executor(backend, 1, body))
+            assert state.error is None
+            assert state.variables["results"] == list(range(10))
+            assert state.timings.exec_ms < 1000
+            assert after.variables["total"] == 45
+
+    def test_tasks_outlive_the_execution(self, make_context):
+        """Test that a task left running continues on the session loop in later executions."""
+
+        async def body(executor):
+            ctx = make_context()
+            code = "import asyncio\nticks = []\nasync def tick():\n    while True:\n        ticks.append(1)\n        await asyncio.sleep(0.01)\ntask = asyncio.create_task(tick())\nawait asyncio.sleep(0)"
+            session_id = (await executor.execute(ctx, code)).session.session_id
+            return await executor.execute(ctx, "await asyncio.sleep(0.1)\ncount = len(ticks)", session_id)
+
+        state = run(_with_executor(ExecutorBackend.THREAD, 1, body))
+        assert state.variables["count"] > 3
+
+    def test_timeout_cancels_the_coroutine(self, make_context):
+        """Test that a timed out coroutine is interrupted and the session stays usable."""
+
+        async def body(executor):
+            ctx = make_context()
+            session_id = (await executor.execute(ctx, "x = 1")).session.session_id
+            slept = await executor.execute(ctx, "import asyncio\nawait asyncio.sleep(30)", session_id, timeout=0.3)
+            after = await executor.execute(ctx, "await asyncio.sleep(0)\ny = x + 1", session_id)
+            return slept, after
+
+        for backend in (ExecutorBackend.THREAD, ExecutorBackend.PROCESS):
+            slept, after = run(_with_executor(backend, 1, body))
+            assert slept.error is not None and slept.error.kind == ErrorKind.TIMEOUT
+            assert after.error is None and after.variables["y"] == 2
+
+    def test_stuck_thread_releases_its_session_loop(self, make_context):
+        """Test that recycling a stuck worker thread drops a session that has an event loop."""
+
+        async def body(executor):
+            ctx = make_context()
+            session_id = (await executor.execute(ctx, "import asyncio\nawait asyncio.sleep(0)")).session.session_id
+            stuck = await executor.execute(ctx, "import time\ntime.sleep(1)", session_id, timeout=0.2)
+            return session_id, stuck, executor.session_manager.list_sessions(), executor.backend._affinity
+
+        session_id, stuck, live, affinity = run(
+            _with_executor(ExecutorBackend.THREAD, 1, body, worker_kill_grace_seconds=0.1)
+        )
+        assert stuck.error is not None and stuck.error.kind == ErrorKind.TIMEOUT
+        assert session_id not in live and session_id not in affinity
+        assert session_id not in worker._loops
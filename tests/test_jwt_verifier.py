@@ -0,0 +1,149 @@
+"""Tests for local JWT access token validation."""
+
+import asyncio
+import time
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from synx.auth.jwt_verifier import JWTTokenVerifier
+
+RESOURCE = "http://localhost:10000/mcp"
+
+
+class StandInJWKSServer:
+    """Local stand-in for the authorization server JWKS endpoint."""
+
+    def __init__(self):
+        self.calls = 0
+        self.private_keys: dict[str, rsa.RSAPrivateKey] = {}
+        self.rotate("key-1")
+        self.app = Starlette(routes=[Route("/jwks", self.jwks)])
+
+    def rotate(self, kid: str) -> None:
+        self.private_keys[kid] = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    async def jwks(self, request: Request) -> JSONResponse:
+        self.calls += 1
+        keys = []
+        for kid, private_key in self.private_keys.items():
+            jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+            keys.append({**jwk, "kid": kid, "alg": "RS256", "use": "sig"})
+        return JSONResponse({"keys": keys})
+
+    def token(self, kid: str = "key-1", **claims) -> str:
+        payload = {"sub": "user", "client_id": "client", "scope": "user", "aud": RESOURCE, "exp": int(time.time()) + 60}
+        payload.update(claims)
+        return jwt.encode(payload, self.private_keys[kid], algorithm="RS256", headers={"kid": kid})
+
+    def verifier(self) -> JWTTokenVerifier:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        return JWTTokenVerifier(
+            jwks_uri="http://localhost:9000/jwks",
+            server_url=RESOURCE,
+            jwks_refresh_interval_seconds=0,
+            http_client=client,
+        )
+
+
+class TestJWTTokenVerifier:
+    """Test cases for JWTTokenVerifier."""
+
+    def test_valid_tokens_need_one_jwks_fetch(self):
+        """Test that the JWKS is fetched once and tokens validated locally."""
+        server = StandInJWKSServer()
+
+        async def body():
+            verifier = server.verifier()
+            results = [await verifier.verify_token(server.token()) for _ in range(3)]
+            await verifier.aclose()
+            return results
+
+        results = asyncio.run(body())
+        assert all(result is not None for result in results)
+        assert results[0].client_id == "client"
+        assert results[0].scopes == ["user"]
+        assert results[0].resource == RESOURCE
+        assert server.calls == 1
+
+    def test_unknown_kid_refreshes_jwks(self):
+        """Test that rotated keys are picked up on a key id miss."""
+        server = StandInJWKSServer()
+
+        async def body():
+            verifier = server.verifier()
+            first = await verifier.verify_token(server.token())
+            server.rotate("key-2")
+            second = await verifier.verify_token(server.token(kid="key-2"))
+            await verifier.aclose()
+            return first, second
+
+        first, second = asyncio.run(body())
+        assert first is not None and second is not None
+        assert server.calls == 2
+
+    def test_failed_jwks_fetch_is_retried_soon(self):
+        """Test that a failed JWKS fetch does not block refreshes for the whole refresh interval."""
+        server = StandInJWKSServer()
+        jwks = server.jwks
+
+        async def flaky_jwks(request: Request) -> JSONResponse:
+            # The first fetch fails
+            if server.calls == 0:
+                server.calls += 1
+                return JSONResponse({"error": "unavailable"}, status_code=503)
+            return await jwks(request)
+
+        server.app = Starlette(routes=[Route("/jwks", flaky_jwks)])
+
+        async def body():
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app))
+            verifier = JWTTokenVerifier(
+                jwks_uri="http://localhost:9000/jwks",
+                server_url=RESOURCE,
+                jwks_refresh_interval_seconds=3600,
+                jwks_retry_interval_seconds=0,
+                http_client=client,
+            )
+            first = await verifier.verify_token(server.token())
+            second = await verifier.verify_token(server.token())
+            await verifier.aclose()
+            return first, second
+
+        first, second = asyncio.run(body())
+        assert first is None and second is not None
+        assert server.calls == 2
+
+    def test_audience_is_checked(self):
+        """Test RFC 8707 audience validation."""
+        server = StandInJWKSServer()
+
+        async def body():
+            verifier = server.verifier()
+            wrong = await verifier.verify_token(server.token(aud="http://localhost:10001/mcp"))
+            parent = await verifier.verify_token(server.token(aud=["other", "http://localhost:10000/"]))
+            await verifier.aclose()
+            return wrong, parent
+
+        wrong, parent = asyncio.run(body())
+        assert wrong is None
+        assert parent is not None
+
+    def test_expired_and_tampered_tokens_are_rejected(self):
+        """Test that signature and expiry are enforced."""
+        server = StandInJWKSServer()
+
+        async def body():
+            verifier = server.verifier()
+            expired = await verifier.verify_token(server.token(exp=int(time.time()) - 60))
+            tampered = await verifier.verify_token(server.token()[:-4] + "AAAA")
+            await verifier.aclose()
+            return expired, tampered
+
+        assert asyncio.run(body()) == (None, None)
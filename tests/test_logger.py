@@ -0,0 +1,69 @@
+"""Tests for the logging helpers."""
+
+import asyncio
+import json
+
+from synx.config import LogLevel, LogSink
+from synx.logger import (
+    LogConfig,
+    get_logger,
+    is_enabled,
+    log_to_client,
+    setup_logger,
+    truncate,
+)
+
+
+class TestLazyLogging:
+    """Test cases for level-gated, truncated logging."""
+
+    def teardown_method(self):
+        """Restore the default logger configuration."""
+        setup_logger()
+
+    def test_is_enabled(self):
+        """Test level gating against the configured level."""
+        setup_logger(LogConfig(level=LogLevel.INFO))
+        assert is_enabled("info")
+        assert is_enabled("ERROR")
+        assert not is_enabled("debug")
+
+    def test_truncate(self):
+        """Test that payloads are cut to the configured limit."""
+        setup_logger(LogConfig(payload_limit=5))
+        assert truncate("abc") == "abc"
+        assert truncate("abcdefgh") == "abcde... [3 more chars]"
+        assert truncate("abcdefgh", limit=7) == "abcdefg... [1 more chars]"
+
+    def test_disabled_messages_are_never_built(self, make_context):
+        """Test that lazy messages cost nothing below the configured level."""
+        setup_logger(LogConfig(level=LogLevel.INFO))
+        ctx = make_context()
+        built: list[str] = []
+
+        def build() -> str:
+            built.append("built")
+            return "payload"
+
+        asyncio.run(log_to_client(ctx, "debug", build))
+        asyncio.run(log_to_client(ctx, "info", build))
+        assert built == ["built"]
+        assert ctx.messages == [("info", "payload")]
+
+    def test_json_file_sink(self, tmp_path):
+        """Test compact JSON records written by a background file sink."""
+        log_file = tmp_path / "synx.log"
+        setup_logger(LogConfig(sink=LogSink.FILE, file_path=str(log_file), json_format=True, enqueue=True))
+        logger = get_logger()
+        logger.bind(session_id="abc").info("hello {}", "world")
+        try:
+            _ = 1 / 0
+        except ZeroDivisionError:
+            logger.exception("failed")
+        logger.complete()
+
+        records = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert records[0]["message"] == "hello world"
+        assert records[0]["level"] == "INFO"
+        assert records[0]["extra"] == {"session_id": "abc"}
+        assert records[1]["exception"] == "ZeroDivisionError: division by zero"
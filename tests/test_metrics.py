@@ -0,0 +1,52 @@
+"""Tests for the in-process metrics and their endpoint."""
+
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from synx.mcp_server import metrics
+from synx.metrics import REGISTRY, MetricsRegistry
+
+
+class TestMetrics:
+    """Test cases for metrics rendering."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test the Prometheus rendering of a labelled histogram."""
+        histogram = MetricsRegistry().histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, tool="run")
+
+        lines = histogram.render().splitlines()
+        assert lines[1] == "# TYPE latency_seconds histogram"
+        assert lines[2:] == [
+            'latency_seconds_bucket{tool="run",le="0.1"} 2',
+            'latency_seconds_bucket{tool="run",le="1"} 3',
+            'latency_seconds_bucket{tool="run",le="+Inf"} 4',
+            'latency_seconds_sum{tool="run"} 3.65',
+            'latency_seconds_count{tool="run"} 4',
+        ]
+        assert histogram.count(tool="run") == 4
+
+    def test_large_counts_stay_exact(self):
+        """Test that counter values are not rendered in exponent notation."""
+        counter = MetricsRegistry().counter("events_total", "Events")
+        counter.inc(12345678)
+        assert counter.render().splitlines()[-1] == "events_total 12345678"
+
+    def test_metrics_endpoint(self):
+        """Test that the endpoint serves the process registry as scrapable text."""
+        REGISTRY.counter("synx_test_endpoint_total", "Endpoint test").inc()
+        app = Starlette(routes=[Route("/metrics", metrics)])
+
+        async def scrape():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await client.get("/metrics")
+
+        response = asyncio.run(scrape())
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "synx_test_endpoint_total 1" in response.text
+        assert "# TYPE synx_execution_duration_seconds histogram" in response.text
@@ -0,0 +1,47 @@
+"""Tests for session-to-worker routing."""
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+from synx.backends import ThreadPoolBackend
+from synx.routing import HashRing
+
+KEYS = [f"session-{i}" for i in range(4000)]
+
+
+class TestHashRing:
+    """Test cases for consistent hashing."""
+
+    def test_keys_are_stable_and_spread(self):
+        """Test that a key always maps to the same node and nodes get similar shares."""
+        ring = HashRing(range(4))
+        assert [ring.node_for(key) for key in KEYS] == [HashRing(range(4)).node_for(key) for key in KEYS]
+        shares = Counter(ring.node_for(key) for key in KEYS)
+        assert set(shares) == {0, 1, 2, 3}
+        assert min(shares.values()) > len(KEYS) / 4 * 0.6
+
+    def test_empty_ring(self):
+        """Test that an empty ring cannot route keys."""
+        with pytest.raises(LookupError):
+            HashRing([]).node_for("session")
+
+
+class TestBackendRouting:
+    """Test cases for session ids minted by the backend."""
+
+    def test_new_sessions_balance_workers(self):
+        """Test that minted ids hash onto the least loaded worker and are pinned there."""
+
+        async def body():
+            backend = ThreadPoolBackend(3)
+            try:
+                workers = [backend.assign(backend.new_session_id()) for _ in range(9)]
+                assert Counter(workers) == {0: 3, 1: 3, 2: 3}
+                session_id = backend.new_session_id()
+                assert backend.assign(session_id) == backend._ring.node_for(session_id)
+            finally:
+                await backend.shutdown()
+
+        asyncio.run(body())
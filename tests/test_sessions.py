@@ -0,0 +1,123 @@
+"""Tests for session management and eviction."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from synx.sessions import SESSIONS_EVICTED, EvictionReason, SessionManager
+
+
+class TestSessionManager:
+    """Test cases for SessionManager eviction."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.evicted: list[tuple[str, EvictionReason]] = []
+
+    async def _on_evict(self, session, reason):
+        self.evicted.append((session.session_id, reason))
+
+    def test_lru_eviction(self, make_context):
+        """Test that the least recently used session goes first."""
+
+        async def body():
+            manager = SessionManager(max_sessions=2, on_evict=self._on_evict)
+            ctx = make_context()
+            first = await manager.get_or_create_session(ctx)
+            second = await manager.get_or_create_session(ctx)
+            await manager.get_or_create_session(ctx, first.session_id)
+            await manager.get_or_create_session(ctx)
+            return manager, first, second
+
+        before = SESSIONS_EVICTED.value(reason="lru")
+        manager, first, second = asyncio.run(body())
+        assert self.evicted == [(second.session_id, EvictionReason.LRU)]
+        assert first.session_id in manager.list_sessions()
+        assert len(manager.list_sessions()) == 2
+        assert SESSIONS_EVICTED.value(reason="lru") == before + 1
+
+    def test_ttl_eviction(self, make_context):
+        """Test that idle sessions expire."""
+
+        async def body():
+            manager = SessionManager(ttl_seconds=60, on_evict=self._on_evict)
+            ctx = make_context()
+            stale = await manager.get_or_create_session(ctx)
+            fresh = await manager.get_or_create_session(ctx)
+            stale.last_used_at = datetime.now() - timedelta(seconds=120)
+            return await manager.enforce_limits(), stale, fresh
+
+        evicted, stale, fresh = asyncio.run(body())
+        assert evicted == [stale.session_id]
+        assert self.evicted == [(stale.session_id, EvictionReason.TTL)]
+
+    def test_memory_budget_eviction(self, make_context):
+        """Test that sessions are evicted until the memory budget is met."""
+
+        async def body():
+            manager = SessionManager(memory_budget_bytes=1000, on_evict=self._on_evict)
+            ctx = make_context()
+            sessions = [await manager.get_or_create_session(ctx) for _ in range(3)]
+            for session in sessions:
+                manager.record_execution(session.session_id, 400)
+            return await manager.enforce_limits(), sessions
+
+        evicted, sessions = asyncio.run(body())
+        assert evicted == [sessions[0].session_id]
+        assert self.evicted == [(sessions[0].session_id, EvictionReason.MEMORY)]
+
+    def test_busy_sessions_are_not_evicted(self, make_context):
+        """Test that a session executing code survives eviction."""
+
+        async def body():
+            manager = SessionManager(ttl_seconds=60, on_evict=self._on_evict)
+            session = await manager.get_or_create_session(make_context())
+            session.last_used_at = datetime.now() - timedelta(seconds=120)
+            async with session.lock:
+                return await manager.enforce_limits()
+
+        assert asyncio.run(body()) == []
+
+    def test_delete_session(self, make_context):
+        """Test closing a session explicitly."""
+
+        async def body():
+            manager = SessionManager(on_evict=self._on_evict)
+            session = await manager.get_or_create_session(make_context())
+            return session, await manager.delete_session(session.session_id), await manager.delete_session("missing")
+
+        session, deleted, missing = asyncio.run(body())
+        assert deleted is True
+        assert missing is False
+        assert self.evicted == [(session.session_id, EvictionReason.CLOSED)]
+
+    def test_client_logging_holds_no_lock(self):
+        """Test that notifications to the client are sent without holding a shard lock."""
+        manager = SessionManager()
+        held: list[bool] = []
+
+        class CheckingContext:
+            async def log(self, level: str, message: str, **kwargs) -> None:
+                held.append(any(shard.lock.locked() for shard in manager._shards))
+
+        async def body():
+            session = await manager.get_or_create_session(CheckingContext())
+            await manager.get_or_create_session(CheckingContext(), session.session_id)
+
+        asyncio.run(body())
+        assert held and not any(held)
+
+    def test_lru_is_global_across_shards(self, make_context):
+        """Test that eviction keeps the most recently used sessions whatever shard they live in."""
+
+        async def body():
+            manager = SessionManager(max_sessions=100, shards=8, on_evict=self._on_evict)
+            ctx = make_context()
+            sessions = [await manager.get_or_create_session(ctx) for _ in range(100)]
+            manager.record_execution(sessions[0].session_id, 10)
+            sessions += [await manager.get_or_create_session(ctx) for _ in range(50)]
+            return manager, sessions
+
+        manager, sessions = asyncio.run(body())
+        assert set(manager.list_sessions()) == {s.session_id for s in [sessions[0], *sessions[51:]]}
+        assert self.evicted == [(s.session_id, EvictionReason.LRU) for s in sessions[1:51]]
+        assert manager.memory_bytes == 10
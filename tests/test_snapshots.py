@@ -0,0 +1,54 @@
+"""Tests for on-disk namespace snapshots."""
+
+import threading
+
+import numpy as np
+
+from synx import worker
+from synx.snapshots import dump_namespace, load_namespace
+
+
+class TestSnapshots:
+    """Test cases for dump_namespace and load_namespace."""
+
+    def test_roundtrip(self, tmp_path):
+        """Test that variables, shared objects and modules survive a snapshot."""
+        shared = [1, 2, 3]
+        namespace = {"__name__": "__main__", "a": shared, "b": shared, "text": "hi", "np": np}
+        assert dump_namespace(namespace, tmp_path / "s") == []
+        values = load_namespace(tmp_path / "s")
+        assert values["a"] == [1, 2, 3]
+        assert values["a"] is values["b"]
+        assert values["np"] is np
+        assert "__name__" not in values
+
+    def test_arrays_are_memory_mapped(self, tmp_path):
+        """Test the NumPy fast path and that loaded arrays are copy-on-write."""
+        dump_namespace({"arr": np.arange(10)}, tmp_path / "s")
+        arr = load_namespace(tmp_path / "s")["arr"]
+        assert isinstance(arr, np.memmap)
+        arr[0] = 100
+        assert load_namespace(tmp_path / "s")["arr"][0] == 0
+
+    def test_unpicklable_variables_are_skipped(self, tmp_path):
+        """Test that one unpicklable variable does not prevent the snapshot."""
+        skipped = dump_namespace({"lock": threading.Lock(), "x": 1}, tmp_path / "s")
+        assert skipped == ["lock"]
+        assert load_namespace(tmp_path / "s") == {"x": 1}
+
+    def test_snapshot_replaces_previous_one(self, tmp_path):
+        """Test that writing a snapshot again replaces the old content."""
+        dump_namespace({"x": 1, "arr": np.zeros(2)}, tmp_path / "s")
+        dump_namespace({"y": 2}, tmp_path / "s")
+        assert load_namespace(tmp_path / "s") == {"y": 2}
+
+    def test_restored_functions_use_the_live_namespace(self, tmp_path):
+        """Test that functions defined by user code see later bindings after a restore."""
+        worker.execute("snapshot-functions", "factor = 2\ndef scale(v):\n    return v * factor")
+        worker.snapshot("snapshot-functions", str(tmp_path / "s"))
+        worker.release("snapshot-functions")
+
+        worker.restore("snapshot-functions", str(tmp_path / "s"))
+        result = worker.execute("snapshot-functions", "factor = 3\nout = scale(2)")
+        worker.release("snapshot-functions")
+        assert result.variables["out"] == 6
@@ -0,0 +1,54 @@
+"""Import-time budget of the CLI and the server modules."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Cumulative import time allowed for synx.main, generous enough for slow CI machines
+MAIN_IMPORT_BUDGET_MS = 400
+
+
+def _import_times(*args: str) -> dict[str, int]:
+    """Run Python with -X importtime and return the cumulative import time of every module, in microseconds."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC_DIR), os.getenv("PYTHONPATH")]))}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], env=env, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup:
+    """Test cases for lazy imports."""
+
+    def test_version_skips_heavy_imports(self):
+        """Test that `synx version` loads neither the server, HTTP, auth nor NumPy stacks."""
+        times = _import_times("-m", "synx", "version")
+        heavy = {"numpy", "matplotlib", "mcp", "httpx", "uvicorn", "starlette", "jwt", "pydantic_settings"}
+        assert heavy.isdisjoint(times)
+        assert not any(module.startswith(("synx.mcp_server", "synx.code_executor", "synx.auth")) for module in times)
+        assert times["synx.main"] < MAIN_IMPORT_BUDGET_MS * 1000
+
+    def test_server_skips_numpy_and_auth(self):
+        """Test that the server module loads NumPy and the token verifiers only when needed."""
+        times = _import_times("-c", "import synx.mcp_server")
+        assert {"numpy", "matplotlib", "jwt", "synx.auth.jwt_verifier", "synx.auth.token_verifier"}.isdisjoint(times)
+
+    def test_stdio_preloads_nothing_by_default(self):
+        """Test that workers preload modules under stdio only when WORKER_PRELOAD asks for them."""
+        env = {key: value for key, value in os.environ.items() if key not in ("TRANSPORT", "WORKER_PRELOAD")}
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), os.getenv("PYTHONPATH")]))
+        code = "from synx.config import AppConfig; print(','.join(AppConfig().preload_modules))"
+        for extra, expected in [({}, ""), ({"WORKER_PRELOAD": "numpy"}, "numpy")]:
+            completed = subprocess.run(
+                [sys.executable, "-c", code], env={**env, **extra}, capture_output=True, text=True, check=True
+            )
+            assert completed.stdout.strip() == expected
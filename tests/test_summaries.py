@@ -0,0 +1,96 @@
+"""Tests for bounded variable summaries."""
+
+import json
+
+import numpy as np
+
+from synx.summaries import register_summarizer, summarize
+
+
+class TestSummarize:
+    """Test cases for summarize."""
+
+    def test_small_values_are_returned_unchanged(self):
+        """Test that small JSON-compatible values pass through."""
+        assert summarize(4, 100) == 4
+        assert summarize("abc", 100) == "abc"
+        assert summarize([1, 2, 3], 100) == [1, 2, 3]
+        assert summarize({"a": (1, 2)}, 100) == {"a": [1, 2]}
+
+    def test_large_list_is_truncated(self):
+        """Test that a large list becomes a bounded summary."""
+        summary = summarize(list(range(1_000_000)), 200)
+        assert summary["type"] == "list"
+        assert summary["len"] == 1_000_000
+        assert summary["truncated"] is True
+        assert len(json.dumps(summary)) < 400
+
+    def test_large_string_is_truncated(self):
+        """Test that long strings are cut at the budget."""
+        assert summarize("x" * 10_000, 10) == "x" * 10 + "..."
+
+    def test_ndarray_summary(self):
+        """Test that arrays report shape and dtype with a short preview."""
+        summary = summarize(np.zeros((1000, 1000), dtype=np.float32), 256)
+        assert summary["type"] == "ndarray"
+        assert summary["shape"] == [1000, 1000]
+        assert summary["dtype"] == "float32"
+        assert summary["nbytes"] == 4_000_000
+        assert len(summary["preview"]) <= 259
+
+    def test_bytes_summary(self):
+        """Test that binary data is summarized by length and prefix."""
+        summary = summarize(b"\x00" * 100_000, 64)
+        assert summary["type"] == "bytes"
+        assert summary["len"] == 100_000
+        assert len(summary["preview"]) <= 67
+
+    def test_sized_objects_report_len(self):
+        """Test the fallback for objects with __len__."""
+        summary = summarize(set(range(10_000)), 50)
+        assert summary["type"] == "set"
+        assert summary["len"] == 10_000
+
+    def test_long_keys_count_against_the_budget(self):
+        """Test that mapping keys are truncated and charged like string values."""
+        summary = summarize({"x" * 100_000: 1, "y": 2}, 1024)
+        assert len(json.dumps(summary)) < 2048
+
+    def test_colliding_keys_are_kept_apart(self):
+        """Test that keys rendering to the same string are all reported."""
+        assert summarize({1: "a", "1": "b"}, 1024) == {"1": "a", "1 #2": "b"}
+        assert summarize({(1, 2): "a", "k": "b"}, 1024) == {"(1, 2)": "a", "k": "b"}
+
+    def test_register_summarizer(self):
+        """Test registering a summarizer for a custom type."""
+
+        class Point:
+            pass
+
+        register_summarizer(Point, lambda value, budget: "point")
+        assert summarize(Point(), 10) == "point"
+
+    def test_cycles_and_deep_nesting_are_cut(self):
+        """Test that self-referencing and deeply nested containers do not recurse without bound."""
+        cycle: list = [1]
+        cycle.append(cycle)
+        summary = summarize(cycle, 100)
+        assert summary[0] == 1 and summary[1].startswith("[1, [1, ")
+
+        deep: list = []
+        for _ in range(10_000):
+            deep = [deep]
+        assert len(json.dumps(summarize(deep, 1000))) < 2000
+
+        shared = [1, 2]
+        assert summarize([shared, shared], 100) == [[1, 2], [1, 2]]
+
+    def test_failing_summarizer_falls_back_to_repr(self):
+        """Test that a value whose summarizer raises is reported by its repr."""
+
+        class Broken:
+            def __repr__(self):
+                return "Broken()"
+
+        register_summarizer(Broken, lambda value, budget: 1 / 0)
+        assert summarize({"ok": 1, "bad": Broken()}, 100) == {"ok": 1, "bad": "Broken()"}
@@ -0,0 +1,139 @@
+"""Tests for the token introspection verifier."""
+
+import asyncio
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from synx.auth.token_verifier import SimpleTokenVerifier
+
+
+class StandInIntrospectionServer:
+    """Local stand-in for the authorization server introspection endpoint."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self.tokens = {
+            "good": {"active": True, "client_id": "client", "scope": "user", "exp": int(time.time()) + 3600},
+            "expiring": {"active": True, "client_id": "client", "scope": "user", "exp": int(time.time()) - 1},
+            "other-audience": {"active": True, "client_id": "client", "aud": "http://localhost:10001/mcp"},
+        }
+        self.app = Starlette(routes=[Route("/introspect", self.introspect, methods=["POST"])])
+
+    async def introspect(self, request: Request) -> JSONResponse:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        form = await request.form()
+        return JSONResponse(self.tokens.get(str(form["token"]), {"active": False}))
+
+    def verifier(self, **kwargs) -> SimpleTokenVerifier:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+        return SimpleTokenVerifier(
+            introspection_endpoint="http://localhost:9000/introspect",
+            server_url="http://localhost:10000/mcp",
+            http_client=client,
+            **kwargs,
+        )
+
+
+class TestSimpleTokenVerifier:
+    """Test cases for SimpleTokenVerifier."""
+
+    def test_positive_results_are_cached(self):
+        """Test that an active token is introspected once."""
+        server = StandInIntrospectionServer()
+
+        async def body():
+            verifier = server.verifier()
+            results = [await verifier.verify_token("good") for _ in range(3)]
+            await verifier.aclose()
+            return results
+
+        results = asyncio.run(body())
+        assert all(result is not None and result.client_id == "client" for result in results)
+        assert server.calls == 1
+
+    def test_negative_results_are_cached(self):
+        """Test that a rejected token is cached for the negative TTL."""
+        server = StandInIntrospectionServer()
+
+        async def body():
+            verifier = server.verifier(negative_cache_ttl_seconds=60)
+            results = [await verifier.verify_token("bad") for _ in range(3)]
+            await verifier.aclose()
+            return results
+
+        assert asyncio.run(body()) == [None, None, None]
+        assert server.calls == 1
+
+    def test_expired_tokens_are_not_cached(self):
+        """Test that the cache honors the token exp claim."""
+        server = StandInIntrospectionServer()
+
+        async def body():
+            verifier = server.verifier()
+            await verifier.verify_token("expiring")
+            await verifier.verify_token("expiring")
+            await verifier.aclose()
+
+        asyncio.run(body())
+        assert server.calls == 2
+
+    def test_concurrent_lookups_are_deduplicated(self):
+        """Test single-flight introspection of the same token."""
+        server = StandInIntrospectionServer(delay=0.1)
+
+        async def body():
+            verifier = server.verifier()
+            results = await asyncio.gather(*(verifier.verify_token("good") for _ in range(10)))
+            await verifier.aclose()
+            return results
+
+        results = asyncio.run(body())
+        assert all(result is not None for result in results)
+        assert server.calls == 1
+
+    def test_strict_mode_checks_audience(self):
+        """Test RFC 8707 resource validation with oauth_strict."""
+        server = StandInIntrospectionServer()
+
+        async def body():
+            lenient = server.verifier()
+            strict = server.verifier(oauth_strict=True)
+            results = (
+                await lenient.verify_token("other-audience"),
+                await strict.verify_token("other-audience"),
+            )
+            await lenient.aclose()
+            await strict.aclose()
+            return results
+
+        lenient_result, strict_result = asyncio.run(body())
+        assert lenient_result is not None
+        assert strict_result is None
+
+    def test_cancelled_caller_does_not_fail_the_others(self):
+        """Test that cancelling the first lookup of a token leaves the coalesced ones running."""
+        server = StandInIntrospectionServer(delay=0.1)
+
+        async def body():
+            verifier = server.verifier()
+            first = asyncio.create_task(verifier.verify_token("good"))
+            await asyncio.sleep(0)
+            others = asyncio.gather(*(verifier.verify_token("good") for _ in range(3)))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            results = await others
+            cached = await verifier.verify_token("good")
+            await verifier.aclose()
+            return results, cached
+
+        results, cached = asyncio.run(body())
+        assert all(result is not None for result in results)
+        assert cached is not None
+        assert server.calls == 1